@@ -19,7 +19,8 @@ class Settings(BaseSettings):
 
     # 请求配置（防风控）
     request_timeout: int = 30
-    request_delay: float = 2.0  # 请求间隔秒数
+    request_delay: float = 2.0  # 请求间隔秒数（令牌桶平均速率 = 1 / request_delay）
+    request_burst: int = 3  # 令牌桶容量：空闲后允许连续发出的请求数
     max_retries: int = 3
     user_agent: str = (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -27,6 +28,56 @@ class Settings(BaseSettings):
         "Chrome/131.0.0.0 Safari/537.36"
     )
 
+    # 站点连接池配置（按账号复用 httpx 客户端）
+    site_http2: bool = True  # 安装了 h2 时启用 HTTP/2
+    site_max_connections: int = 10  # 单账号最大连接数
+    site_keepalive_expiry: float = 60.0  # 空闲 keep-alive 连接保留秒数
+    site_client_idle_ttl: int = 600  # 客户端闲置多少秒后从连接池移除
+
+    # 种子列表解析后端：bs4（BeautifulSoup）/ lxml（XPath 快速路径，输出一致）
+    site_parser: str = "bs4"
+
+    # HTML 解析工作池：thread（线程池）/ process（进程池，完全不占事件循环）/ inline（在事件循环内解析）
+    parse_executor: str = "thread"
+    parse_workers: int = 2
+
+    # 种子列表缓存：相同查询在 TTL 内复用结果（0 表示不缓存，仅合并并发请求）
+    listing_cache_ttl: int = 60
+    listing_cache_size: int = 128
+
+    # 自动下载：每条规则最多向后翻几页搜索结果
+    auto_download_max_pages: int = 3
+    # 增量扫描：只评估比上次水位更新的种子，每隔多少分钟全量重扫一次（捕捉促销 / 做种数变化）
+    auto_download_full_rescan_minutes: int = 60
+    # 已下载种子索引：历史记录达到该数量时改用 Bloom 过滤器（0 表示始终使用精确索引）；与数据库对账间隔（分钟）
+    downloaded_index_bloom_threshold: int = 0
+    downloaded_index_reconcile_minutes: int = 60
+    # 自动下载流水线：每个账号同时下载 .torrent 的数量、每个下载器同时推送的数量
+    auto_download_account_concurrency: int = 2
+    auto_download_downloader_concurrency: int = 2
+
+    # 下载器统计缓存：多少秒内的统计直接复用（仪表盘、定时快照共享）
+    downloader_stats_max_age: int = 30
+
+    # 多下载器并发操作：最大并发数、单个下载器截止时间（秒）
+    fanout_concurrency: int = 8
+    fanout_timeout: float = 8.0
+
+    # 下载器熔断：连续失败多少次熔断；探测退避起始 / 最大秒数
+    downloader_failure_threshold: int = 3
+    downloader_probe_base_seconds: int = 30
+    downloader_probe_max_seconds: int = 600
+
+    # 站点时区：种子页面上的促销截止时间按此时区解析（IANA 名称或 +08:00 形式）
+    site_timezone: str = "Asia/Shanghai"
+    # 促销到期处理：提前多少秒执行；触发时同一窗口（秒）内到期的种子合并为一批
+    expiry_lead_seconds: int = 60
+    expiry_batch_window: int = 5
+
+    # .torrent 文件磁盘缓存（内容寻址，按账号隔离；0 表示不缓存）
+    torrent_cache_dir: str = "torrent_cache"
+    torrent_cache_max_mb: int = 256
+
     # 日志配置
     log_dir: str = "logs"
     log_level: str = "INFO"
@@ -8,6 +8,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from config import settings
 from database import init_db
 from services.scheduler import init_scheduler, shutdown_scheduler, restore_expiry_jobs, restore_interval_jobs
+from services.site_client_pool import close_site_clients
+from services.downloader_registry import close_downloaders
+from services.parse_pool import shutdown_parse_pool
+from services.torrent_cache import torrent_cache
+from services.expiry_timer import migrate_legacy_discount_times
 
 # 配置日志
 logging.basicConfig(
@@ -22,6 +27,8 @@ async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     logger.info("NicePT Helper 启动中...")
     await init_db()
+    # 旧版本按站点本地时间保存的促销截止时间换算为 UTC（只执行一次）
+    await migrate_legacy_discount_times()
     init_scheduler()
     # 恢复所有未过期种子的精确到期定时任务
     await restore_expiry_jobs()
@@ -31,6 +38,10 @@ async def lifespan(app: FastAPI):
     logger.info("NicePT Helper 启动完成")
     yield
     shutdown_scheduler()
+    await close_site_clients()
+    await close_downloaders()
+    shutdown_parse_pool()
+    await torrent_cache.flush()
     logger.info("NicePT Helper 已关闭")
 
 
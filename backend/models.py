@@ -1,7 +1,7 @@
 """SQLAlchemy 数据模型"""
 from datetime import datetime
 from sqlalchemy import (
-    Column, Integer, String, Float, Boolean, Text, DateTime, JSON, ForeignKey
+    Column, Integer, String, Float, Boolean, Text, DateTime, JSON, ForeignKey, UniqueConstraint
 )
 from database import Base
 
@@ -187,3 +187,16 @@ class StatsSnapshot(Base):
     upload_speed = Column(Float, default=0)   # 当前上传速率（字节/秒）
     download_speed = Column(Float, default=0) # 当前下载速率（字节/秒）
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ScanWatermark(Base):
+    """种子列表增量扫描水位（每个账号 + 查询条件一条）"""
+    __tablename__ = "scan_watermarks"
+    __table_args__ = (UniqueConstraint("account_id", "query_key"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False, index=True)
+    query_key = Column(String(255), nullable=False)  # SearchParams.query_key()
+    max_torrent_id = Column(Integer, default=0)      # 已评估过的最大种子 ID
+    last_full_scan = Column(DateTime, nullable=True) # 上次全量重扫时间
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -9,6 +9,7 @@ from database import get_db
 from models import Account
 from utils.auth import get_current_user
 from services.site_adapter import NexusPHPAdapter
+from services.downloaded_index import downloaded_index
 
 router = APIRouter(prefix="/accounts", tags=["账号管理"], dependencies=[Depends(get_current_user)])
 
@@ -65,6 +66,8 @@ async def create_account(req: AccountCreate, db: AsyncSession = Depends(get_db))
     db.add(account)
     await db.commit()
     await db.refresh(account)
+    # SQLite 可能复用已删除账号的 ID：残留的历史记录归到新账号的站点
+    await downloaded_index.move_account(db, account.id, account.site_url)
     return account
 
 
@@ -120,4 +123,6 @@ async def delete_account(account_id: int, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=404, detail="账号不存在")
     await db.delete(account)
     await db.commit()
+    # 历史记录保留，已下载索引中改为不区分站点（与重新加载时的归类一致）
+    await downloaded_index.move_account(db, account_id, None)
     return {"message": "账号已删除"}
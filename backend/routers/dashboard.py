@@ -6,7 +6,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from models import Account, DownloadHistory, Downloader, FilterRule
 from utils.auth import get_current_user
-from services.downloader import create_downloader
+from services.downloader_health import call_downloader
+from services.fanout import fan_out
 
 router = APIRouter(prefix="/dashboard", tags=["仪表盘"], dependencies=[Depends(get_current_user)])
 
@@ -87,14 +88,17 @@ async def get_account_stats(account_id: int, db: AsyncSession = Depends(get_db))
 async def get_downloader_stats(db: AsyncSession = Depends(get_db)):
     """获取所有下载器状态面板"""
     result = await db.execute(select(Downloader).order_by(Downloader.id))
+    # 各下载器并发查询，离线的下载器只影响自己的条目
+    results = await fan_out(
+        result.scalars().all(),
+        lambda dl_model: call_downloader(dl_model, lambda dl: dl.get_stats()),
+        timeout=0,  # 截止时间由 call_downloader 执行（计入熔断）
+        label=lambda dl_model: dl_model.name,
+    )
     stats_list = []
-    for dl_model in result.scalars().all():
-        try:
-            dl = create_downloader(
-                dl_model.type, host=dl_model.host, port=dl_model.port,
-                username=dl_model.username, password=dl_model.password, use_ssl=dl_model.use_ssl,
-            )
-            stats = await dl.get_stats()
+    for r in results:
+        dl_model, stats = r.target, r.value
+        if r.ok:
             stats_list.append({
                 "id": dl_model.id, "name": dl_model.name, "type": dl_model.type,
                 "online": True,
@@ -102,13 +106,16 @@ async def get_downloader_stats(db: AsyncSession = Depends(get_db)):
                 "upload_speed": stats.upload_speed,
                 "downloading_count": stats.downloading_count,
                 "seeding_count": stats.seeding_count,
+                "active_count": stats.active_count,
+                "paused_count": stats.paused_count,
+                "torrent_count": stats.torrent_count,
                 "free_space": stats.free_space,
                 "free_space_gb": round(stats.free_space / (1024**3), 2) if stats.free_space else 0,
             })
-        except Exception:
+        else:
             stats_list.append({
                 "id": dl_model.id, "name": dl_model.name,
-                "type": dl_model.type, "online": False,
+                "type": dl_model.type, "online": False, "error": str(r.error),
             })
     return stats_list
 
@@ -8,6 +8,9 @@ from database import get_db
 from models import Downloader
 from utils.auth import get_current_user
 from services.downloader import create_downloader
+from services.downloader_registry import downloader_registry
+from services.downloader_health import CircuitOpenError, call_downloader, health_tracker
+from services.fanout import fan_out
 
 router = APIRouter(prefix="/downloaders", tags=["下载器"], dependencies=[Depends(get_current_user)])
 
@@ -43,11 +46,12 @@ async def _get_dl(downloader_id: int, db: AsyncSession) -> Downloader:
     return dl
 
 
-def _make_adapter(dl: Downloader):
-    return create_downloader(
-        dl.type, host=dl.host, port=dl.port,
-        username=dl.username, password=dl.password, use_ssl=dl.use_ssl,
-    )
+async def _call(dl: Downloader, func):
+    """经熔断器调用下载器；熔断中立即返回 503，不等待超时"""
+    try:
+        return await call_downloader(dl, func)
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
 
 # ========== 无路径参数的路由放前面 ==========
@@ -72,11 +76,15 @@ async def create_dl(req: DownloaderCreate, db: AsyncSession = Depends(get_db)):
 @router.post("/test")
 async def test_connection(req: DownloaderCreate):
     """测试下载器连接（未保存）"""
+    # 未保存的配置不进入注册表，测试完即关闭
     dl = create_downloader(
         req.type, host=req.host, port=req.port,
         username=req.username, password=req.password, use_ssl=req.use_ssl,
     )
-    ok = await dl.test_connection()
+    try:
+        ok = await dl.test_connection()
+    finally:
+        await dl.close()
     return {"success": ok, "message": "连接成功" if ok else "连接失败"}
 
 
@@ -84,11 +92,16 @@ async def test_connection(req: DownloaderCreate):
 async def get_all_dl_stats(db: AsyncSession = Depends(get_db)):
     """获取所有下载器汇总统计"""
     result = await db.execute(select(Downloader).order_by(Downloader.id))
+    results = await fan_out(
+        result.scalars().all(),
+        lambda dl_model: call_downloader(dl_model, lambda dl: dl.get_stats()),
+        timeout=0,  # 截止时间由 call_downloader 执行（计入熔断）
+        label=lambda dl_model: dl_model.name,
+    )
     stats_list = []
-    for dl_model in result.scalars().all():
-        try:
-            adapter = _make_adapter(dl_model)
-            stats = await adapter.get_stats()
+    for r in results:
+        dl_model, stats = r.target, r.value
+        if r.ok:
             stats_list.append({
                 "id": dl_model.id, "name": dl_model.name, "type": dl_model.type,
                 "online": True,
@@ -96,23 +109,40 @@ async def get_all_dl_stats(db: AsyncSession = Depends(get_db)):
                 "upload_speed": stats.upload_speed,
                 "downloading_count": stats.downloading_count,
                 "seeding_count": stats.seeding_count,
+                "active_count": stats.active_count,
+                "paused_count": stats.paused_count,
+                "torrent_count": stats.torrent_count,
                 "free_space": stats.free_space,
             })
-        except Exception:
+        else:
             stats_list.append({
                 "id": dl_model.id, "name": dl_model.name,
-                "type": dl_model.type, "online": False,
+                "type": dl_model.type, "online": False, "error": str(r.error),
             })
     return stats_list
 
 
+@router.get("/health")
+async def get_health(db: AsyncSession = Depends(get_db)):
+    """获取所有下载器的健康 / 熔断状态（未调用过的下载器视为正常）"""
+    result = await db.execute(select(Downloader).order_by(Downloader.id))
+    return [health_tracker.get(dl.id, dl.name).to_dict() for dl in result.scalars().all()]
+
+
+@router.get("/client-stats")
+async def get_client_stats():
+    """获取下载器客户端注册表统计（复用次数、登录次数）"""
+    return downloader_registry.stats()
+
+
 # ========== 带路径参数的路由 ==========
 
 @router.post("/{downloader_id}/test")
 async def test_existing(downloader_id: int, db: AsyncSession = Depends(get_db)):
     """测试已保存的下载器连接"""
     dl = await _get_dl(downloader_id, db)
-    ok = await _make_adapter(dl).test_connection()
+    # 手动测试同时作为探测：成功即解除熔断
+    ok = await health_tracker.probe(dl)
     return {"success": ok, "message": "连接成功" if ok else "连接失败"}
 
 
@@ -122,6 +152,8 @@ async def delete_dl(downloader_id: int, db: AsyncSession = Depends(get_db)):
     dl = await _get_dl(downloader_id, db)
     await db.delete(dl)
     await db.commit()
+    await downloader_registry.invalidate(downloader_id)
+    health_tracker.forget(downloader_id)
     return {"message": "下载器已删除"}
 
 
@@ -129,12 +161,15 @@ async def delete_dl(downloader_id: int, db: AsyncSession = Depends(get_db)):
 async def get_dl_stats(downloader_id: int, db: AsyncSession = Depends(get_db)):
     """获取单个下载器统计"""
     dl = await _get_dl(downloader_id, db)
-    stats = await _make_adapter(dl).get_stats()
+    stats = await _call(dl, lambda adapter: adapter.get_stats())
     return {
         "download_speed": stats.download_speed,
         "upload_speed": stats.upload_speed,
         "downloading_count": stats.downloading_count,
         "seeding_count": stats.seeding_count,
+        "active_count": stats.active_count,
+        "paused_count": stats.paused_count,
+        "torrent_count": stats.torrent_count,
         "free_space": stats.free_space,
     }
 
@@ -143,7 +178,7 @@ async def get_dl_stats(downloader_id: int, db: AsyncSession = Depends(get_db)):
 async def get_dl_tags(downloader_id: int, db: AsyncSession = Depends(get_db)):
     """获取下载器标签"""
     dl = await _get_dl(downloader_id, db)
-    tags = await _make_adapter(dl).get_tags()
+    tags = await _call(dl, lambda adapter: adapter.get_tags())
     return {"tags": tags}
 
 
@@ -151,9 +186,12 @@ async def get_dl_tags(downloader_id: int, db: AsyncSession = Depends(get_db)):
 async def get_dl_disk_space(downloader_id: int, db: AsyncSession = Depends(get_db)):
     """获取下载器磁盘空间"""
     dl = await _get_dl(downloader_id, db)
-    stats = await _make_adapter(dl).get_stats()
+    stats = await _call(dl, lambda adapter: adapter.get_stats())
+    used_space = await _call(dl, lambda adapter: adapter.get_used_space())
     return {
         "free_space": stats.free_space,
-        "total_space": stats.total_space,
+        # 下载器接口不提供磁盘总容量，保留字段兼容已有客户端
+        "total_space": None,
+        "used_space": used_space,
         "free_space_gb": round(stats.free_space / (1024**3), 2) if stats.free_space else 0,
     }
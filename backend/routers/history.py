@@ -2,13 +2,15 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional
-from sqlalchemy import select, func, delete
+from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database import get_db
 from models import DownloadHistory, Downloader
 from utils.auth import get_current_user
-from services.downloader import create_downloader
+from services.downloader_registry import get_downloader
+from services.bencode import read_torrent_meta
+from services.downloaded_index import delete_download_history, save_download_history
 
 router = APIRouter(prefix="/history", tags=["下载历史"], dependencies=[Depends(get_current_user)])
 
@@ -98,10 +100,7 @@ async def import_from_downloader(
     if not dl_model:
         raise HTTPException(status_code=404, detail="下载器不存在")
 
-    downloader = create_downloader(
-        dl_model.type, host=dl_model.host, port=dl_model.port,
-        username=dl_model.username, password=dl_model.password, use_ssl=dl_model.use_ssl,
-    )
+    downloader = get_downloader(dl_model)
 
     all_torrents = await downloader.get_all_torrents()
 
@@ -165,18 +164,16 @@ async def upload_torrent(req: UploadTorrentRequest, db: AsyncSession = Depends(g
         await adapter.close()
 
     # 推送到下载器
-    downloader = create_downloader(
-        dl_model.type, host=dl_model.host, port=dl_model.port,
-        username=dl_model.username, password=dl_model.password, use_ssl=dl_model.use_ssl,
-    )
-    info_hash = await downloader.add_torrent(torrent_data, save_path=req.save_path, tags=req.tags)
+    downloader = get_downloader(dl_model)
+    meta = read_torrent_meta(torrent_data)
+    info_hash = await downloader.add_torrent(torrent_data, save_path=req.save_path, tags=req.tags, meta=meta)
 
     # 记录历史
     history = DownloadHistory(
         torrent_id=req.torrent_id,
         info_hash=info_hash,
         title=torrent_info.title,
-        size=torrent_info.size,
+        size=meta.total_size if meta else torrent_info.size,
         status="downloading",
         discount_type=torrent_info.discount_type,
         account_id=req.account_id,
@@ -184,8 +181,7 @@ async def upload_torrent(req: UploadTorrentRequest, db: AsyncSession = Depends(g
         tags=req.tags,
         save_path=req.save_path,
     )
-    db.add(history)
-    await db.commit()
+    await save_download_history(db, history, account.site_url)
 
     return {"message": "种子已推送到下载器", "info_hash": info_hash}
 
@@ -193,13 +189,10 @@ async def upload_torrent(req: UploadTorrentRequest, db: AsyncSession = Depends(g
 @router.delete("/deleted")
 async def clear_deleted(db: AsyncSession = Depends(get_db)):
     """快捷清除所有已删除状态的历史记录"""
-    result = await db.execute(
-        delete(DownloadHistory).where(
-            DownloadHistory.status.in_(["deleted", "expired_deleted", "dynamic_deleted", "unregistered_deleted"])
-        )
+    removed = await delete_download_history(
+        db, DownloadHistory.status.in_(["deleted", "expired_deleted", "dynamic_deleted", "unregistered_deleted"])
     )
-    await db.commit()
-    return {"message": f"已清除 {result.rowcount} 条已删除记录"}
+    return {"message": f"已清除 {removed} 条已删除记录"}
 
 
 @router.delete("/{history_id}")
@@ -222,16 +215,12 @@ async def delete_history(
             )
             dl_model = dl_result.scalar_one_or_none()
             if dl_model:
-                dl = create_downloader(
-                    dl_model.type, host=dl_model.host, port=dl_model.port,
-                    username=dl_model.username, password=dl_model.password, use_ssl=dl_model.use_ssl,
-                )
+                dl = get_downloader(dl_model)
                 await dl.remove_torrent(history.info_hash, delete_files=True)
         except Exception:
             pass  # 下载器删除失败不阻塞历史删除
 
-    await db.delete(history)
-    await db.commit()
+    await delete_download_history(db, DownloadHistory.id == history.id)
     return {"message": "记录已删除"}
 
 
@@ -241,11 +230,8 @@ async def clear_history(
     db: AsyncSession = Depends(get_db),
 ):
     """批量清除指定状态的历史记录"""
-    result = await db.execute(
-        delete(DownloadHistory).where(DownloadHistory.status == status)
-    )
-    await db.commit()
-    return {"message": f"已清除 {result.rowcount} 条 {status} 状态的记录"}
+    removed = await delete_download_history(db, DownloadHistory.status == status)
+    return {"message": f"已清除 {removed} 条 {status} 状态的记录"}
 
 
 @router.get("/downloader-tags/{downloader_id}")
@@ -256,9 +242,6 @@ async def get_downloader_tags(downloader_id: int, db: AsyncSession = Depends(get
     if not dl_model:
         raise HTTPException(status_code=404, detail="下载器不存在")
 
-    dl = create_downloader(
-        dl_model.type, host=dl_model.host, port=dl_model.port,
-        username=dl_model.username, password=dl_model.password, use_ssl=dl_model.use_ssl,
-    )
+    dl = get_downloader(dl_model)
     tags = await dl.get_tags()
     return {"tags": tags}
@@ -9,6 +9,7 @@ from database import get_db
 from models import HitAndRun, Account
 from utils.auth import get_current_user
 from services.site_adapter import NexusPHPAdapter
+from services.rate_limiter import RequestPriority
 
 logger = logging.getLogger(__name__)
 
@@ -95,7 +96,8 @@ async def sync_hr(
     if not account:
         return {"error": "账号不存在"}
 
-    adapter = NexusPHPAdapter(account.site_url, account.cookie)
+    # 全量同步会连续抓取多页，走批量通道，不挤占前端交互请求
+    adapter = NexusPHPAdapter(account.site_url, account.cookie, priority=RequestPriority.BULK)
     total_synced = 0
 
     try:
@@ -38,6 +38,23 @@ async def scheduler_status():
     return get_scheduler_status()
 
 
+@router.get("/site-request-stats")
+async def site_request_stats():
+    """获取站点请求统计（限流令牌桶 + 连接池 + 解析工作池 + 列表缓存 + 种子文件缓存）"""
+    from services.rate_limiter import get_rate_limit_stats
+    from services.site_client_pool import site_client_pool
+    from services.parse_pool import parse_pool
+    from services.listing_cache import listing_cache
+    from services.torrent_cache import torrent_cache
+    return {
+        "rate_limits": get_rate_limit_stats(),
+        "client_pool": site_client_pool.stats(),
+        "parse_pool": parse_pool.stats(),
+        "listing_cache": listing_cache.stats(),
+        "torrent_cache": torrent_cache.stats(),
+    }
+
+
 @router.get("/kv/{key}")
 async def get_setting(key: str, db: AsyncSession = Depends(get_db)):
     """获取单个设置"""
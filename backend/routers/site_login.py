@@ -12,6 +12,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from database import get_db
 from models import Account
+from services.downloaded_index import downloaded_index
 from utils.auth import get_current_user
 from services.login_service import init_login, submit_login
 from services.site_adapter import NexusPHPAdapter
@@ -112,6 +113,8 @@ async def login_submit(req: SubmitLoginRequest, db: AsyncSession = Depends(get_d
         await db.commit()
         await db.refresh(account)
         account_id = account.id
+        # SQLite 可能复用已删除账号的 ID：残留的历史记录归到新账号的站点
+        await downloaded_index.move_account(db, account_id, account.site_url)
 
     return SubmitLoginResponse(
         success=True,
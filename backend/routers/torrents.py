@@ -1,5 +1,4 @@
 """种子搜索与详情路由"""
-from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional
@@ -10,6 +9,8 @@ from database import get_db
 from models import Account
 from utils.auth import get_current_user
 from services.site_adapter import NexusPHPAdapter, SearchParams
+from services.expiry_timer import parse_site_time
+from services.downloaded_index import save_download_history
 
 router = APIRouter(prefix="/torrents", tags=["种子"], dependencies=[Depends(get_current_user)])
 
@@ -21,6 +22,7 @@ class SearchRequest(BaseModel):
     spstate: int = 0  # 0=全部, 2=免费, 3=2X, 4=2X免费
     incldead: int = 0  # 0=活种, 1=全部
     page: int = 0
+    refresh: bool = False  # 强制刷新，绕过列表缓存
 
 
 class TorrentResponse(BaseModel):
@@ -63,7 +65,7 @@ async def search_torrents(req: SearchRequest, db: AsyncSession = Depends(get_db)
             incldead=req.incldead,
             page=req.page,
         )
-        torrents = await adapter.search_torrents(params)
+        torrents = await adapter.search_torrents(params, refresh=req.refresh)
         return [TorrentResponse(
             id=t.id, title=t.title, subtitle=t.subtitle,
             category=t.category, size=t.size,
@@ -160,7 +162,8 @@ async def download_torrent(
 ):
     """下载种子并推送到下载器"""
     from models import Downloader
-    from services.downloader import create_downloader
+    from services.downloader_registry import get_downloader
+    from services.bencode import read_torrent_meta
     from models import DownloadHistory
 
     adapter, account = await _get_adapter(account_id, db)
@@ -178,25 +181,18 @@ async def download_torrent(
             if not dl:
                 raise HTTPException(status_code=404, detail="下载器不存在")
 
-            downloader = create_downloader(
-                dl.type, host=dl.host, port=dl.port,
-                username=dl.username, password=dl.password, use_ssl=dl.use_ssl,
-            )
-            info_hash = await downloader.add_torrent(torrent_data, save_path=save_path, tags=tags)
+            downloader = get_downloader(dl)
+            meta = read_torrent_meta(torrent_data)
+            info_hash = await downloader.add_torrent(torrent_data, save_path=save_path, tags=tags, meta=meta)
 
             # 记录下载历史（保存 H&R 和促销截止时间）
-            _discount_end = None
-            if torrent_info.discount_end_time:
-                try:
-                    _discount_end = datetime.strptime(torrent_info.discount_end_time, "%Y-%m-%d %H:%M:%S")
-                except (ValueError, TypeError):
-                    pass
+            _discount_end = parse_site_time(torrent_info.discount_end_time)  # 站点本地时间 -> UTC
 
             history = DownloadHistory(
                 torrent_id=torrent_id,
                 info_hash=info_hash,
                 title=torrent_info.title,
-                size=torrent_info.size,
+                size=meta.total_size if meta else torrent_info.size,
                 status="downloading",
                 discount_type=torrent_info.discount_type,
                 discount_end_time=_discount_end,
@@ -206,8 +202,7 @@ async def download_torrent(
                 tags=tags,
                 save_path=save_path,
             )
-            db.add(history)
-            await db.commit()
+            await save_download_history(db, history, account.site_url)
 
             # 注册精确到期定时任务
             if _discount_end:
@@ -254,7 +249,8 @@ class PushRequest(BaseModel):
 async def push_torrent(req: PushRequest, db: AsyncSession = Depends(get_db)):
     """批量推送种子到下载器（可用于规则手动触发）"""
     from models import Downloader, DownloadHistory
-    from services.downloader import create_downloader
+    from services.downloader_registry import get_downloader
+    from services.bencode import read_torrent_meta
 
     adapter, account = await _get_adapter(req.account_id, db)
     try:
@@ -263,28 +259,21 @@ async def push_torrent(req: PushRequest, db: AsyncSession = Depends(get_db)):
         if not dl:
             raise HTTPException(status_code=404, detail="下载器不存在")
 
-        downloader = create_downloader(
-            dl.type, host=dl.host, port=dl.port,
-            username=dl.username, password=dl.password, use_ssl=dl.use_ssl,
-        )
+        downloader = get_downloader(dl)
 
         torrent_data = await adapter.download_torrent(req.torrent_id, account.passkey)
         torrent_info = await adapter.get_torrent_detail(req.torrent_id)
-        info_hash = await downloader.add_torrent(torrent_data, save_path=req.save_path, tags=req.tags)
+        meta = read_torrent_meta(torrent_data)
+        info_hash = await downloader.add_torrent(torrent_data, save_path=req.save_path, tags=req.tags, meta=meta)
 
         # 解析促销截止时间
-        _discount_end = None
-        if torrent_info.discount_end_time:
-            try:
-                _discount_end = datetime.strptime(torrent_info.discount_end_time, "%Y-%m-%d %H:%M:%S")
-            except (ValueError, TypeError):
-                pass
+        _discount_end = parse_site_time(torrent_info.discount_end_time)  # 站点本地时间 -> UTC
 
         history = DownloadHistory(
             torrent_id=req.torrent_id,
             info_hash=info_hash,
             title=torrent_info.title,
-            size=torrent_info.size,
+            size=meta.total_size if meta else torrent_info.size,
             status="downloading",
             discount_type=torrent_info.discount_type,
             discount_end_time=_discount_end,
@@ -294,8 +283,7 @@ async def push_torrent(req: PushRequest, db: AsyncSession = Depends(get_db)):
             tags=req.tags,
             save_path=req.save_path,
         )
-        db.add(history)
-        await db.commit()
+        await save_download_history(db, history, account.site_url)
 
         # 注册精确到期定时任务
         if _discount_end:
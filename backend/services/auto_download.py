@@ -0,0 +1,508 @@
+"""
+自动下载流水线
+
+一次自动下载任务拆成五个阶段，阶段之间用有界 asyncio 队列衔接：
+    搜索 → 匹配 → 下载 .torrent → 推送到下载器 → 写入历史
+- 搜索 + 匹配：每个账号一个任务（站点请求本就按账号限流）；同一账号下搜索条件相同的规则归为一组，
+  每页只请求一次，结果按 sort_order 依次交给组内各规则匹配；
+  规则的每个关键字各是一个查询，并发翻页后按种子 ID 合并去重再匹配
+- 下载 .torrent：每个账号 settings.auto_download_account_concurrency 个 worker
+- 推送：每个下载器 settings.auto_download_downloader_concurrency 个 worker（经熔断器）
+- 写入历史：单个 worker（SQLite 只有一个写者），每条记录用独立会话提交并注册到期定时；
+  提交失败只回滚该会话，规划阶段加载的规则 / 账号对象不会因回滚而过期
+不同账号、不同下载器之间并行，一次任务的耗时取决于最慢的账号，而不是所有规则之和。
+"""
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import func, select
+
+from config import settings
+from services.bencode import TorrentMeta, read_torrent_meta
+from services.downloaded_index import downloaded_index, save_download_history, site_key
+from services.site_adapter import NexusPHPAdapter, SearchParams, TorrentInfo
+
+logger = logging.getLogger(__name__)
+
+# 阶段之间的队列容量：下游变慢时上游等待，避免一次性下载大量 .torrent
+_QUEUE_SIZE = 32
+
+
+# ========== 增量扫描水位 ==========
+
+@dataclass
+class _ListingScan:
+    """一次自动下载任务中某个（账号, 查询）的增量扫描状态"""
+    watermark: int = 0      # 上次已评估到的最大种子 ID
+    full_scan: bool = True  # 本次是否全量重扫
+    max_seen: int = 0       # 本次评估过的最大种子 ID
+    complete: bool = True   # 是否所有规则都扫描到了水位线（中途因名额已满停止则为 False）
+
+    def is_new(self, torrent_id: str) -> bool:
+        return self.full_scan or _torrent_id_int(torrent_id) > self.watermark
+
+
+def _torrent_id_int(torrent_id: str) -> int:
+    try:
+        return int(torrent_id)
+    except (TypeError, ValueError):
+        return 0
+
+
+async def _get_listing_scan(db, scans: dict, account_id: int, query_key: str) -> _ListingScan:
+    """读取（账号, 查询）的扫描水位，并判断本次是否需要全量重扫"""
+    from models import ScanWatermark
+
+    key = (account_id, query_key)
+    if key in scans:
+        return scans[key]
+
+    result = await db.execute(
+        select(ScanWatermark).where(
+            ScanWatermark.account_id == account_id,
+            ScanWatermark.query_key == query_key,
+        )
+    )
+    mark = result.scalar_one_or_none()
+    scan = _ListingScan()
+    if mark and mark.max_torrent_id and mark.last_full_scan:
+        rescan_after = timedelta(minutes=settings.auto_download_full_rescan_minutes)
+        scan.watermark = mark.max_torrent_id
+        scan.full_scan = datetime.utcnow() - mark.last_full_scan >= rescan_after
+    scans[key] = scan
+    return scan
+
+
+async def _save_watermarks(db, scans: dict):
+    """推进扫描水位：只有所有规则都扫描到水位线时才推进，避免漏评估新种子"""
+    from models import ScanWatermark
+
+    now = datetime.utcnow()
+    for (account_id, query_key), scan in scans.items():
+        result = await db.execute(
+            select(ScanWatermark).where(
+                ScanWatermark.account_id == account_id,
+                ScanWatermark.query_key == query_key,
+            )
+        )
+        mark = result.scalar_one_or_none()
+        if not mark:
+            mark = ScanWatermark(account_id=account_id, query_key=query_key, max_torrent_id=0)
+            db.add(mark)
+        if scan.complete and scan.max_seen > (mark.max_torrent_id or 0):
+            mark.max_torrent_id = scan.max_seen
+        if scan.full_scan and scan.complete:
+            mark.last_full_scan = now
+    await db.commit()
+
+
+# ========== 任务规划 ==========
+
+@dataclass(eq=False)
+class _RuleJob:
+    """一条规则在本次任务中的执行状态"""
+    rule: object
+    account: object
+    dl_model: object
+    site: str               # site_key(account.site_url)，规划时取出，流水线中不再访问 ORM 属性
+    queries: list[SearchParams]  # 每个关键字一个查询
+    rule_dict: dict
+    slots: int              # 本次最多新增的下载数
+    scans: list[_ListingScan]    # 与 queries 一一对应
+    added: int = 0
+    inflight: int = 0       # 已进入流水线、尚未出结果的种子数
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def reserved(self) -> int:
+        return self.added + self.inflight
+
+
+@dataclass(eq=False)
+class _QueryGroup:
+    """同一账号下搜索条件相同的规则：共用一次翻页扫描"""
+    account: object
+    queries: list[SearchParams]
+    scans: list[_ListingScan]
+    jobs: list[_RuleJob] = field(default_factory=list)  # 按 sort_order
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def names(self) -> str:
+        return ", ".join(job.rule.name for job in self.jobs)
+
+
+@dataclass(eq=False)
+class _Candidate:
+    """流水线中的一个待下载种子"""
+    job: _RuleJob
+    adapter: NexusPHPAdapter
+    torrent: TorrentInfo
+    torrent_data: bytes = b""
+    meta: Optional[TorrentMeta] = None
+    info_hash: str = ""
+    finished: bool = False
+
+
+def _rule_queries(rule) -> list[SearchParams]:
+    """
+    规则的搜索查询：每个关键字一个（RuleEngine 中关键字是“任一命中”，合并各关键字的结果才不漏种子），
+    没有关键字时为一个不带关键字的查询；免费筛选走站点的 spstate。按 query_key 去重并排序，
+    关键字相同、顺序不同的规则得到相同的查询组。
+    """
+    keywords = [k.strip() for k in (rule.keywords or "").split(",") if k.strip()] or [""]
+    queries = {}
+    for keyword in keywords:
+        params = SearchParams(keyword=keyword, spstate=2 if rule.free_only else 0)
+        queries.setdefault(params.query_key(), params)
+    return [queries[key] for key in sorted(queries)]
+
+
+def _rule_to_dict(rule) -> dict:
+    """转换规则为 RuleEngine 使用的字典"""
+    return {
+        "free_only": rule.free_only,
+        "double_upload": rule.double_upload,
+        "skip_hr": rule.skip_hr,
+        "min_size": rule.min_size,
+        "max_size": rule.max_size,
+        "min_seeders": rule.min_seeders,
+        "max_seeders": rule.max_seeders,
+        "min_leechers": rule.min_leechers,
+        "max_leechers": rule.max_leechers,
+        "keywords": rule.keywords,
+        "exclude_keywords": rule.exclude_keywords,
+        "categories": rule.categories,
+        "max_publish_hours": rule.max_publish_hours,
+    }
+
+
+async def _plan_jobs(db, rules: list, scans: dict) -> list[_RuleJob]:
+    """为每条规则确定账号、下载器和剩余名额；无法执行的规则记录原因后跳过"""
+    from models import Account, Downloader, DownloadHistory
+    from services.downloader_health import health_tracker
+
+    accounts = {a.id: a for a in (await db.execute(select(Account))).scalars()}
+    default_account = next((a for a in sorted(accounts.values(), key=lambda a: a.id) if a.is_active), None)
+    dl_models = {d.id: d for d in (await db.execute(select(Downloader))).scalars()}
+
+    # 各规则当前下载中的数量（一次分组查询）
+    count_result = await db.execute(
+        select(DownloadHistory.rule_id, func.count()).where(
+            DownloadHistory.rule_id.in_([rule.id for rule in rules]),
+            DownloadHistory.status == "downloading",
+        ).group_by(DownloadHistory.rule_id)
+    )
+    downloading = dict(count_result.all())
+
+    jobs = []
+    for rule in rules:
+        # 确定使用的账号（没有指定账号时使用第一个活跃账号）
+        if not rule.account_id:
+            account = default_account
+            if not account:
+                logger.warning(f"规则 [{rule.name}] 没有可用账号")
+                continue
+        else:
+            account = accounts.get(rule.account_id)
+            if not account:
+                logger.warning(f"规则 [{rule.name}] 指定的账号 {rule.account_id} 不存在")
+                continue
+
+        # 确定下载器
+        if not rule.downloader_id:
+            logger.warning(f"规则 [{rule.name}] 未指定下载器，跳过")
+            continue
+        dl_model = dl_models.get(rule.downloader_id)
+        if not dl_model:
+            logger.warning(f"规则 [{rule.name}] 指定的下载器不存在")
+            continue
+        # 下载器熔断中：不搜索、不下载种子，等恢复后再处理
+        if health_tracker.is_open(dl_model.id):
+            logger.warning(f"规则 [{rule.name}] 的下载器 [{dl_model.name}] 暂不可用，跳过")
+            continue
+
+        # 检查当前下载中的数量
+        current_downloading = downloading.get(rule.id, 0)
+        if current_downloading >= rule.max_downloading:
+            logger.info(f"规则 [{rule.name}] 已达最大下载数 {rule.max_downloading}，跳过")
+            continue
+
+        queries = _rule_queries(rule)
+        jobs.append(_RuleJob(
+            rule=rule, account=account, dl_model=dl_model, site=site_key(account.site_url), queries=queries,
+            rule_dict=_rule_to_dict(rule),
+            slots=rule.max_downloading - current_downloading,
+            scans=[await _get_listing_scan(db, scans, account.id, params.query_key()) for params in queries],
+        ))
+    return jobs
+
+
+def _group_jobs(jobs: list[_RuleJob]) -> dict[int, list[_QueryGroup]]:
+    """
+    按（账号, 查询）归并规则，返回 账号 ID -> 查询组列表。
+    jobs 已按 sort_order 排列：组按组内第一条规则的顺序排列，组内规则保持原顺序。
+    组内规则共用一个 changed 事件，任一规则的种子出结果都会唤醒该组的搜索。
+    """
+    groups: dict[tuple, _QueryGroup] = {}
+    for job in jobs:
+        key = (job.account.id, *(params.query_key() for params in job.queries))
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = _QueryGroup(account=job.account, queries=job.queries, scans=job.scans)
+        job.changed = group.changed
+        group.jobs.append(job)
+
+    by_account: dict[int, list[_QueryGroup]] = {}
+    for group in groups.values():
+        by_account.setdefault(group.account.id, []).append(group)
+    return by_account
+
+
+# ========== 流水线 ==========
+
+class AutoDownloadPipeline:
+    """自动下载流水线（一次任务一个实例）"""
+
+    def __init__(self):
+        # 流水线中处理中的（站点, 种子 ID），避免多条规则重复下载同一种子
+        self._claimed: set[tuple[str, str]] = set()
+        self._fetch_queues: dict[int, asyncio.Queue] = {}  # 账号 ID -> 队列
+        self._push_queues: dict[int, asyncio.Queue] = {}   # 下载器 ID -> 队列
+        self._record_queue: asyncio.Queue = asyncio.Queue(_QUEUE_SIZE)
+        self._workers: list[asyncio.Task] = []
+        self.added = 0
+
+    async def run(self, jobs: list[_RuleJob]):
+        by_account = _group_jobs(jobs)
+
+        for account_id in by_account:
+            queue = self._fetch_queues[account_id] = asyncio.Queue(_QUEUE_SIZE)
+            self._spawn(queue, self._fetch, settings.auto_download_account_concurrency)
+        for dl_id in {job.dl_model.id for job in jobs}:
+            queue = self._push_queues[dl_id] = asyncio.Queue(_QUEUE_SIZE)
+            self._spawn(queue, self._push, settings.auto_download_downloader_concurrency)
+        # 数据库会话不能并发使用：写入阶段只有一个 worker
+        self._spawn(self._record_queue, self._record, 1)
+
+        try:
+            await asyncio.gather(*(self._search_account(groups) for groups in by_account.values()))
+            # 搜索结束后按阶段顺序排空队列（每个 worker 先放入下一阶段再标记完成）
+            for queue in self._fetch_queues.values():
+                await queue.join()
+            for queue in self._push_queues.values():
+                await queue.join()
+            await self._record_queue.join()
+        finally:
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+
+    def _spawn(self, queue: asyncio.Queue, handle: Callable[[_Candidate], Awaitable[None]], count: int):
+        for _ in range(max(1, count)):
+            self._workers.append(asyncio.create_task(self._consume(queue, handle)))
+
+    async def _consume(self, queue: asyncio.Queue, handle: Callable[[_Candidate], Awaitable[None]]):
+        while True:
+            candidate = await queue.get()
+            try:
+                await handle(candidate)
+            except BaseException as e:
+                # 包括取消：名额和占用必须归还，否则等待名额的搜索任务永远不会被唤醒
+                self._finish(candidate, ok=False, error=e)
+                if not isinstance(e, Exception):
+                    raise
+            finally:
+                queue.task_done()
+
+    def _finish(self, candidate: _Candidate, ok: bool, error: Exception = None):
+        """种子离开流水线：更新规则名额并唤醒等待名额的搜索任务（每个种子只结算一次）"""
+        if candidate.finished:
+            return
+        candidate.finished = True
+        job, torrent = candidate.job, candidate.torrent
+        job.inflight -= 1
+        if ok:
+            job.added += 1
+            self.added += 1
+        else:
+            # 下载失败的种子下次仍需重新评估，本次不推进水位
+            for scan in job.scans:
+                scan.complete = False
+            logger.error(f"下载种子 {torrent.id} 失败: {error}")
+        self._claimed.discard((job.site, torrent.id))
+        job.changed.set()
+
+    # ---- 搜索 + 匹配 ----
+
+    async def _search_account(self, groups: list[_QueryGroup]):
+        """依次处理同一账号的各查询组"""
+        for group in groups:
+            try:
+                await self._search_group(group)
+            except Exception as e:
+                for scan in group.scans:
+                    scan.complete = False
+                logger.error(f"处理规则 [{group.names}] 失败: {e}")
+
+    async def _search_group(self, group: _QueryGroup):
+        from services.rate_limiter import RequestPriority
+        from services.rule_engine import RuleEngine
+
+        engine = RuleEngine()
+        site = group.jobs[0].site
+        # 同一账号的搜索和种子下载共用连接池中的客户端
+        adapter = NexusPHPAdapter(group.account.site_url, group.account.cookie, priority=RequestPriority.SCHEDULER)
+
+        # 增量扫描：非全量重扫时某个查询遇到水位线以下的种子即停止该查询的翻页，只评估新种子
+        stops = [None if scan.full_scan else (lambda t, scan=scan: not scan.is_new(t.id)) for scan in group.scans]
+
+        def on_error(index: int, error: Exception):
+            # 只停止失败的查询：它的新种子没有评估完，本次不推进水位，其他关键字照常翻页
+            group.scans[index].complete = False
+            logger.error(f"规则 [{group.names}] 搜索 {group.queries[index].query_key()} 失败: {error}")
+
+        # 各查询并发逐页扫描、合并去重，组内所有规则名额都满后立即停止翻页
+        scanned_to_mark = False
+        try:
+            async for index, torrent in adapter.iter_search_merged(
+                group.queries, max_pages=settings.auto_download_max_pages, stops=stops, on_error=on_error,
+            ):
+                # 组内规则名额都被处理中的种子占满：等它们出结果，失败的会让出名额
+                while True:
+                    pending = [job for job in group.jobs if job.added < job.slots]
+                    open_jobs = [job for job in pending if job.reserved < job.slots]
+                    if open_jobs or not pending:
+                        break
+                    group.changed.clear()
+                    await group.changed.wait()
+                if not pending:
+                    break
+                scan = group.scans[index]
+                scan.max_seen = max(scan.max_seen, _torrent_id_int(torrent.id))
+
+                # 跳过已下载 / 其他规则正在处理的种子
+                claim = (site, torrent.id)
+                if claim in self._claimed or await downloaded_index.contains(site, torrent.id):
+                    continue
+
+                # 按 sort_order 交给第一条匹配且还有名额的规则。
+                # 名额暂时占满的规则跳过本种子；若其处理中的种子失败，_finish 会让本次不推进水位，下次重新评估
+                job = next((job for job in open_jobs if engine.match(torrent, job.rule_dict)), None)
+                if job is None:
+                    continue
+
+                self._claimed.add(claim)
+                job.inflight += 1
+                await self._fetch_queues[job.account.id].put(_Candidate(job=job, adapter=adapter, torrent=torrent))
+            else:
+                scanned_to_mark = True
+        finally:
+            # 组内规则没有评估完所有新种子（名额已满 / 出错），本次不推进水位
+            if not scanned_to_mark:
+                for scan in group.scans:
+                    scan.complete = False
+
+    # ---- 下载 .torrent ----
+
+    async def _fetch(self, candidate: _Candidate):
+        candidate.torrent_data = await candidate.adapter.download_torrent(
+            candidate.torrent.id, candidate.job.account.passkey,
+        )
+        candidate.meta = read_torrent_meta(candidate.torrent_data)
+        await self._push_queues[candidate.job.dl_model.id].put(candidate)
+
+    # ---- 推送到下载器 ----
+
+    async def _push(self, candidate: _Candidate):
+        from services.downloader_health import call_downloader
+
+        rule = candidate.job.rule
+        candidate.info_hash = await call_downloader(
+            candidate.job.dl_model,
+            lambda dl: dl.add_torrent(
+                candidate.torrent_data, save_path=rule.save_path, tags=rule.tags, meta=candidate.meta,
+            ),
+        )
+        await self._record_queue.put(candidate)
+
+    # ---- 写入历史 ----
+
+    async def _record(self, candidate: _Candidate):
+        from database import async_session
+        from models import DownloadHistory
+        from services.expiry_timer import parse_site_time
+        from services.scheduler import schedule_expiry_job
+
+        job, torrent, meta = candidate.job, candidate.torrent, candidate.meta
+        # 记录历史（保存 H&R 和促销截止时间，用于后续保护和自动删种判断）
+        # 解析 discount_end_time（站点本地时间）为 UTC datetime
+        discount_end = parse_site_time(torrent.discount_end_time)
+        history = DownloadHistory(
+            torrent_id=torrent.id,
+            info_hash=candidate.info_hash,
+            title=torrent.title,
+            size=meta.total_size if meta else torrent.size,
+            status="downloading",
+            discount_type=torrent.discount_type,
+            discount_end_time=discount_end,
+            has_hr=torrent.has_hr,
+            account_id=job.account.id,
+            downloader_id=job.dl_model.id,
+            rule_id=job.rule.id,
+            tags=job.rule.tags,
+            save_path=job.rule.save_path,
+        )
+        async with async_session() as db:
+            await save_download_history(db, history, job.site)
+
+        # 如果有促销截止时间，注册精确到期定时
+        if discount_end:
+            schedule_expiry_job(history.id, torrent.id, discount_end)
+
+        self._finish(candidate, ok=True)
+        logger.info(f"自动下载: [{torrent.id}] {torrent.title[:60]}")
+
+
+async def run_auto_download():
+    """
+    自动下载任务：
+    1. 读取所有启用的规则（按 sort_order），确定账号、下载器和剩余名额
+    2. 各账号并发搜索，按规则匹配并过滤已下载的种子（查询已下载索引，不扫描历史表）
+    3. 流水线下载 .torrent、推送到下载器并记录历史
+    4. 推进增量扫描水位
+    """
+    from database import async_session
+    from models import FilterRule
+
+    logger.info("开始执行自动下载任务")
+
+    async with async_session() as db:
+        # 获取所有启用的规则
+        result = await db.execute(
+            select(FilterRule).where(FilterRule.enabled == True).order_by(FilterRule.sort_order)
+        )
+        rules = result.scalars().all()
+        if not rules:
+            logger.info("没有启用的规则，跳过")
+            return
+
+        # 本次任务各（账号, 查询）的增量扫描状态，任务结束后统一推进水位
+        scans: dict[tuple[int, str], _ListingScan] = {}
+
+        jobs = await _plan_jobs(db, rules, scans)
+        if jobs:
+            await AutoDownloadPipeline().run(jobs)
+            for job in jobs:
+                if job.added > 0:
+                    logger.info(f"规则 [{job.rule.name}] 本次下载 {job.added} 个种子")
+
+        try:
+            await _save_watermarks(db, scans)
+        except Exception as e:
+            logger.error(f"保存增量扫描水位失败: {e}")
+
+    logger.info("自动下载任务完成")
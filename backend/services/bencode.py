@@ -0,0 +1,174 @@
+"""
+Bencode 解码
+
+解析 .torrent 文件内容，并根据 info 字典的原始字节计算 info_hash。
+推送到下载器之前即可得到 info_hash（v1 / v2）、精确总大小和文件列表，
+不必等下载器添加完成后再去查询。
+"""
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BencodeError(ValueError):
+    """bencode 数据格式错误"""
+
+
+def _decode(data: bytes, i: int):
+    """从位置 i 解码一个值，返回 (值, 结束位置)"""
+    try:
+        c = data[i:i + 1]
+        if c == b"i":
+            end = data.index(b"e", i)
+            return int(data[i + 1:end]), end + 1
+        if c == b"l":
+            i += 1
+            items = []
+            while data[i:i + 1] != b"e":
+                value, i = _decode(data, i)
+                items.append(value)
+            return items, i + 1
+        if c == b"d":
+            i += 1
+            result = {}
+            while data[i:i + 1] != b"e":
+                key, i = _decode(data, i)
+                if not isinstance(key, bytes):
+                    raise BencodeError("字典键必须是字符串")
+                result[key], i = _decode(data, i)
+            return result, i + 1
+        if c.isdigit():
+            colon = data.index(b":", i)
+            length = int(data[i:colon])
+            start = colon + 1
+            if start + length > len(data):
+                raise BencodeError("字符串长度越界")
+            return data[start:start + length], start + length
+    except (ValueError, IndexError) as e:
+        if isinstance(e, BencodeError):
+            raise
+        raise BencodeError(f"位置 {i} 解码失败: {e}") from e
+    raise BencodeError(f"位置 {i} 出现无效字符 {c!r}")
+
+
+def bdecode(data: bytes):
+    """解码完整的 bencode 数据"""
+    value, end = _decode(data, 0)
+    if end != len(data):
+        raise BencodeError("数据末尾有多余内容")
+    return value
+
+
+def _info_span(data: bytes) -> Optional[tuple[int, int]]:
+    """定位顶层字典中 info 值的原始字节区间（info_hash 必须基于原始字节计算）"""
+    if data[:1] != b"d":
+        raise BencodeError("种子文件顶层必须是字典")
+    i = 1
+    while data[i:i + 1] != b"e":
+        key, i = _decode(data, i)
+        start = i
+        _, i = _decode(data, i)
+        if key == b"info":
+            return start, i
+    return None
+
+
+@dataclass
+class TorrentFile:
+    """种子内的单个文件"""
+    path: str = ""
+    size: int = 0
+
+
+@dataclass
+class TorrentMeta:
+    """种子元信息"""
+    name: str = ""
+    info_hash_v1: str = ""  # SHA-1（v1 / 混合种子）
+    info_hash_v2: str = ""  # SHA-256（v2 / 混合种子）
+    total_size: int = 0     # 字节
+    piece_length: int = 0
+    private: bool = False
+    files: list[TorrentFile] = field(default_factory=list)
+
+    @property
+    def hash_id(self) -> str:
+        """下载器中使用的种子标识：有 v1 hash 用 v1，纯 v2 种子用截断到 40 位的 v2 hash（与 qBittorrent 一致）"""
+        return self.info_hash_v1 or self.info_hash_v2[:40]
+
+
+def _text(value) -> str:
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return str(value)
+
+
+def _walk_file_tree(tree: dict, prefix: list[str], files: list[TorrentFile]):
+    """遍历 v2 的 file tree：叶子节点为 {"": {"length": ...}}"""
+    for name, node in tree.items():
+        if not isinstance(node, dict):
+            continue
+        if name == b"":
+            files.append(TorrentFile(path="/".join(prefix), size=node.get(b"length", 0)))
+        else:
+            _walk_file_tree(node, prefix + [_text(name)], files)
+
+
+def parse_torrent(data: bytes) -> TorrentMeta:
+    """解析 .torrent 文件，计算 info_hash、总大小和文件列表"""
+    span = _info_span(data)
+    if span is None:
+        raise BencodeError("种子文件缺少 info 字典")
+    info_bytes = data[span[0]:span[1]]
+    info, _ = _decode(info_bytes, 0)
+    if not isinstance(info, dict):
+        raise BencodeError("info 必须是字典")
+    try:
+        return _build_meta(info, info_bytes)
+    except (AttributeError, TypeError, ValueError, KeyError) as e:
+        # 字段类型不符合规范（如 files 不是字典列表、length 不是整数）
+        raise BencodeError(f"种子文件结构无效: {e}") from e
+
+
+def _build_meta(info: dict, info_bytes: bytes) -> TorrentMeta:
+    meta = TorrentMeta(
+        name=_text(info.get(b"name.utf-8") or info.get(b"name", b"")),
+        piece_length=info.get(b"piece length", 0),
+        private=info.get(b"private", 0) == 1,
+    )
+    meta_version = info.get(b"meta version", 1)
+    # 纯 v2 种子没有 pieces 字段，info 的 SHA-1 不是有效的 v1 hash
+    if b"pieces" in info or meta_version == 1:
+        meta.info_hash_v1 = hashlib.sha1(info_bytes).hexdigest()
+    if meta_version == 2:
+        meta.info_hash_v2 = hashlib.sha256(info_bytes).hexdigest()
+
+    if b"files" in info:
+        # v1 多文件；跳过 BEP 47 的 padding 文件
+        for f in info[b"files"]:
+            if b"p" in f.get(b"attr", b""):
+                continue
+            parts = f.get(b"path.utf-8") or f.get(b"path", [])
+            meta.files.append(TorrentFile(
+                path="/".join([meta.name] + [_text(p) for p in parts]),
+                size=f.get(b"length", 0),
+            ))
+    elif b"length" in info:
+        meta.files.append(TorrentFile(path=meta.name, size=info[b"length"]))
+    elif isinstance(info.get(b"file tree"), dict):
+        _walk_file_tree(info[b"file tree"], [meta.name], meta.files)
+
+    meta.total_size = sum(f.size for f in meta.files)
+    return meta
+
+
+def read_torrent_meta(data: bytes) -> Optional[TorrentMeta]:
+    """解析种子元信息，数据无效时记录警告并返回 None"""
+    try:
+        return parse_torrent(data)
+    except BencodeError as e:
+        logger.warning(f"解析种子文件失败: {e}")
+        return None
@@ -0,0 +1,311 @@
+"""
+已下载种子索引
+
+自动下载判断“种子是否下载过”时不再每次全表扫描 DownloadHistory：
+- 按（站点, 种子 ID）建内存索引，首次使用时从数据库流式加载一次
+- 所有写入 / 删除历史记录的地方都经过 save_download_history / delete_download_history，
+  提交成功后同步更新索引；新建 / 删除账号后由 move_account 更新该账号记录所属的站点
+- 历史记录超过 settings.downloaded_index_bloom_threshold 时改用 Bloom 过滤器（每个站点一个），
+  只有过滤器判定“可能存在”的种子才查询数据库确认，内存占用与记录数基本无关
+- 定时与数据库对账（reconcile），修正直接改库等带来的偏差，并清除 Bloom 过滤器中已删除的记录
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from collections import Counter
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, select
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def site_key(site_url: Optional[str]) -> str:
+    """站点标识：同一站点的多个账号共用一组种子 ID；未知站点为空字符串"""
+    return (site_url or "").strip().rstrip("/").lower()
+
+
+class BloomFilter:
+    """定长 Bloom 过滤器（双重哈希），只支持添加，不支持删除"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1024, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+
+class DownloadedIndex:
+    """
+    （站点, 种子 ID）索引。
+    精确模式：站点 -> {种子 ID: 记录数}，同一种子有多条记录时全部删除后才移出索引；
+    Bloom 模式：站点 -> BloomFilter，命中后按种子 ID 查询数据库确认。
+    账号已删除、无法确定站点的历史记录归入空字符串站点，对所有站点生效（与旧的全局判断一致）。
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._loaded = False
+        self.bloom = False
+        self._exact: dict[str, Counter] = {}
+        self._blooms: dict[str, BloomFilter] = {}
+        self._account_sites: dict[int, str] = {}  # 账号 ID -> 站点（Bloom 模式确认时用）
+        self._pending: Optional[list] = None       # 加载期间发生的写入，加载完成后补齐
+        self.rows = 0
+        self.loaded_at = 0.0
+        self.load_seconds = 0.0
+        self.confirm_queries = 0
+        self.last_drift = 0
+
+    # ---- 加载 / 对账 ----
+
+    async def ensure_loaded(self):
+        if not self._loaded:
+            async with self._lock:
+                if not self._loaded:
+                    await self._load()
+
+    async def _load(self) -> tuple[dict, dict]:
+        """从数据库流式读取（站点, 种子 ID），重建索引；返回新旧精确索引用于对账"""
+        from database import async_session
+        from models import Account, DownloadHistory
+
+        start = time.monotonic()
+        self._pending = []
+        async with async_session() as db:
+            accounts = {a_id: site_key(url) for a_id, url in (await db.execute(select(Account.id, Account.site_url))).all()}
+            threshold = settings.downloaded_index_bloom_threshold
+            total = 0
+            if threshold:
+                total = (await db.execute(
+                    select(func.count()).select_from(DownloadHistory).where(DownloadHistory.torrent_id != "")
+                )).scalar() or 0
+            bloom = bool(threshold) and total >= threshold
+
+            exact: dict[str, Counter] = {}
+            blooms: dict[str, BloomFilter] = {}
+            rows = 0
+            stream = await db.stream(
+                select(DownloadHistory.account_id, DownloadHistory.torrent_id)
+                .where(DownloadHistory.torrent_id != "")
+                .execution_options(yield_per=5000)
+            )
+            # 按批取行，避免逐行 await
+            async for partition in stream.partitions():
+                for account_id, torrent_id in partition:
+                    site = accounts.get(account_id, "")
+                    if bloom:
+                        if site not in blooms:
+                            blooms[site] = BloomFilter(total)
+                        blooms[site].add(torrent_id)
+                    else:
+                        exact.setdefault(site, Counter())[torrent_id] += 1
+                rows += len(partition)
+
+        old_exact = self._exact
+        self._account_sites = accounts
+        self.bloom = bloom
+        self._exact = exact
+        self._blooms = blooms
+        self.rows = rows
+        self._loaded = True
+        # 读取过程中新提交的记录可能不在结果里；删除不补（多保留一条只会更保守，下次对账修正）
+        pending, self._pending = self._pending, None
+        for site, torrent_id, account_id in pending:
+            if bloom or torrent_id not in exact.get(site, ()):
+                self._insert(site, torrent_id, account_id)
+        self.loaded_at = time.time()
+        self.load_seconds = time.monotonic() - start
+        logger.info(
+            f"已下载索引已加载: {rows} 条记录，{'Bloom 过滤器' if bloom else '精确索引'}，"
+            f"耗时 {self.load_seconds * 1000:.0f}ms"
+        )
+        return old_exact, exact
+
+    async def reconcile(self) -> int:
+        """与数据库对账：重新加载，返回与加载前内存索引的差异条数（Bloom 模式下为 0）"""
+        async with self._lock:
+            was_loaded, was_bloom = self._loaded, self.bloom
+            old_exact, new_exact = await self._load()
+        drift = 0
+        if was_loaded and not was_bloom and not self.bloom:
+            for site in set(old_exact) | set(new_exact):
+                old, new = old_exact.get(site, Counter()), new_exact.get(site, Counter())
+                drift += len(set(old) ^ set(new))
+            if drift:
+                logger.warning(f"已下载索引与数据库存在 {drift} 条差异，已按数据库修正")
+        self.last_drift = drift
+        return drift
+
+    # ---- 查询 ----
+
+    async def contains(self, site_url: str, torrent_id: str) -> bool:
+        """该站点的种子是否已有下载记录"""
+        await self.ensure_loaded()
+        site = site_key(site_url)
+        if not self.bloom:
+            return any(
+                torrent_id in counter
+                for counter in (self._exact.get(site), self._exact.get("")) if counter
+            )
+        if not any(torrent_id in bf for bf in (self._blooms.get(site), self._blooms.get("")) if bf):
+            return False
+        return await self._confirm(site, torrent_id)
+
+    async def _confirm(self, site: str, torrent_id: str) -> bool:
+        """Bloom 命中后查询数据库确认（独立会话，可与调用方的会话并发）"""
+        from database import async_session
+        from models import DownloadHistory
+
+        self.confirm_queries += 1
+        async with async_session() as db:
+            account_ids = (await db.execute(
+                select(DownloadHistory.account_id).where(DownloadHistory.torrent_id == torrent_id)
+            )).scalars().all()
+        return any(self._account_sites.get(a_id, "") in (site, "") for a_id in account_ids)
+
+    # ---- 写入 ----
+
+    def add(self, site_url: Optional[str], torrent_id: str, account_id: int = None):
+        if not torrent_id:
+            return
+        site = site_key(site_url)
+        if self._pending is not None:
+            self._pending.append((site, torrent_id, account_id))
+        if self._loaded:
+            self._insert(site, torrent_id, account_id)
+
+    def _insert(self, site: str, torrent_id: str, account_id: Optional[int]):
+        if account_id is not None:
+            self._account_sites[account_id] = site
+        self.rows += 1
+        if self.bloom:
+            if site not in self._blooms:
+                self._blooms[site] = BloomFilter(max(self.rows, settings.downloaded_index_bloom_threshold))
+            self._blooms[site].add(torrent_id)
+        else:
+            self._exact.setdefault(site, Counter())[torrent_id] += 1
+
+    def discard(self, items: Iterable[tuple[Optional[str], str]]):
+        """移除（站点, 种子 ID）；Bloom 过滤器无法删除，等对账时重建"""
+        if not self._loaded:
+            return
+        for site_url, torrent_id in items:
+            if not torrent_id:
+                continue
+            self.rows = max(0, self.rows - 1)
+            if self.bloom:
+                continue
+            counter = self._exact.get(site_key(site_url))
+            if counter and torrent_id in counter:
+                counter[torrent_id] -= 1
+                if counter[torrent_id] <= 0:
+                    del counter[torrent_id]
+
+    async def move_account(self, db, account_id: int, site_url: Optional[str]):
+        """
+        账号的站点变化后（删除账号时 site_url=None，记录归入空字符串站点；
+        新建账号复用了已删除账号的 ID 时为新账号的站点），把该账号的记录移到新站点下。
+        Bloom 过滤器无法删除，旧站点中的残留由 _confirm 按新的账号站点排除，对账时重建。
+        """
+        from models import DownloadHistory
+
+        async with self._lock:
+            if not self._loaded:
+                return  # 尚未加载：首次加载时直接按数据库中的账号归类
+            old_site = self._account_sites.get(account_id, "")
+            new_site = site_key(site_url)
+            if site_url is None:
+                self._account_sites.pop(account_id, None)
+            else:
+                self._account_sites[account_id] = new_site
+            if old_site == new_site:
+                return
+            torrent_ids = (await db.execute(
+                select(DownloadHistory.torrent_id)
+                .where(DownloadHistory.account_id == account_id, DownloadHistory.torrent_id != "")
+            )).scalars().all()
+            for torrent_id in torrent_ids:
+                if self.bloom:
+                    if new_site not in self._blooms:
+                        self._blooms[new_site] = BloomFilter(max(self.rows, settings.downloaded_index_bloom_threshold))
+                    self._blooms[new_site].add(torrent_id)
+                    continue
+                old = self._exact.get(old_site)
+                if old and torrent_id in old:
+                    old[torrent_id] -= 1
+                    if old[torrent_id] <= 0:
+                        del old[torrent_id]
+                self._exact.setdefault(new_site, Counter())[torrent_id] += 1
+        if torrent_ids:
+            logger.info(f"账号 {account_id} 的 {len(torrent_ids)} 条已下载记录已从站点 [{old_site}] 移到 [{new_site}]")
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self._loaded,
+            "mode": "bloom" if self.bloom else "exact",
+            "rows": self.rows,
+            "sites": len(self._blooms if self.bloom else self._exact),
+            "bloom_bytes": sum(bf.nbytes for bf in self._blooms.values()),
+            "confirm_queries": self.confirm_queries,
+            "load_ms": round(self.load_seconds * 1000, 1),
+            "last_drift": self.last_drift,
+        }
+
+
+# 进程级单例
+downloaded_index = DownloadedIndex()
+
+
+# ---- 共享写入路径 ----
+
+async def save_download_history(db, history, site_url: str):
+    """写入一条下载历史并同步更新索引（site_url 为 history.account_id 对应账号的站点）"""
+    db.add(history)
+    await db.commit()
+    downloaded_index.add(site_url, history.torrent_id, history.account_id)
+
+
+async def delete_download_history(db, *criteria) -> int:
+    """按条件删除下载历史并同步更新索引，返回删除的记录数"""
+    from models import Account, DownloadHistory
+
+    removed = (await db.execute(
+        select(Account.site_url, DownloadHistory.torrent_id)
+        .select_from(DownloadHistory)
+        .outerjoin(Account, Account.id == DownloadHistory.account_id)
+        .where(*criteria)
+    )).all()
+    result = await db.execute(delete(DownloadHistory).where(*criteria))
+    await db.commit()
+    downloaded_index.discard(removed)
+    return result.rowcount
+
+
+async def reconcile_downloaded_index():
+    """定时任务：已下载索引与数据库对账"""
+    await downloaded_index.reconcile()
@@ -3,13 +3,20 @@
 
 统一接口支持 qBittorrent 和 Transmission。
 """
+import asyncio
+import base64
 import logging
+import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Iterable, Iterator, Optional
 
 import httpx
 
+from config import settings
+from services.bencode import TorrentMeta, read_torrent_meta
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,15 +25,18 @@ class DownloaderStats:
     """下载器统计信息"""
     download_speed: int = 0  # 字节/秒
     upload_speed: int = 0
-    downloading_count: int = 0
+    downloading_count: int = 0  # Transmission 的统计接口不区分下载 / 做种，为 0
     seeding_count: int = 0
-    free_space: int = 0  # 字节
-    total_space: int = 0
+    active_count: int = 0   # 有传输活动的种子数
+    paused_count: int = 0
+    torrent_count: int = 0
+    free_space: int = 0  # 字节，下载目录所在磁盘剩余空间
+    updated_at: float = 0  # 采集时间（time.time()）
 
 
-@dataclass
+@dataclass(slots=True)
 class TorrentStatus:
-    """下载器中的种子状态"""
+    """下载器中的种子状态（slots：大量实例时不为每个对象分配 __dict__）"""
     info_hash: str = ""
     name: str = ""
     size: int = 0
@@ -41,16 +51,91 @@ class TorrentStatus:
     total_size: int = 0
 
 
+class TorrentSnapshot:
+    """
+    一次查询得到的种子集合，内部只保存一个 hash（小写）-> 状态 的索引：
+    按下载器返回顺序迭代，调用方直接 get(hash) 查找，不需要再自行构建字典。
+    """
+    __slots__ = ("_index",)
+
+    def __init__(self, torrents: Iterable[TorrentStatus] = ()):
+        self._index: dict[str, TorrentStatus] = {t.info_hash.lower(): t for t in torrents}
+
+    @classmethod
+    def from_index(cls, index: dict[str, TorrentStatus]) -> "TorrentSnapshot":
+        """直接使用已按小写 hash 建好的字典（不复制）"""
+        snapshot = cls.__new__(cls)
+        snapshot._index = index
+        return snapshot
+
+    def get(self, info_hash: str) -> Optional[TorrentStatus]:
+        return self._index.get(info_hash.lower()) if info_hash else None
+
+    def hashes(self):
+        return self._index.keys()
+
+    def __contains__(self, info_hash: str) -> bool:
+        return bool(info_hash) and info_hash.lower() in self._index
+
+    def __iter__(self) -> Iterator[TorrentStatus]:
+        return iter(self._index.values())
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __repr__(self) -> str:
+        return f"TorrentSnapshot({len(self._index)} torrents)"
+
+
+class TorrentFields(str, Enum):
+    """种子查询字段配置：只传输和解析调用方用到的字段"""
+    STATE = "state"      # hash + 状态 + 进度（状态同步）
+    TRACKER = "tracker"  # hash + 状态 + tracker 消息（unregistered 检查）
+    FULL = "full"        # 全部字段（导入、展示）
+
+
+@dataclass
+class TorrentChanges:
+    """自某个版本以来的种子变化"""
+    revision: int = 0    # 本次结果对应的版本号，下次作为 since 传入
+    full: bool = True    # True 表示 torrents 是完整列表（不是增量）
+    torrents: TorrentSnapshot = field(default_factory=TorrentSnapshot)  # 新增或有变化的种子
+    removed: list[str] = field(default_factory=list)             # 已移除的种子 hash
+
+
 class BaseDownloader(ABC):
     """下载器基类"""
 
-    def __init__(self, host: str, port: int, username: str = "", password: str = "", use_ssl: bool = False):
+    def __init__(self, host: str, port: int, username: str = "", password: str = "", use_ssl: bool = False,
+                 transport: httpx.AsyncBaseTransport = None):
         self.host = host
         self.port = port
         self.username = username
         self.password = password
         self.scheme = "https" if use_ssl else "http"
         self.base_url = f"{self.scheme}://{self.host}:{self.port}"
+        # 自定义传输层（如 httpx.ASGITransport 接入本地模拟器），None 时走真实网络
+        self._transport = transport
+        # 统计缓存：staleness 以内的结果直接复用，并发调用共享同一次采集
+        self._stats: Optional[DownloaderStats] = None
+        self._stats_at = 0.0
+        self._stats_lock = asyncio.Lock()
+        self._used_space: Optional[int] = None
+        self._used_space_at = 0.0
+        self._used_space_lock = asyncio.Lock()
+
+    def _new_client(self) -> httpx.AsyncClient:
+        """长连接客户端：实例由注册表长期持有，连接在多次调用间复用"""
+        return httpx.AsyncClient(
+            timeout=15, verify=False, transport=self._transport,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60),
+        )
+
+    async def close(self):
+        """关闭底层 HTTP 客户端"""
+        client = getattr(self, "_client", None)
+        if client is not None and not client.is_closed:
+            await client.aclose()
 
     @abstractmethod
     async def test_connection(self) -> bool:
@@ -58,19 +143,30 @@ class BaseDownloader(ABC):
         pass
 
     @abstractmethod
-    async def add_torrent(self, torrent_data: bytes, save_path: str = "", tags: str = "") -> str:
-        """添加种子，返回 info_hash"""
+    async def add_torrent(self, torrent_data: bytes, save_path: str = "", tags: str = "",
+                          meta: Optional[TorrentMeta] = None) -> str:
+        """添加种子，返回 info_hash；调用方已解析过种子文件时传入 meta，避免重复解析"""
         pass
 
     @abstractmethod
-    async def remove_torrent(self, info_hash: str, delete_files: bool = False) -> bool:
-        """删除种子"""
+    async def remove_torrents(self, info_hashes: list[str], delete_files: bool = False) -> dict[str, bool]:
+        """批量删除种子，一次请求完成；返回 {小写 hash: 是否成功}，下载器中不存在的为 False"""
         pass
 
     @abstractmethod
+    async def pause_torrents(self, info_hashes: list[str]) -> dict[str, bool]:
+        """批量暂停种子，一次请求完成；返回 {小写 hash: 是否成功}，下载器中不存在的为 False"""
+        pass
+
+    async def remove_torrent(self, info_hash: str, delete_files: bool = False) -> bool:
+        """删除种子"""
+        results = await self.remove_torrents([info_hash], delete_files=delete_files)
+        return results.get(info_hash.lower(), False)
+
     async def pause_torrent(self, info_hash: str) -> bool:
         """暂停种子"""
-        pass
+        results = await self.pause_torrents([info_hash])
+        return results.get(info_hash.lower(), False)
 
     @abstractmethod
     async def get_torrent_status(self, info_hash: str) -> Optional[TorrentStatus]:
@@ -78,13 +174,55 @@ class BaseDownloader(ABC):
         pass
 
     @abstractmethod
-    async def get_all_torrents(self) -> list[TorrentStatus]:
-        """获取所有种子"""
+    async def get_all_torrents(self, fields: TorrentFields = TorrentFields.FULL) -> TorrentSnapshot:
+        """获取所有种子（带 hash 索引的快照）；fields 指定字段配置，未包含的字段保持默认值"""
         pass
 
+    async def get_changes(self, since: int = 0, fields: TorrentFields = TorrentFields.FULL) -> TorrentChanges:
+        """获取自 since 版本以来变化的种子；默认实现每次返回完整列表"""
+        return TorrentChanges(torrents=await self.get_all_torrents(fields))
+
+    async def get_stats(self, max_age: float = None) -> DownloaderStats:
+        """
+        获取下载器统计。
+        max_age 秒内采集过的结果直接复用，默认 settings.downloader_stats_max_age；传 0 强制重新采集。
+        """
+        if max_age is None:
+            max_age = settings.downloader_stats_max_age
+        async with self._stats_lock:
+            if self._stats is None or time.monotonic() - self._stats_at > max_age:
+                stats = await self._fetch_stats()
+                stats.updated_at = time.time()
+                self._stats, self._stats_at = stats, time.monotonic()
+            return self._stats
+
+    def expire_caches(self):
+        """使本地缓存的统计 / 种子镜像过期，下次读取时重新访问下载器"""
+        self._stats = None
+        self._used_space = None
+
     @abstractmethod
-    async def get_stats(self) -> DownloaderStats:
-        """获取下载器统计"""
+    async def _fetch_stats(self) -> DownloaderStats:
+        """从下载器采集统计（不枚举完整种子信息）"""
+        pass
+
+    async def get_used_space(self, max_age: float = None) -> int:
+        """
+        下载器中所有种子的体积合计（字节）。
+        与 get_stats 相同按 max_age 复用缓存（Transmission 每次采集都要列出全部种子的 totalSize）；
+        动态删种传 0 强制重新采集。
+        """
+        if max_age is None:
+            max_age = settings.downloader_stats_max_age
+        async with self._used_space_lock:
+            if self._used_space is None or time.monotonic() - self._used_space_at > max_age:
+                self._used_space = await self._fetch_used_space()
+                self._used_space_at = time.monotonic()
+            return self._used_space
+
+    @abstractmethod
+    async def _fetch_used_space(self) -> int:
+        """从下载器采集种子体积合计"""
         pass
 
     @abstractmethod
@@ -105,39 +243,72 @@ class QBittorrentAdapter(BaseDownloader):
         super().__init__(**kwargs)
         self._client: Optional[httpx.AsyncClient] = None
         self._sid: str = ""
+        self._login_lock = asyncio.Lock()
+        self.login_count = 0
+        # sync/maindata 增量镜像
+        self._sync_lock = asyncio.Lock()
+        self._rid = 0
+        self._last_sync = 0.0
+        self._mirror: dict[str, dict] = {}        # hash -> 种子字段
+        self._server_state: dict = {}
+        self._revision = 0                        # 本地版本号，每次同步到变化时递增
+        self._changed_at: dict[str, int] = {}     # hash -> 最近变化的版本号
+        self._removed_at: dict[str, int] = {}     # hash -> 移除时的版本号
+        self._removed_floor = 0                   # 早于此版本的移除记录已被清理
+
+    def expire_caches(self):
+        super().expire_caches()
+        self._last_sync = 0.0
 
     async def _get_client(self) -> httpx.AsyncClient:
-        """获取已认证的客户端"""
+        """获取已认证的客户端（SID 在实例生命周期内复用）"""
         if self._client is None or self._client.is_closed:
-            self._client = httpx.AsyncClient(timeout=15, verify=False)
+            self._client = self._new_client()
+            self._sid = ""
+        if not self._sid:
             await self._login()
         return self._client
 
-    async def _login(self):
-        """登录 qBittorrent Web UI"""
-        url = f"{self.base_url}/api/v2/auth/login"
-        response = await self._client.post(url, data={
-            "username": self.username,
-            "password": self.password,
-        })
-        if response.text.strip() != "Ok.":
-            raise Exception("qBittorrent 登录失败")
-        # 保存 SID cookie
-        self._sid = response.cookies.get("SID", "")
-        self._client.cookies.set("SID", self._sid)
-        logger.info("qBittorrent 登录成功")
+    async def _login(self, stale_sid: str = None):
+        """登录 qBittorrent Web UI；并发调用只登录一次"""
+        async with self._login_lock:
+            # 等锁期间其他协程已经换到新 SID
+            if self._sid and self._sid != stale_sid:
+                return
+            url = f"{self.base_url}/api/v2/auth/login"
+            response = await self._client.post(url, data={
+                "username": self.username,
+                "password": self.password,
+            })
+            if response.text.strip() != "Ok.":
+                raise Exception("qBittorrent 登录失败")
+            # 保存 SID cookie
+            self._sid = response.cookies.get("SID", "")
+            self._client.cookies.set("SID", self._sid)
+            self.login_count += 1
+            logger.info("qBittorrent 登录成功")
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """发送 API 请求，SID 失效（403）时重新登录并重试一次"""
+        client = await self._get_client()
+        sid = self._sid
+        resp = await client.request(method, f"{self.base_url}{path}", **kwargs)
+        if resp.status_code == 403:
+            logger.info("qBittorrent 会话已失效，重新登录")
+            await self._login(stale_sid=sid)
+            resp = await client.request(method, f"{self.base_url}{path}", **kwargs)
+        return resp
 
     async def test_connection(self) -> bool:
         try:
-            client = await self._get_client()
-            resp = await client.get(f"{self.base_url}/api/v2/app/version")
+            resp = await self._request("GET", "/api/v2/app/version")
             return resp.status_code == 200
         except Exception as e:
             logger.error(f"qBittorrent 连接测试失败: {e}")
             return False
 
-    async def add_torrent(self, torrent_data: bytes, save_path: str = "", tags: str = "") -> str:
-        client = await self._get_client()
+    async def add_torrent(self, torrent_data: bytes, save_path: str = "", tags: str = "",
+                          meta: Optional[TorrentMeta] = None) -> str:
         files = {"torrents": ("torrent.torrent", torrent_data, "application/x-bittorrent")}
         data = {}
         if save_path:
@@ -145,42 +316,185 @@ class QBittorrentAdapter(BaseDownloader):
         if tags:
             data["tags"] = tags
 
-        resp = await client.post(f"{self.base_url}/api/v2/torrents/add", files=files, data=data)
+        resp = await self._request("POST", "/api/v2/torrents/add", files=files, data=data)
         if resp.text.strip() != "Ok.":
             raise Exception(f"添加种子失败: {resp.text}")
-        logger.info("种子已添加到 qBittorrent")
-        return ""  # qB 不直接返回 hash，需要后续查询
-
-    async def remove_torrent(self, info_hash: str, delete_files: bool = False) -> bool:
-        client = await self._get_client()
-        resp = await client.post(f"{self.base_url}/api/v2/torrents/delete", data={
-            "hashes": info_hash,
-            "deleteFiles": str(delete_files).lower(),
-        })
-        return resp.status_code == 200
+        self._last_sync = 0.0  # 下次读取时立即增量同步
+        # qB 接口不返回 hash，直接从种子文件计算
+        if meta is None:
+            meta = read_torrent_meta(torrent_data)
+        info_hash = meta.hash_id if meta else ""
+        logger.info(f"种子已添加到 qBittorrent: {info_hash or '未知 hash'}")
+        return info_hash
+
+    async def _batch_action(self, path: str, info_hashes: list[str], **data) -> dict[str, bool]:
+        """对多个种子执行同一操作：hashes 用 | 连接，一次请求完成"""
+        hashes = list(dict.fromkeys(h.lower() for h in info_hashes if h))
+        if not hashes:
+            return {}
+        # qB 会静默忽略不存在的 hash，按镜像逐个报告
+        await self.sync()
+        present = [h for h in hashes if h in self._mirror]
+        ok = False
+        if present:
+            resp = await self._request("POST", path, data={"hashes": "|".join(present), **data})
+            self._last_sync = 0.0  # 下次读取时立即增量同步
+            ok = resp.status_code == 200
+        return {h: ok and h in self._mirror for h in hashes}
+
+    async def remove_torrents(self, info_hashes: list[str], delete_files: bool = False) -> dict[str, bool]:
+        return await self._batch_action(
+            "/api/v2/torrents/delete", info_hashes, deleteFiles=str(delete_files).lower(),
+        )
 
-    async def pause_torrent(self, info_hash: str) -> bool:
+    async def pause_torrents(self, info_hashes: list[str]) -> dict[str, bool]:
         """暂停种子（qBittorrent API v2）"""
-        client = await self._get_client()
-        resp = await client.post(f"{self.base_url}/api/v2/torrents/pause", data={
-            "hashes": info_hash,
-        })
-        return resp.status_code == 200
+        return await self._batch_action("/api/v2/torrents/pause", info_hashes)
 
     async def get_torrent_status(self, info_hash: str) -> Optional[TorrentStatus]:
-        client = await self._get_client()
-        resp = await client.get(f"{self.base_url}/api/v2/torrents/info", params={"hashes": info_hash})
+        resp = await self._request("GET", "/api/v2/torrents/info", params={"hashes": info_hash})
         data = resp.json()
         if not data:
             return None
-        t = data[0]
-        mapped = self._map_state(t["state"])
+        return self._to_status(data[0])
+
+    # ---- sync/maindata 增量镜像 ----
+
+    async def sync(self, max_age: float = 1.0):
+        """
+        通过 sync/maindata 增量更新本地镜像。
+        max_age 秒内已同步过则直接使用镜像，并发调用共享同一次请求。
+        """
+        async with self._sync_lock:
+            if time.monotonic() - self._last_sync < max_age:
+                return
+            resp = await self._request("GET", "/api/v2/sync/maindata", params={"rid": self._rid})
+            resp.raise_for_status()
+            self._apply_maindata(resp.json())
+            self._last_sync = time.monotonic()
+
+    def _apply_maindata(self, data: dict):
+        revision = self._revision + 1
+        changed = False
+        torrents = data.get("torrents") or {}
+
+        if data.get("full_update"):
+            # 全量：替换镜像，与旧镜像对比出变化和移除
+            old = self._mirror
+            self._mirror = {}
+            for h, t in torrents.items():
+                h = h.lower()
+                self._mirror[h] = {**t, "hash": h}
+                if old.get(h) != self._mirror[h]:
+                    self._changed_at[h] = revision
+                    changed = True
+            removed = [h for h in old if h not in self._mirror]
+            self._server_state = dict(data.get("server_state") or {})
+        else:
+            for h, t in torrents.items():
+                h = h.lower()
+                self._mirror.setdefault(h, {"hash": h}).update(t)
+                self._changed_at[h] = revision
+                self._removed_at.pop(h, None)
+                changed = True
+            removed = [h.lower() for h in data.get("torrents_removed") or [] if h.lower() in self._mirror]
+            self._server_state.update(data.get("server_state") or {})
+
+        for h in removed:
+            self._mirror.pop(h, None)
+            self._changed_at.pop(h, None)
+            self._removed_at[h] = revision
+            changed = True
+
+        self._rid = data.get("rid", self._rid)
+        if changed:
+            self._revision = revision
+        # 移除记录只保留最近一部分，更早的调用方退化为全量
+        if len(self._removed_at) > 10000:
+            keep = sorted(self._removed_at.items(), key=lambda kv: kv[1])[-5000:]
+            self._removed_floor = keep[0][1]
+            self._removed_at = dict(keep)
+
+    async def get_snapshot(self, fields: TorrentFields = TorrentFields.FULL) -> TorrentSnapshot:
+        """同步后返回当前全部种子（镜像的 key 已是小写 hash，直接作为快照索引）"""
+        await self.sync()
+        index = {h: self._to_status(t, fields) for h, t in self._mirror.items()}
+        if fields == TorrentFields.TRACKER:
+            # maindata 不含 tracker 消息：只为没有可用 tracker（tracker 字段为空）的种子逐个查询
+            missing = [h for h, t in self._mirror.items() if not t.get("tracker")]
+            for h, msg in (await self._fetch_tracker_msgs(missing)).items():
+                index[h].tracker_msg = msg
+        return TorrentSnapshot.from_index(index)
+
+    # torrents/trackers 只能逐个种子查询，限制并发请求数
+    _TRACKER_CONCURRENCY = 8
+
+    async def _fetch_tracker_msgs(self, info_hashes: list[str]) -> dict[str, str]:
+        """查询种子的 tracker 消息：第一个有消息的真实 tracker（跳过 DHT / PeX / LSD）"""
+        semaphore = asyncio.Semaphore(self._TRACKER_CONCURRENCY)
+
+        async def fetch(info_hash: str) -> tuple[str, str]:
+            async with semaphore:
+                resp = await self._request("GET", "/api/v2/torrents/trackers", params={"hash": info_hash})
+            if resp.status_code != 200:
+                return info_hash, ""  # 查询期间种子已被删除
+            for tracker in resp.json():
+                if not tracker.get("url", "").startswith("** [") and tracker.get("msg"):
+                    return info_hash, tracker["msg"]
+            return info_hash, ""
+
+        return dict(await asyncio.gather(*(fetch(h) for h in info_hashes)))
+
+    async def get_changes(self, since: int = 0, fields: TorrentFields = TorrentFields.FULL) -> TorrentChanges:
+        await self.sync()
+        if since <= 0 or since > self._revision or since < self._removed_floor:
+            return TorrentChanges(revision=self._revision, full=True, torrents=await self.get_snapshot(fields))
+        return TorrentChanges(
+            revision=self._revision, full=False,
+            torrents=TorrentSnapshot.from_index({
+                h: self._to_status(self._mirror[h], fields) for h, rev in self._changed_at.items() if rev > since
+            }),
+            removed=[h for h, rev in self._removed_at.items() if rev > since],
+        )
+
+    async def get_all_torrents(self, fields: TorrentFields = TorrentFields.FULL) -> TorrentSnapshot:
+        return await self.get_snapshot(fields)
+
+    async def _fetch_stats(self) -> DownloaderStats:
+        # server_state 和种子镜像都来自 sync/maindata 增量，不需要额外请求
+        await self.sync()
+        info = self._server_state
+        states = [self._map_state(t.get("state", "")) for t in self._mirror.values()]
+        return DownloaderStats(
+            download_speed=info.get("dl_info_speed", 0),
+            upload_speed=info.get("up_info_speed", 0),
+            downloading_count=states.count("downloading"),
+            seeding_count=states.count("seeding"),
+            active_count=sum(1 for t in self._mirror.values() if t.get("dlspeed") or t.get("upspeed")),
+            paused_count=states.count("paused"),
+            torrent_count=len(states),
+            free_space=info.get("free_space_on_disk", 0),
+        )
+
+    async def _fetch_used_space(self) -> int:
+        await self.sync()
+        return sum(t.get("size", 0) for t in self._mirror.values())
+
+    def _to_status(self, t: dict, fields: TorrentFields = TorrentFields.FULL) -> TorrentStatus:
+        mapped = self._map_state(t.get("state", ""))
+        if fields == TorrentFields.STATE:
+            return TorrentStatus(
+                info_hash=t["hash"], status=mapped, state=mapped, progress=t.get("progress", 0),
+            )
+        if fields == TorrentFields.TRACKER:
+            # tracker_msg 由 get_snapshot 另行查询填入
+            return TorrentStatus(info_hash=t["hash"], status=mapped, state=mapped)
         return TorrentStatus(
             info_hash=t["hash"],
-            name=t["name"],
-            size=t["size"],
-            total_size=t.get("total_size", t["size"]),
-            progress=t["progress"],
+            name=t.get("name", ""),
+            size=t.get("size", 0),
+            total_size=t.get("total_size", t.get("size", 0)),
+            progress=t.get("progress", 0),
             status=mapped,
             state=mapped,
             download_speed=t.get("dlspeed", 0),
@@ -190,48 +504,12 @@ class QBittorrentAdapter(BaseDownloader):
             tracker_msg=t.get("tracker_msg", ""),
         )
 
-    async def get_all_torrents(self) -> list[TorrentStatus]:
-        client = await self._get_client()
-        resp = await client.get(f"{self.base_url}/api/v2/torrents/info")
-        results = []
-        for t in resp.json():
-            mapped = self._map_state(t["state"])
-            results.append(TorrentStatus(
-                info_hash=t["hash"],
-                name=t["name"],
-                size=t["size"],
-                total_size=t.get("total_size", t["size"]),
-                progress=t["progress"],
-                status=mapped,
-                state=mapped,
-                download_speed=t.get("dlspeed", 0),
-                upload_speed=t.get("upspeed", 0),
-                tags=t.get("tags", ""),
-                save_path=t.get("save_path", ""),
-                tracker_msg=t.get("tracker_msg", ""),
-            ))
-        return results
-
-    async def get_stats(self) -> DownloaderStats:
-        client = await self._get_client()
-        resp = await client.get(f"{self.base_url}/api/v2/transfer/info")
-        info = resp.json()
-        torrents = await self.get_all_torrents()
-        return DownloaderStats(
-            download_speed=info.get("dl_info_speed", 0),
-            upload_speed=info.get("up_info_speed", 0),
-            downloading_count=sum(1 for t in torrents if t.status == "downloading"),
-            seeding_count=sum(1 for t in torrents if t.status == "seeding"),
-        )
-
     async def get_tags(self) -> list[str]:
-        client = await self._get_client()
-        resp = await client.get(f"{self.base_url}/api/v2/torrents/tags")
+        resp = await self._request("GET", "/api/v2/torrents/tags")
         return resp.json()
 
     async def create_tag(self, tag: str) -> bool:
-        client = await self._get_client()
-        resp = await client.post(f"{self.base_url}/api/v2/torrents/createTags", data={"tags": tag})
+        resp = await self._request("POST", "/api/v2/torrents/createTags", data={"tags": tag})
         return resp.status_code == 200
 
     @staticmethod
@@ -262,10 +540,15 @@ class TransmissionAdapter(BaseDownloader):
         super().__init__(**kwargs)
         self._session_id = ""
         self._client: Optional[httpx.AsyncClient] = None
+        self._auth_header = ""
+        if self.username:
+            cred = base64.b64encode(f"{self.username}:{self.password}".encode()).decode()
+            self._auth_header = f"Basic {cred}"
+        self._download_dir = ""
 
     async def _get_client(self) -> httpx.AsyncClient:
         if self._client is None or self._client.is_closed:
-            self._client = httpx.AsyncClient(timeout=15, verify=False)
+            self._client = self._new_client()
         return self._client
 
     async def _rpc_call(self, method: str, arguments: dict = None) -> dict:
@@ -279,10 +562,8 @@ class TransmissionAdapter(BaseDownloader):
         headers = {}
         if self._session_id:
             headers["X-Transmission-Session-Id"] = self._session_id
-        if self.username:
-            import base64
-            cred = base64.b64encode(f"{self.username}:{self.password}".encode()).decode()
-            headers["Authorization"] = f"Basic {cred}"
+        if self._auth_header:
+            headers["Authorization"] = self._auth_header
 
         resp = await client.post(url, json=payload, headers=headers)
 
@@ -303,100 +584,121 @@ class TransmissionAdapter(BaseDownloader):
             logger.error(f"Transmission 连接测试失败: {e}")
             return False
 
-    async def add_torrent(self, torrent_data: bytes, save_path: str = "", tags: str = "") -> str:
-        import base64
+    async def add_torrent(self, torrent_data: bytes, save_path: str = "", tags: str = "",
+                          meta: Optional[TorrentMeta] = None) -> str:
         args = {"metainfo": base64.b64encode(torrent_data).decode()}
         if save_path:
             args["download-dir"] = save_path
         result = await self._rpc_call("torrent-add", args)
         if result.get("result") != "success":
             raise Exception(f"添加种子失败: {result}")
-        added = result.get("arguments", {}).get("torrent-added", {})
-        return added.get("hashString", "")
-
-    async def remove_torrent(self, info_hash: str, delete_files: bool = False) -> bool:
-        # 先通过 hash 找到 torrent ID
-        all_torrents = await self._rpc_call("torrent-get", {
-            "fields": ["id", "hashString"]
-        })
-        torrents = all_torrents.get("arguments", {}).get("torrents", [])
-        tid = None
-        for t in torrents:
-            if t.get("hashString", "").lower() == info_hash.lower():
-                tid = t["id"]
-                break
-        if tid is None:
-            return False
-
-        result = await self._rpc_call("torrent-remove", {
-            "ids": [tid],
-            "delete-local-data": delete_files,
-        })
-        return result.get("result") == "success"
-
-    async def pause_torrent(self, info_hash: str) -> bool:
+        # 已存在的种子返回 torrent-duplicate 而不是 torrent-added
+        arguments = result.get("arguments", {})
+        added = arguments.get("torrent-added") or arguments.get("torrent-duplicate") or {}
+        info_hash = added.get("hashString", "")
+        if not info_hash:
+            if meta is None:
+                meta = read_torrent_meta(torrent_data)
+            info_hash = meta.hash_id if meta else ""
+        return info_hash
+
+    async def _existing_hashes(self, info_hashes: list[str]) -> set[str]:
+        """下载器中实际存在的种子（小写 hash）：只按 hashString 查询这几个种子，不枚举全部"""
+        result = await self._rpc_call("torrent-get", {"ids": info_hashes, "fields": ["hashString"]})
+        return {t["hashString"].lower() for t in result.get("arguments", {}).get("torrents", [])}
+
+    async def _batch_action(self, method: str, info_hashes: list[str], **arguments) -> dict[str, bool]:
+        """对多个种子执行同一 RPC：ids 直接传 hashString，一次请求完成"""
+        hashes = list(dict.fromkeys(h.lower() for h in info_hashes if h))
+        if not hashes:
+            return {}
+        # RPC 对不存在的 hash 也返回 success，先确认哪些种子存在，结果才能逐个对应
+        existing = await self._existing_hashes(hashes)
+        ok = False
+        if existing:
+            result = await self._rpc_call(method, {"ids": [h for h in hashes if h in existing], **arguments})
+            ok = result.get("result") == "success"
+        return {h: ok and h in existing for h in hashes}
+
+    async def remove_torrents(self, info_hashes: list[str], delete_files: bool = False) -> dict[str, bool]:
+        return await self._batch_action("torrent-remove", info_hashes, **{"delete-local-data": delete_files})
+
+    async def pause_torrents(self, info_hashes: list[str]) -> dict[str, bool]:
         """暂停种子（Transmission RPC）"""
-        all_torrents = await self._rpc_call("torrent-get", {
-            "fields": ["id", "hashString"]
-        })
-        torrents = all_torrents.get("arguments", {}).get("torrents", [])
-        tid = None
-        for t in torrents:
-            if t.get("hashString", "").lower() == info_hash.lower():
-                tid = t["id"]
-                break
-        if tid is None:
-            return False
-        result = await self._rpc_call("torrent-stop", {"ids": [tid]})
-        return result.get("result") == "success"
+        return await self._batch_action("torrent-stop", info_hashes)
+
+    # 每种字段配置请求的 RPC 字段；name / labels 等展示字段只在 FULL 中请求。
+    # TRACKER 保留 trackerStats：unregistered 由 tracker 的 announce 结果判断，
+    # error / errorString 只反映最近一次错误，不能等价替代
+    _PROFILE_FIELDS = {
+        TorrentFields.STATE: ["hashString", "status", "percentDone"],
+        TorrentFields.TRACKER: ["hashString", "status", "trackerStats"],
+        TorrentFields.FULL: ["hashString", "name", "totalSize", "percentDone",
+                             "status", "rateDownload", "rateUpload", "downloadDir",
+                             "trackerStats", "labels"],
+    }
 
     async def get_torrent_status(self, info_hash: str) -> Optional[TorrentStatus]:
-        all_t = await self.get_all_torrents()
-        for t in all_t:
-            if t.info_hash.lower() == info_hash.lower():
-                return t
-        return None
-
-    async def get_all_torrents(self) -> list[TorrentStatus]:
+        # ids 直接接受 hashString，只查询这一个种子
         result = await self._rpc_call("torrent-get", {
-            "fields": ["id", "hashString", "name", "totalSize", "percentDone",
-                        "status", "rateDownload", "rateUpload", "downloadDir",
-                        "trackerStats", "labels"]
+            "ids": [info_hash.lower()],
+            "fields": self._PROFILE_FIELDS[TorrentFields.FULL],
         })
         torrents = result.get("arguments", {}).get("torrents", [])
-        results = []
-        for t in torrents:
-            mapped = self._map_status(t["status"])
-            # 提取 tracker 消息
-            tracker_msg = ""
-            tracker_stats = t.get("trackerStats", [])
-            if tracker_stats:
-                tracker_msg = tracker_stats[0].get("lastAnnounceResult", "")
-            results.append(TorrentStatus(
-                info_hash=t["hashString"],
-                name=t["name"],
-                size=t["totalSize"],
-                total_size=t["totalSize"],
-                progress=t["percentDone"],
-                status=mapped,
-                state=mapped,
-                download_speed=t.get("rateDownload", 0),
-                upload_speed=t.get("rateUpload", 0),
-                save_path=t.get("downloadDir", ""),
-                tracker_msg=tracker_msg,
-                tags=",".join(t.get("labels", [])),
-            ))
-        return results
-
-    async def get_stats(self) -> DownloaderStats:
-        result = await self._rpc_call("session-stats")
-        stats = result.get("arguments", {})
-        current = stats.get("current-stats", {})
+        return self._to_status(torrents[0]) if torrents else None
+
+    async def get_all_torrents(self, fields: TorrentFields = TorrentFields.FULL) -> TorrentSnapshot:
+        result = await self._rpc_call("torrent-get", {"fields": self._PROFILE_FIELDS[fields]})
+        torrents = result.get("arguments", {}).get("torrents", [])
+        return TorrentSnapshot.from_index({t["hashString"].lower(): self._to_status(t) for t in torrents})
+
+    def _to_status(self, t: dict) -> TorrentStatus:
+        """转换 RPC 结果；未请求的字段保持默认值"""
+        mapped = self._map_status(t["status"])
+        # 提取 tracker 消息
+        tracker_msg = ""
+        tracker_stats = t.get("trackerStats", [])
+        if tracker_stats:
+            tracker_msg = tracker_stats[0].get("lastAnnounceResult", "")
+        return TorrentStatus(
+            info_hash=t["hashString"],
+            name=t.get("name", ""),
+            size=t.get("totalSize", 0),
+            total_size=t.get("totalSize", 0),
+            progress=t.get("percentDone", 0),
+            status=mapped,
+            state=mapped,
+            download_speed=t.get("rateDownload", 0),
+            upload_speed=t.get("rateUpload", 0),
+            save_path=t.get("downloadDir", ""),
+            tracker_msg=tracker_msg,
+            tags=",".join(t.get("labels", [])),
+        )
+
+    async def _fetch_stats(self) -> DownloaderStats:
+        if not self._download_dir:
+            session = await self._rpc_call("session-get", {"fields": ["download-dir"]})
+            self._download_dir = session.get("arguments", {}).get("download-dir", "")
+
+        # 速率 / 种子计数来自 session-stats，磁盘空间来自 free-space，两个 RPC 并发执行，不列出种子
+        session_stats, free_space = await asyncio.gather(
+            self._rpc_call("session-stats"),
+            self._rpc_call("free-space", {"path": self._download_dir}),
+        )
+        stats = session_stats.get("arguments", {})
         return DownloaderStats(
             download_speed=stats.get("downloadSpeed", 0),
             upload_speed=stats.get("uploadSpeed", 0),
+            active_count=stats.get("activeTorrentCount", 0),
+            paused_count=stats.get("pausedTorrentCount", 0),
+            torrent_count=stats.get("torrentCount", 0),
+            free_space=free_space.get("arguments", {}).get("size-bytes", 0),
         )
 
+    async def _fetch_used_space(self) -> int:
+        result = await self._rpc_call("torrent-get", {"fields": ["totalSize"]})
+        return sum(t.get("totalSize", 0) for t in result.get("arguments", {}).get("torrents", []))
+
     async def get_tags(self) -> list[str]:
         # Transmission 不原生支持标签
         return []
@@ -406,8 +708,9 @@ class TransmissionAdapter(BaseDownloader):
 
     @staticmethod
     def _map_status(status: int) -> str:
+        # 0 停止 / 1 等待校验 / 2 校验中 / 3 等待下载 / 4 下载中 / 5 等待做种 / 6 做种中
         mapping = {0: "paused", 1: "downloading", 2: "downloading",
-                   3: "downloading", 4: "seeding", 5: "seeding", 6: "seeding"}
+                   3: "downloading", 4: "downloading", 5: "seeding", 6: "seeding"}
         return mapping.get(status, "unknown")
 
 
@@ -0,0 +1,227 @@
+"""
+下载器健康状态与熔断
+
+记录每个下载器的调用延迟和失败率：
+- 连续失败达到阈值后熔断（open），期间调用方立即失败，不再等待超时
+- 熔断后按指数退避在后台探测，探测成功即恢复（closed）
+- 退避到期后允许一次真实调用试探（half-open），成功恢复、失败继续熔断
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, TypeVar
+
+from config import settings
+from services.downloader import BaseDownloader
+from services.downloader_registry import get_downloader
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """下载器处于熔断状态，调用被直接拒绝"""
+
+
+@dataclass
+class DownloaderHealth:
+    """单个下载器的健康状态"""
+    downloader_id: int
+    name: str = ""
+    state: str = "closed"          # closed / open / half_open
+    consecutive_failures: int = 0
+    total_calls: int = 0
+    total_failures: int = 0
+    avg_latency: float = 0.0       # 秒，指数移动平均
+    last_error: str = ""
+    last_success: float = 0.0      # time.time()
+    last_failure: float = 0.0
+    opened_at: float = 0.0
+    next_probe_at: float = 0.0     # time.monotonic()
+    backoff: float = 0.0           # 当前退避秒数
+
+    def to_dict(self) -> dict:
+        now = time.monotonic()
+        return {
+            "id": self.downloader_id,
+            "name": self.name,
+            "state": self.state,
+            "online": self.state == "closed",
+            "consecutive_failures": self.consecutive_failures,
+            "total_calls": self.total_calls,
+            "error_rate": round(self.total_failures / self.total_calls, 3) if self.total_calls else 0,
+            "avg_latency_ms": round(self.avg_latency * 1000, 1),
+            "last_error": self.last_error,
+            "last_success": self.last_success or None,
+            "last_failure": self.last_failure or None,
+            "retry_in_seconds": round(max(0.0, self.next_probe_at - now), 1) if self.state != "closed" else 0,
+        }
+
+
+class HealthTracker:
+    """下载器健康跟踪 + 熔断器"""
+
+    def __init__(self):
+        self._health: dict[int, DownloaderHealth] = {}
+
+    def get(self, downloader_id: int, name: str = "") -> DownloaderHealth:
+        health = self._health.get(downloader_id)
+        if health is None:
+            health = self._health[downloader_id] = DownloaderHealth(downloader_id=downloader_id)
+        if name:
+            health.name = name
+        return health
+
+    def is_open(self, downloader_id: int) -> bool:
+        """是否处于熔断中（不改变状态，供调用方跳过）"""
+        health = self._health.get(downloader_id)
+        return bool(health and health.state == "open" and time.monotonic() < health.next_probe_at)
+
+    def allow(self, downloader_id: int) -> bool:
+        """是否允许本次调用；退避到期时放行一次试探调用"""
+        health = self._health.get(downloader_id)
+        if health is None or health.state == "closed":
+            return True
+        if health.state == "open" and time.monotonic() >= health.next_probe_at:
+            health.state = "half_open"
+            return True
+        return False
+
+    def record_success(self, downloader_id: int, latency: float):
+        health = self.get(downloader_id)
+        health.total_calls += 1
+        health.avg_latency = latency if not health.avg_latency else health.avg_latency * 0.8 + latency * 0.2
+        health.last_success = time.time()
+        health.consecutive_failures = 0
+        if health.state != "closed":
+            logger.info(f"下载器 [{health.name or downloader_id}] 已恢复")
+        health.state = "closed"
+        health.backoff = 0.0
+
+    def record_failure(self, downloader_id: int, error: BaseException, latency: float):
+        health = self.get(downloader_id)
+        health.total_calls += 1
+        health.total_failures += 1
+        health.consecutive_failures += 1
+        health.last_error = str(error) or type(error).__name__
+        health.last_failure = time.time()
+
+        if health.state == "half_open":
+            # 试探失败：退避翻倍，继续熔断
+            health.backoff = min(health.backoff * 2, settings.downloader_probe_max_seconds)
+            self._open(health)
+        elif health.state == "closed" and health.consecutive_failures >= settings.downloader_failure_threshold:
+            health.backoff = settings.downloader_probe_base_seconds
+            self._open(health)
+            logger.warning(
+                f"下载器 [{health.name or downloader_id}] 连续失败 {health.consecutive_failures} 次，"
+                f"熔断 {health.backoff:.0f}s: {health.last_error}"
+            )
+
+    @staticmethod
+    def _open(health: DownloaderHealth):
+        if health.state != "open":
+            health.opened_at = time.time()
+        health.state = "open"
+        health.next_probe_at = time.monotonic() + health.backoff
+
+    def release_trial(self, downloader_id: int):
+        """试探调用被取消（没有结果）：回到熔断状态并允许立即再次探测，避免停留在 half_open"""
+        health = self._health.get(downloader_id)
+        if health and health.state == "half_open":
+            health.state = "open"
+            health.next_probe_at = time.monotonic()
+
+    def forget(self, downloader_id: int):
+        self._health.pop(downloader_id, None)
+
+    async def call(self, dl_model, func: Callable[[BaseDownloader], Awaitable[T]],
+                   timeout: float = None) -> T:
+        """
+        通过熔断器调用下载器：熔断中直接抛出 CircuitOpenError；
+        超时（默认 settings.fanout_timeout）和异常计为失败。
+        截止时间只在这里执行：外层不要再套同样的超时，否则取消先到，失败不会被记录。
+        """
+        health = self.get(dl_model.id, dl_model.name)
+        if not self.allow(dl_model.id):
+            raise CircuitOpenError(
+                f"下载器 [{dl_model.name}] 不可用，{max(0.0, health.next_probe_at - time.monotonic()):.0f}s 后重试"
+                f"（{health.last_error}）"
+            )
+        if timeout is None:
+            timeout = settings.fanout_timeout
+        start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(func(get_downloader(dl_model)), timeout if timeout > 0 else None)
+        except asyncio.TimeoutError:
+            error = TimeoutError(f"超过 {timeout}s 未响应")
+            self.record_failure(dl_model.id, error, time.monotonic() - start)
+            raise error
+        except Exception as e:
+            self.record_failure(dl_model.id, e, time.monotonic() - start)
+            raise
+        except BaseException:
+            # 被取消：不计失败，但试探名额必须归还
+            self.release_trial(dl_model.id)
+            raise
+        self.record_success(dl_model.id, time.monotonic() - start)
+        return result
+
+    async def probe(self, dl_model) -> bool:
+        """测试连接并更新健康状态（不受熔断限制）"""
+        health = self.get(dl_model.id, dl_model.name)
+        if health.state == "open":
+            health.state = "half_open"
+        start = time.monotonic()
+        try:
+            ok = await asyncio.wait_for(get_downloader(dl_model).test_connection(), settings.fanout_timeout)
+            error = None if ok else ConnectionError("连接测试失败")
+        except asyncio.TimeoutError:
+            error = TimeoutError(f"超过 {settings.fanout_timeout}s 未响应")
+        except Exception as e:
+            error = e
+        except BaseException:
+            self.release_trial(dl_model.id)
+            raise
+        if error is None:
+            self.record_success(dl_model.id, time.monotonic() - start)
+            return True
+        self.record_failure(dl_model.id, error, time.monotonic() - start)
+        return False
+
+    def due_for_probe(self) -> list[int]:
+        now = time.monotonic()
+        return [h.downloader_id for h in self._health.values() if h.state == "open" and now >= h.next_probe_at]
+
+    def stats(self) -> list[dict]:
+        return [h.to_dict() for h in self._health.values()]
+
+
+# 进程级单例
+health_tracker = HealthTracker()
+
+
+async def call_downloader(dl_model, func: Callable[[BaseDownloader], Awaitable[T]],
+                          timeout: float = None) -> T:
+    """经熔断器调用下载器"""
+    return await health_tracker.call(dl_model, func, timeout=timeout)
+
+
+async def probe_downloaders():
+    """后台任务：对熔断中且退避到期的下载器做连接探测"""
+    from database import async_session
+    from models import Downloader
+    from sqlalchemy import select
+
+    due = health_tracker.due_for_probe()
+    if not due:
+        return
+    async with async_session() as db:
+        dl_models = (await db.execute(select(Downloader).where(Downloader.id.in_(due)))).scalars().all()
+    known = {dl_model.id for dl_model in dl_models}
+    for downloader_id in due:
+        if downloader_id not in known:
+            health_tracker.forget(downloader_id)
+    await asyncio.gather(*(health_tracker.probe(dl_model) for dl_model in dl_models))
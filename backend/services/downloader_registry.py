@@ -0,0 +1,116 @@
+"""
+下载器客户端注册表
+
+按 Downloader.id 长期持有已认证的下载器适配器：
+- qBittorrent 的 SID、Transmission 的 session id 与 keep-alive 连接在多次调用间复用，
+  不再每次定时任务 / 接口调用都重新登录
+- 下载器配置（类型、地址、账号密码）变化时自动重建
+- 删除下载器或应用关闭时释放连接
+"""
+import asyncio
+import logging
+import time
+
+from services.downloader import BaseDownloader, create_downloader
+
+logger = logging.getLogger(__name__)
+
+
+def downloader_fingerprint(dl_model) -> tuple:
+    """影响连接和认证的配置字段，任一变化都需要重建客户端"""
+    return (
+        dl_model.type, dl_model.host, dl_model.port,
+        dl_model.username or "", dl_model.password or "", bool(dl_model.use_ssl),
+    )
+
+
+class DownloaderRegistry:
+    """下载器客户端注册表（按 Downloader.id 复用）"""
+
+    def __init__(self):
+        # downloader_id -> (配置指纹, 适配器, 最近使用时间)
+        self._entries: dict[int, tuple[tuple, BaseDownloader, float]] = {}
+        self.created = 0
+        self.reused = 0
+
+    def get(self, dl_model) -> BaseDownloader:
+        """获取下载器客户端，配置变化时重建"""
+        fingerprint = downloader_fingerprint(dl_model)
+        entry = self._entries.get(dl_model.id)
+        if entry and entry[0] == fingerprint:
+            self.reused += 1
+            self._entries[dl_model.id] = (fingerprint, entry[1], time.monotonic())
+            return entry[1]
+
+        if entry:
+            logger.info(f"下载器 [{dl_model.id}] 配置已变更，重建客户端")
+            self._close_later(entry[1])
+        downloader = create_downloader(
+            dl_model.type, host=dl_model.host, port=dl_model.port,
+            username=dl_model.username, password=dl_model.password, use_ssl=dl_model.use_ssl,
+        )
+        self._entries[dl_model.id] = (fingerprint, downloader, time.monotonic())
+        self.created += 1
+        return downloader
+
+    def install(self, dl_model, downloader: BaseDownloader):
+        """直接登记一个已创建的客户端（基准测试 / 模拟器接入用），配置不变时后续 get 复用它"""
+        entry = self._entries.get(dl_model.id)
+        if entry and entry[1] is not downloader:
+            self._close_later(entry[1])
+        self._entries[dl_model.id] = (downloader_fingerprint(dl_model), downloader, time.monotonic())
+
+    @staticmethod
+    def _close_later(downloader: BaseDownloader):
+        """后台关闭被替换的客户端（可能仍有调用方在使用，不阻塞当前请求）"""
+        try:
+            asyncio.get_running_loop().create_task(downloader.close())
+        except RuntimeError:
+            pass
+
+    async def invalidate(self, downloader_id: int):
+        """移除并关闭指定下载器的客户端"""
+        entry = self._entries.pop(downloader_id, None)
+        if entry:
+            await entry[1].close()
+
+    async def close_all(self):
+        entries = list(self._entries.values())
+        self._entries.clear()
+        for _, downloader, _ in entries:
+            try:
+                await downloader.close()
+            except Exception as e:
+                logger.debug(f"关闭下载器客户端失败: {e}")
+        if entries:
+            logger.info(f"已关闭 {len(entries)} 个下载器客户端")
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "clients": len(self._entries),
+            "created": self.created,
+            "reused": self.reused,
+            "downloaders": [
+                {
+                    "id": downloader_id,
+                    "type": fingerprint[0],
+                    "idle_seconds": round(now - last_used, 1),
+                    "logins": getattr(downloader, "login_count", None),
+                }
+                for downloader_id, (fingerprint, downloader, last_used) in self._entries.items()
+            ],
+        }
+
+
+# 进程级单例
+downloader_registry = DownloaderRegistry()
+
+
+def get_downloader(dl_model) -> BaseDownloader:
+    """按 Downloader 配置获取复用的下载器客户端"""
+    return downloader_registry.get(dl_model)
+
+
+async def close_downloaders():
+    await downloader_registry.close_all()
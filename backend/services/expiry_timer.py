@@ -0,0 +1,240 @@
+"""
+促销到期定时器
+
+所有种子的促销到期处理由一个最小堆 + 单个 asyncio 任务驱动，替代每个种子一个 APScheduler date 任务：
+- 注册 / 改期 O(log n)，取消为惰性删除（失效条目过多时整体重建堆）
+- 同一时间窗口内到期的种子合并为一批交给处理函数，按下载器批量暂停 / 删除
+- 站点页面上的促销截止时间是站点本地时间（settings.site_timezone），入库前统一换算为 UTC
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import re
+import time
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Awaitable, Callable, Iterable, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# 系统缺少 tzdata 且配置无法识别时使用（国内站点绝大多数为 UTC+8）
+_FALLBACK_TZ = timezone(timedelta(hours=8), "UTC+8")
+_OFFSET_RE = re.compile(r"^(?:UTC|GMT)?\s*([+-])(\d{1,2})(?::?(\d{2}))?$", re.IGNORECASE)
+_SITE_TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M")
+
+# 单次等待上限（秒）：系统时间被调整时最多延迟这么久重新计算
+_MAX_SLEEP = 60.0
+
+
+@lru_cache(maxsize=8)
+def _resolve_timezone(name: str) -> tzinfo:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        pass
+    match = _OFFSET_RE.match(name.strip())
+    if match:
+        sign, hours, minutes = match.groups()
+        offset = timedelta(hours=int(hours), minutes=int(minutes or 0))
+        return timezone(-offset if sign == "-" else offset)
+    logger.warning(f"无法识别站点时区 {name!r}（系统可能缺少 tzdata），按 UTC+8 处理")
+    return _FALLBACK_TZ
+
+
+def site_timezone() -> tzinfo:
+    """站点时区：IANA 名称（如 Asia/Shanghai）或固定偏移（如 +08:00、UTC+8）"""
+    return _resolve_timezone(settings.site_timezone or "")
+
+
+def parse_site_time(value: str) -> Optional[datetime]:
+    """把站点页面上的本地时间字符串换算为 UTC（naive，与数据库中其他时间一致）；无法解析时返回 None"""
+    if not value:
+        return None
+    for fmt in _SITE_TIME_FORMATS:
+        try:
+            local = datetime.strptime(value.strip(), fmt)
+        except (ValueError, TypeError):
+            continue
+        return local.replace(tzinfo=site_timezone()).astimezone(timezone.utc).replace(tzinfo=None)
+    return None
+
+
+# 旧版本按站点本地时间保存 discount_end_time；迁移完成后写入此键，之后不再执行
+_UTC_MIGRATION_KEY = "discount_end_time_utc"
+
+
+async def migrate_legacy_discount_times() -> int:
+    """
+    一次性迁移：把旧版本按站点本地时间（naive）保存的 discount_end_time 按 site_timezone() 换算为 UTC。
+    在恢复到期任务之前执行；换算和迁移标记在同一事务中提交。返回换算的记录数。
+    """
+    from sqlalchemy import select, update
+    from database import async_session
+    from models import DownloadHistory, SystemSetting
+
+    async with async_session() as db:
+        done = (await db.execute(
+            select(SystemSetting.id).where(SystemSetting.key == _UTC_MIGRATION_KEY)
+        )).scalar_one_or_none()
+        if done:
+            return 0
+        rows = (await db.execute(
+            select(DownloadHistory.id, DownloadHistory.discount_end_time)
+            .where(DownloadHistory.discount_end_time.is_not(None))
+        )).all()
+        tz = site_timezone()
+        values = [
+            {"id": row_id, "discount_end_time": local.replace(tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)}
+            for row_id, local in rows
+        ]
+        if values:
+            await db.execute(update(DownloadHistory), values)
+        db.add(SystemSetting(key=_UTC_MIGRATION_KEY, value={
+            "rows": len(values),
+            "site_timezone": settings.site_timezone,
+            "migrated_at": datetime.utcnow().isoformat(),
+        }))
+        await db.commit()
+    if values:
+        logger.info(f"已将 {len(values)} 条促销截止时间从站点时区 {settings.site_timezone} 换算为 UTC")
+    return len(values)
+
+
+def _timestamp(utc_time: datetime) -> float:
+    return utc_time.replace(tzinfo=timezone.utc).timestamp()
+
+
+class ExpiryTimer:
+    """
+    到期定时器：history_id -> 触发时间（UTC）。
+    堆条目为 [时间戳, 序号, history_id, 有效]，取消只把条目标记为无效。
+    """
+
+    def __init__(self):
+        self._heap: list[list] = []
+        self._entries: dict[int, list] = {}
+        self._counter = itertools.count()
+        self._handler: Optional[Callable[[list[int]], Awaitable[None]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self.fired = 0
+        self.batches = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, history_id: int) -> bool:
+        return history_id in self._entries
+
+    def _new_entry(self, history_id: int, run_at: datetime) -> list:
+        entry = [_timestamp(run_at), next(self._counter), history_id, True]
+        self._entries[history_id] = entry
+        return entry
+
+    def schedule(self, history_id: int, run_at: datetime):
+        """注册或改期（run_at 为 UTC）"""
+        self.cancel(history_id)
+        entry = self._new_entry(history_id, run_at)
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] is entry:
+            self._wakeup.set()
+
+    def cancel(self, history_id: int) -> bool:
+        entry = self._entries.pop(history_id, None)
+        if entry is None:
+            return False
+        entry[3] = False
+        # 失效条目超过一半时重建，堆大小保持 O(有效条目数)
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._entries):
+            self._heap = [e for e in self._heap if e[3]]
+            heapq.heapify(self._heap)
+        return True
+
+    def replace_all(self, items: Iterable[tuple[int, datetime]]):
+        """用 (history_id, run_at) 整体替换全部定时（启动 / 设置变更时从数据库恢复），O(n) 建堆"""
+        self._entries = {}
+        for history_id, run_at in items:
+            self._new_entry(history_id, run_at)
+        self._heap = list(self._entries.values())
+        heapq.heapify(self._heap)
+        self._wakeup.set()
+
+    def _head(self) -> Optional[list]:
+        while self._heap and not self._heap[0][3]:
+            heapq.heappop(self._heap)
+        return self._heap[0] if self._heap else None
+
+    def next_run(self) -> Optional[datetime]:
+        head = self._head()
+        return datetime.utcfromtimestamp(head[0]) if head else None
+
+    def pop_due(self, now: float, window: float = 0) -> list[int]:
+        """取出触发时间不晚于 now + window 的全部条目（同一窗口内到期的合并为一批）"""
+        due = []
+        while True:
+            head = self._head()
+            if head is None or head[0] > now + window:
+                break
+            heapq.heappop(self._heap)
+            self._entries.pop(head[2], None)
+            due.append(head[2])
+        return due
+
+    # ---- 后台任务 ----
+
+    def start(self, handler: Callable[[list[int]], Awaitable[None]]):
+        """启动后台任务（需在事件循环中调用）；handler 接收一批到期的 history_id"""
+        self._handler = handler
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="expiry_timer")
+        logger.info("促销到期定时器已启动")
+
+    def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._task and not self._task.done())
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            head = self._head()
+            delay = _MAX_SLEEP if head is None else head[0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), min(delay, _MAX_SLEEP))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            due = self.pop_due(time.time(), settings.expiry_batch_window)
+            if not due:
+                continue
+            self.batches += 1
+            self.fired += len(due)
+            try:
+                await self._handler(due)
+            except Exception as e:
+                logger.error(f"促销到期批处理失败（{len(due)} 个种子）: {e}")
+
+    def stats(self) -> dict:
+        next_run = self.next_run()
+        return {
+            "running": self.running,
+            "pending": len(self._entries),
+            "next_run_time": str(next_run) if next_run else None,
+            "fired": self.fired,
+            "batches": self.batches,
+        }
+
+
+# 进程级单例
+expiry_timer = ExpiryTimer()
@@ -0,0 +1,70 @@
+"""
+并发扇出
+
+对多个下载器同时执行同一操作：限制并发数、每个目标独立超时，
+单个目标离线或超时只影响它自己的结果，总耗时取决于最慢的正常目标而不是所有目标之和。
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Generic, Iterable, Optional, TypeVar
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K")
+T = TypeVar("T")
+
+
+@dataclass
+class FanoutResult(Generic[K, T]):
+    """单个目标的执行结果"""
+    target: K
+    value: Optional[T] = None
+    error: Optional[BaseException] = None
+    elapsed: float = 0.0  # 秒
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+async def fan_out(
+    targets: Iterable[K],
+    func: Callable[[K], Awaitable[T]],
+    concurrency: int = None,
+    timeout: float = None,
+    label: Callable[[K], Any] = None,
+) -> list[FanoutResult[K, T]]:
+    """
+    并发对每个目标调用 func(target)，按输入顺序返回结果（不抛出异常）。
+    concurrency: 最大并发数，默认 settings.fanout_concurrency
+    timeout: 每个目标的截止时间（秒），默认 settings.fanout_timeout；<= 0 表示不限制
+    label: 日志中显示目标的方式
+    """
+    if concurrency is None:
+        concurrency = settings.fanout_concurrency
+    if timeout is None:
+        timeout = settings.fanout_timeout
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(target: K) -> FanoutResult[K, T]:
+        async with semaphore:
+            start = time.monotonic()
+            result = FanoutResult(target=target)
+            try:
+                result.value = await asyncio.wait_for(func(target), timeout if timeout > 0 else None)
+            except asyncio.TimeoutError as e:
+                # func 自己抛出的超时（如 call_downloader）保留原信息
+                result.error = e if str(e) else TimeoutError(f"超过 {timeout}s 未响应")
+            except Exception as e:
+                result.error = e
+            result.elapsed = time.monotonic() - start
+            if result.error is not None:
+                name = label(target) if label else target
+                logger.warning(f"[{name}] 执行失败（{result.elapsed:.1f}s）: {result.error}")
+            return result
+
+    return await asyncio.gather(*(run(t) for t in targets))
@@ -0,0 +1,126 @@
+"""
+种子列表页缓存
+
+同一账号、同一查询条件的 torrents.php 结果在短时间内会被多条规则、前端页面、
+手动推送反复请求。这里按（账号, 规范化查询, 页码）缓存解析结果：
+- TTL 过期 + LRU 容量上限
+- 单飞（single-flight）：并发的相同请求只发起一次 HTTP 请求，共享结果；
+  只合并到优先级不低于自己的进行中请求，交互请求不会排在后台任务的限流通道里
+- 返回结果的副本，调用方修改种子信息不会影响缓存和其他调用方
+- 命中 / 未命中计数，支持强制刷新绕过缓存
+"""
+import asyncio
+import copy
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable
+
+from config import settings
+from services.rate_limiter import RequestPriority
+
+logger = logging.getLogger(__name__)
+
+
+class ListingCache:
+    """带 TTL 的 LRU 缓存 + 请求合并"""
+
+    def __init__(self):
+        self._entries: OrderedDict[Hashable, tuple[float, list]] = OrderedDict()
+        # 缓存键 -> (发起请求的优先级, 请求任务)
+        self._inflight: dict[Hashable, tuple[RequestPriority, asyncio.Task]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+    def _get_fresh(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at > settings.listing_cache_ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key: Hashable, value: list):
+        if settings.listing_cache_ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > max(1, settings.listing_cache_size):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def _copies(value: list) -> list:
+        return [copy.copy(item) for item in value]
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[list]],
+                           bypass: bool = False,
+                           priority: RequestPriority = RequestPriority.INTERACTIVE) -> list:
+        """
+        读取缓存，未命中时调用 fetch 获取。
+        bypass=True 时忽略已缓存的结果（强制刷新），但仍会合并到正在进行的相同请求。
+        priority 为 fetch 使用的限流通道：进行中的相同请求优先级更低时不合并，
+        而是另发一个请求（之后的调用方合并到这个优先级更高的请求）。
+        """
+        if bypass:
+            self.bypassed += 1
+        else:
+            cached = self._get_fresh(key)
+            if cached is not None:
+                self.hits += 1
+                return self._copies(cached)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight[0] <= priority:
+            self.coalesced += 1
+            task = inflight[1]
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fetch_and_store(key, fetch))
+            self._inflight[key] = (priority, task)
+        # shield：某个等待方被取消时不影响其他共享同一请求的调用方
+        return self._copies(await asyncio.shield(task))
+
+    async def _fetch_and_store(self, key: Hashable, fetch: Callable[[], Awaitable[list]]) -> list:
+        try:
+            value = await fetch()
+            self._store(key, value)
+            return value
+        finally:
+            # 可能已被优先级更高的请求替换
+            inflight = self._inflight.get(key)
+            if inflight is not None and inflight[1] is asyncio.current_task():
+                del self._inflight[key]
+
+    def invalidate(self, prefix: Hashable = None):
+        """清空缓存；指定 prefix 时只清除 key[0] == prefix 的条目"""
+        if prefix is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if isinstance(k, tuple) and k and k[0] == prefix]:
+            del self._entries[key]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "ttl_seconds": settings.listing_cache_ttl,
+            "max_entries": settings.listing_cache_size,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "bypassed": self.bypassed,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0,
+        }
+
+
+# 进程级单例
+listing_cache = ListingCache()
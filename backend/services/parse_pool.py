@@ -0,0 +1,111 @@
+"""
+HTML 解析工作池
+
+把 BeautifulSoup / lxml 页面解析从 asyncio 事件循环移到线程池或进程池执行，
+大列表、H&R 页面解析期间其他请求和定时器不再被卡住。
+解析函数必须是模块级纯函数，只返回 TorrentInfo / HRRecord / UserStats 等纯数据。
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _timed_call(func: Callable, *args):
+    """在工作线程 / 进程中执行解析并计时"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class ParsePool:
+    """解析工作池（按 settings.parse_executor 选择 thread / process / inline）"""
+
+    def __init__(self):
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self.max_pending = 0
+        self.parsed = 0
+        self.failed = 0
+        self.total_parse_time = 0.0
+        self.max_parse_time = 0.0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    @property
+    def mode(self) -> str:
+        return settings.parse_executor
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            workers = max(1, settings.parse_workers)
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="html-parse")
+            logger.info(f"解析工作池已启动: {self.mode} x {workers}")
+        return self._executor
+
+    async def run(self, func: Callable, *args):
+        """在工作池中执行解析函数，返回其结果"""
+        submitted = time.perf_counter()
+        self._pending += 1
+        self.max_pending = max(self.max_pending, self._pending)
+        try:
+            if self.mode == "inline":
+                result, elapsed = _timed_call(func, *args)
+            else:
+                loop = asyncio.get_running_loop()
+                result, elapsed = await loop.run_in_executor(self._get_executor(), _timed_call, func, *args)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._pending -= 1
+
+        # 排队等待时间 = 总耗时 - 实际解析耗时
+        waited = max(0.0, time.perf_counter() - submitted - elapsed)
+        self.parsed += 1
+        self.total_parse_time += elapsed
+        self.max_parse_time = max(self.max_parse_time, elapsed)
+        self.total_wait_time += waited
+        self.max_wait_time = max(self.max_wait_time, waited)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "workers": settings.parse_workers,
+            "queue_depth": self._pending,
+            "max_queue_depth": self.max_pending,
+            "parsed": self.parsed,
+            "failed": self.failed,
+            "avg_parse_ms": round(self.total_parse_time / self.parsed * 1000, 2) if self.parsed else 0,
+            "max_parse_ms": round(self.max_parse_time * 1000, 2),
+            "avg_wait_ms": round(self.total_wait_time / self.parsed * 1000, 2) if self.parsed else 0,
+            "max_wait_ms": round(self.max_wait_time * 1000, 2),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("解析工作池已关闭")
+
+
+# 进程级单例
+parse_pool = ParsePool()
+
+
+async def run_parse(func: Callable, *args):
+    """在解析工作池中执行页面解析"""
+    return await parse_pool.run(func, *args)
+
+
+def shutdown_parse_pool():
+    parse_pool.shutdown()
@@ -0,0 +1,142 @@
+"""
+站点请求限流
+
+进程级、按账号（站点地址 + Cookie）共享的令牌桶。
+所有 NexusPHPAdapter 实例共用同一个桶，调度任务、手动搜索、H&R 同步
+同时运行时也不会突破 request_delay 规定的平均速率；
+空闲一段时间后允许 request_burst 个请求连续发出，避免无谓等待。
+排队的请求按交互 / 定时任务 / 批量三个通道的优先级获取令牌。
+"""
+import asyncio
+import heapq
+import logging
+import time
+from enum import IntEnum
+from typing import Optional
+
+from config import settings
+from services.site_client_pool import account_key
+
+logger = logging.getLogger(__name__)
+
+
+class RequestPriority(IntEnum):
+    """请求优先级通道，数值越小越优先"""
+    INTERACTIVE = 0  # 前端页面触发的请求（搜索、详情、推送）
+    SCHEDULER = 1    # 定时任务（自动下载、账号刷新）
+    BULK = 2         # 批量抓取（H&R 全量同步等）
+
+
+class TokenBucket:
+    """
+    带优先级队列的令牌桶：rate 为每秒补充的令牌数，burst 为桶容量。
+    令牌不足时请求进入优先级堆排队，每产生一个令牌就发给优先级最高、
+    等待最久的请求；交互请求总是拿到下一个令牌，后台任务只使用剩余容量，
+    总请求速率不变。
+    """
+
+    def __init__(self, rate: Optional[float], burst: int):
+        self.rate = rate  # None 表示不限速
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = 0
+        self._dispatcher: Optional[asyncio.Task] = None
+        # 按通道统计
+        self._lanes = {
+            p.name.lower(): {"acquired": 0, "total_wait": 0.0, "max_wait": 0.0}
+            for p in RequestPriority
+        }
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate is not None:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, priority: RequestPriority = RequestPriority.SCHEDULER):
+        """获取一个令牌，令牌不足时按优先级排队等待"""
+        start = time.monotonic()
+        if self.rate is not None:
+            self._refill()
+            if not self._waiters and self._tokens >= 1:
+                self._tokens -= 1
+            else:
+                fut = asyncio.get_running_loop().create_future()
+                self._seq += 1
+                heapq.heappush(self._waiters, (int(priority), self._seq, fut))
+                if self._dispatcher is None or self._dispatcher.done():
+                    self._dispatcher = asyncio.create_task(self._dispatch())
+                try:
+                    await fut
+                except asyncio.CancelledError:
+                    # 令牌已发放但调用方被取消：归还令牌
+                    if fut.done() and not fut.cancelled():
+                        self._tokens = min(self.burst, self._tokens + 1)
+                    raise
+        self._record(RequestPriority(priority), time.monotonic() - start)
+
+    async def _dispatch(self):
+        """按优先级发放令牌，直到等待队列清空"""
+        while self._waiters:
+            # 丢弃已取消的等待者
+            while self._waiters and self._waiters[0][2].done():
+                heapq.heappop(self._waiters)
+            if not self._waiters:
+                break
+            self._refill()
+            if self._tokens >= 1:
+                _, _, fut = heapq.heappop(self._waiters)
+                self._tokens -= 1
+                fut.set_result(None)
+                continue
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def _record(self, priority: RequestPriority, waited: float):
+        lane = self._lanes[priority.name.lower()]
+        lane["acquired"] += 1
+        lane["total_wait"] += waited
+        lane["max_wait"] = max(lane["max_wait"], waited)
+
+    def stats(self) -> dict:
+        if self.rate is not None:
+            self._refill()
+        waiting = {p.name.lower(): 0 for p in RequestPriority}
+        for prio, _, fut in self._waiters:
+            if not fut.done():
+                waiting[RequestPriority(prio).name.lower()] += 1
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "lanes": {
+                name: {
+                    "waiting": waiting[name],
+                    "acquired": lane["acquired"],
+                    "avg_wait_seconds": round(lane["total_wait"] / lane["acquired"], 3) if lane["acquired"] else 0,
+                    "max_wait_seconds": round(lane["max_wait"], 3),
+                }
+                for name, lane in self._lanes.items()
+            },
+        }
+
+
+_buckets: dict[str, TokenBucket] = {}
+
+
+def get_rate_limiter(site_url: str, cookie: str) -> TokenBucket:
+    """获取账号对应的令牌桶（不存在时按当前配置创建）"""
+    key = account_key(site_url, cookie)
+    bucket = _buckets.get(key)
+    if bucket is None:
+        rate = 1 / settings.request_delay if settings.request_delay > 0 else None
+        bucket = TokenBucket(rate, settings.request_burst)
+        _buckets[key] = bucket
+        logger.debug(f"新建限流令牌桶: {key}, rate={rate}, burst={bucket.burst}")
+    return bucket
+
+
+def get_rate_limit_stats() -> dict:
+    """获取所有账号的限流统计"""
+    return {key: bucket.stats() for key, bucket in _buckets.items()}
@@ -5,24 +5,33 @@
 支持精确到期定时器（每个种子独立）和保底遍历定时器。
 """
 import logging
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from sqlalchemy import select
 
+from config import settings
+
 logger = logging.getLogger(__name__)
 
 scheduler = AsyncIOScheduler()
 
 
 def init_scheduler():
-    """初始化调度器"""
+    """初始化调度器（需在事件循环中调用）"""
+    from services.expiry_timer import expiry_timer
+
     if not scheduler.running:
         scheduler.start()
         logger.info("调度器已启动")
+    expiry_timer.start(handle_expiry_batch)
 
 
 def shutdown_scheduler():
     """关闭调度器"""
+    from services.expiry_timer import expiry_timer
+
+    expiry_timer.stop()
     if scheduler.running:
         scheduler.shutdown(wait=False)
         logger.info("调度器已关闭")
@@ -54,7 +63,14 @@ def get_scheduler_status() -> dict:
             "name": job.name,
             "next_run_time": str(job.next_run_time) if job.next_run_time else None,
         })
-    return {"running": scheduler.running, "jobs": jobs}
+    from services.expiry_timer import expiry_timer
+    from services.downloaded_index import downloaded_index
+    return {
+        "running": scheduler.running,
+        "jobs": jobs,
+        "expiry_timer": expiry_timer.stats(),
+        "downloaded_index": downloaded_index.stats(),
+    }
 
 
 async def restore_interval_jobs():
@@ -111,6 +127,19 @@ async def restore_interval_jobs():
     # 统计快照采集：固定任务，不暴露给开关
     add_job(collect_stats_snapshot, "interval", "stats_snapshot", minutes=10, name="统计快照采集")
 
+    # 站点连接池闲置回收：固定任务，不暴露给开关
+    from services.site_client_pool import evict_idle_site_clients
+    add_job(evict_idle_site_clients, "interval", "site_client_evict", minutes=5, name="站点连接回收")
+
+    # 下载器熔断探测：固定任务，只探测熔断中且退避到期的下载器
+    from services.downloader_health import probe_downloaders
+    add_job(probe_downloaders, "interval", "downloader_health_probe", seconds=15, name="下载器健康探测")
+
+    # 已下载索引对账：固定任务，修正直接改库带来的偏差并重建 Bloom 过滤器
+    from services.downloaded_index import reconcile_downloaded_index
+    add_job(reconcile_downloaded_index, "interval", "downloaded_index_reconcile",
+            minutes=settings.downloaded_index_reconcile_minutes, name="已下载索引对账")
+
     # 根据开关注册/移除任务
     if control.get("auto_download_enabled"):
         add_job(auto_download_torrents, "interval", "auto_download",
@@ -151,63 +180,59 @@ async def restore_interval_jobs():
 
 # ========== 精确到期定时器 ==========
 
+def _expiry_run_time(expire_time: datetime) -> datetime:
+    """到期处理的触发时间：提前 settings.expiry_lead_seconds 执行，留出执行余量"""
+    return expire_time - timedelta(seconds=settings.expiry_lead_seconds)
+
+
 def schedule_expiry_job(history_id: int, torrent_id: str, expire_time: datetime):
     """
-    为单个种子注册精确到期定时任务。
-    到期时间到达后自动执行 handle_single_expiry。
-    提前 1 分钟触发，留出执行余量。
+    为单个种子注册精确到期定时（expire_time 为 UTC）。
+    所有种子共用一个到期定时器（最小堆），到期后批量执行 handle_expiry_batch；
+    已过期的种子会在下一次定时器循环中立即处理。
     """
-    job_id = f"expiry_{history_id}"
-    # 如果已有同 ID 任务，先移除
-    existing = scheduler.get_job(job_id)
-    if existing:
-        scheduler.remove_job(job_id)
+    from services.expiry_timer import expiry_timer
 
-    # 确保触发时间在未来（至少 10 秒后）
-    run_time = expire_time - timedelta(minutes=1)
-    now = datetime.utcnow()
-    if run_time <= now:
-        run_time = now + timedelta(seconds=10)
-
-    scheduler.add_job(
-        handle_single_expiry,
-        trigger="date",
-        run_date=run_time,
-        id=job_id,
-        args=[history_id],
-        name=f"到期处理: 种子 {torrent_id}",
-        replace_existing=True,
-        misfire_grace_time=300,  # 允许 5 分钟的延迟执行
-    )
-    logger.info(f"已注册精确到期任务: {job_id}, 触发时间: {run_time}")
+    run_time = _expiry_run_time(expire_time)
+    expiry_timer.schedule(history_id, run_time)
+    logger.info(f"已注册精确到期定时: 种子 {torrent_id}（记录 {history_id}），触发时间: {run_time} UTC")
 
 
 async def handle_single_expiry(history_id: int):
+    """处理单个种子到期"""
+    await handle_expiry_batch([history_id])
+
+
+async def handle_expiry_batch(history_ids: list[int]):
     """
-    处理单个种子到期。
-    根据设置决定删除还是暂停，H&R 种子强制暂停。
+    处理一批到期种子。
+    根据设置决定删除还是暂停，H&R 种子强制暂停；同一下载器、同一动作的种子一次批量请求。
+    促销截止时间被延后的种子重新注册定时。
     """
     from database import async_session
     from models import DownloadHistory, Downloader, SystemSetting
-    from services.downloader import create_downloader
+    from services.downloader_health import call_downloader
 
     async with async_session() as db:
         result = await db.execute(
-            select(DownloadHistory).where(DownloadHistory.id == history_id)
+            select(DownloadHistory).where(DownloadHistory.id.in_(history_ids))
         )
-        record = result.scalar_one_or_none()
-        if not record:
-            logger.warning(f"到期处理: 历史记录 {history_id} 不存在")
-            return
-
-        # 已经是终态，跳过
-        if record.status not in ("downloading", "seeding"):
-            logger.debug(f"种子 [{record.torrent_id}] 状态为 {record.status}，跳过到期处理")
-            return
+        records = result.scalars().all()
+        if len(records) < len(history_ids):
+            logger.warning(f"到期处理: {len(history_ids) - len(records)} 条历史记录不存在")
 
-        # 检查是否真的过期了
-        if record.discount_end_time and record.discount_end_time > datetime.utcnow():
-            logger.debug(f"种子 [{record.torrent_id}] 尚未过期，跳过")
+        # 已经是终态的跳过；截止时间被延后（尚未进入提前量窗口）的重新注册
+        deadline = datetime.utcnow() + timedelta(seconds=settings.expiry_lead_seconds + settings.expiry_batch_window)
+        expired = []
+        for record in records:
+            if record.status not in ("downloading", "seeding"):
+                logger.debug(f"种子 [{record.torrent_id}] 状态为 {record.status}，跳过到期处理")
+            elif record.discount_end_time and record.discount_end_time > deadline:
+                logger.debug(f"种子 [{record.torrent_id}] 尚未过期，重新注册定时")
+                schedule_expiry_job(record.id, record.torrent_id, record.discount_end_time)
+            else:
+                expired.append(record)
+        if not expired:
             return
 
         # 读取到期动作设置
@@ -220,74 +245,78 @@ async def handle_single_expiry(history_id: int):
         # 主开关关闭时：不做任何到期保护动作（暂停/删除都不执行）
         # 重要警示：关闭后可能错过免费到期时间点，带来账号风险，请在 README 中特别标注。
         if not config.get("enabled") or not config.get("delete_expired"):
-            logger.warning(f"促销到期保护已关闭，跳过处理: [{record.torrent_id}] {record.title[:40]}")
+            for record in expired:
+                logger.warning(f"促销到期保护已关闭，跳过处理: [{record.torrent_id}] {record.title[:40]}")
             return
 
         # expired_action: "delete" 删除 / "pause" 暂停，默认 "delete"
         expired_action = config.get("expired_action", "delete")
 
-        # H&R 种子强制暂停，绝不删除
-        if record.has_hr:
-            expired_action = "pause"
-            logger.warning(f"种子 [{record.torrent_id}] 是 H&R 种子，强制暂停（不删除）")
-
-        if not record.downloader_id or not record.info_hash:
-            logger.warning(f"种子 [{record.torrent_id}] 缺少下载器信息，仅更新状态")
-            record.status = "expired_paused" if expired_action == "pause" else "expired_deleted"
-            await db.commit()
-            return
-
-        dl_result = await db.execute(
-            select(Downloader).where(Downloader.id == record.downloader_id)
-        )
-        dl_model = dl_result.scalar_one_or_none()
-        if not dl_model:
-            logger.warning(f"种子 [{record.torrent_id}] 的下载器不存在")
-            return
-
-        downloader = create_downloader(
-            dl_model.type, host=dl_model.host, port=dl_model.port,
-            username=dl_model.username, password=dl_model.password, use_ssl=dl_model.use_ssl,
-        )
-
-        try:
-            if expired_action == "pause":
-                await downloader.pause_torrent(record.info_hash)
-                record.status = "expired_paused"
-                logger.info(f"促销到期暂停: [{record.torrent_id}] {record.title[:40]}")
-            else:
-                await downloader.remove_torrent(record.info_hash, delete_files=True)
-                record.status = "expired_deleted"
-                logger.info(f"促销到期删种: [{record.torrent_id}] {record.title[:40]}")
-        except Exception as e:
-            logger.error(f"到期处理种子 [{record.torrent_id}] 失败: {e}")
+        # 按（下载器, 动作）分组
+        groups: dict[tuple[int, str], list] = {}
+        for record in expired:
+            # H&R 种子强制暂停，绝不删除
+            action = expired_action
+            if record.has_hr:
+                action = "pause"
+                logger.warning(f"种子 [{record.torrent_id}] 是 H&R 种子，强制暂停（不删除）")
+
+            if not record.downloader_id or not record.info_hash:
+                logger.warning(f"种子 [{record.torrent_id}] 缺少下载器信息，仅更新状态")
+                record.status = "expired_paused" if action == "pause" else "expired_deleted"
+                continue
+            groups.setdefault((record.downloader_id, action), []).append(record)
+
+        dl_models = {
+            d.id: d for d in (await db.execute(
+                select(Downloader).where(Downloader.id.in_({dl_id for dl_id, _ in groups}))
+            )).scalars()
+        }
+        for (dl_id, action), group in groups.items():
+            dl_model = dl_models.get(dl_id)
+            if not dl_model:
+                logger.warning(f"下载器 {dl_id} 不存在，跳过 {len(group)} 个到期种子")
+                continue
+            try:
+                done = await call_downloader(
+                    dl_model, lambda dl: _batch_torrent_action(dl, action, group),
+                )
+            except Exception as e:
+                logger.error(f"到期处理失败（下载器 {dl_model.name}，{len(group)} 个种子）: {e}")
+                continue
+            for record in done:
+                if action == "pause":
+                    record.status = "expired_paused"
+                    logger.info(f"促销到期暂停: [{record.torrent_id}] {record.title[:40]}")
+                else:
+                    record.status = "expired_deleted"
+                    logger.info(f"促销到期删种: [{record.torrent_id}] {record.title[:40]}")
 
         await db.commit()
 
 
 async def restore_expiry_jobs():
     """
-    启动时恢复所有未过期种子的精确定时任务。
-    遍历所有活跃的、有 discount_end_time 的下载记录。
+    启动时（及相关设置变更后）恢复所有未过期种子的精确到期定时。
+    遍历所有活跃的、有 discount_end_time 的下载记录，整体重建到期定时器。
     """
     from database import async_session
     from models import DownloadHistory
+    from services.expiry_timer import expiry_timer
 
     async with async_session() as db:
         result = await db.execute(
-            select(DownloadHistory).where(
+            select(DownloadHistory.id, DownloadHistory.discount_end_time).where(
                 DownloadHistory.discount_end_time != None,
                 DownloadHistory.status.in_(["downloading", "seeding"]),
             )
         )
-        records = result.scalars().all()
-        count = 0
-        for record in records:
-            schedule_expiry_job(record.id, record.torrent_id, record.discount_end_time)
-            count += 1
+        expiry_timer.replace_all(
+            (history_id, _expiry_run_time(end_time)) for history_id, end_time in result.all()
+        )
 
-        if count > 0:
-            logger.info(f"已恢复 {count} 个精确到期定时任务")
+    if len(expiry_timer) > 0:
+        logger.info(f"已恢复 {len(expiry_timer)} 个精确到期定时，最近触发: {expiry_timer.next_run()} UTC")
 
 
 # ========== 定时任务实现 ==========
@@ -307,191 +336,11 @@ async def auto_download_torrents():
     3. 过滤已下载的种子
     4. 规则匹配
     5. 推送到下载器并记录历史
+    各阶段以流水线方式并发执行，见 services.auto_download。
     """
-    from database import async_session
-    from models import FilterRule, Account, Downloader, DownloadHistory
-    from services.site_adapter import NexusPHPAdapter, SearchParams
-    from services.rule_engine import RuleEngine
-    from services.downloader import create_downloader
-
-    logger.info("开始执行自动下载任务")
-
-    async with async_session() as db:
-        # 获取所有启用的规则
-        result = await db.execute(
-            select(FilterRule).where(FilterRule.enabled == True).order_by(FilterRule.sort_order)
-        )
-        rules = result.scalars().all()
-        if not rules:
-            logger.info("没有启用的规则，跳过")
-            return
-
-        # 获取已下载的种子 ID 集合
-        hist_result = await db.execute(select(DownloadHistory.torrent_id))
-        downloaded_ids = {row[0] for row in hist_result.all()}
-
-        for rule in rules:
-            try:
-                await _process_rule(db, rule, downloaded_ids)
-            except Exception as e:
-                logger.error(f"处理规则 [{rule.name}] 失败: {e}")
-
-    logger.info("自动下载任务完成")
-
-
-async def _process_rule(db, rule, downloaded_ids: set):
-    """处理单条规则"""
-    from models import Account, Downloader, DownloadHistory
-    from services.site_adapter import NexusPHPAdapter, SearchParams
-    from services.rule_engine import RuleEngine
-    from services.downloader import create_downloader
-
-    # 确定使用的账号
-    account_id = rule.account_id
-    if not account_id:
-        # 没有指定账号，使用第一个活跃账号
-        result = await db.execute(
-            select(Account).where(Account.is_active == True).limit(1)
-        )
-        account = result.scalar_one_or_none()
-        if not account:
-            logger.warning(f"规则 [{rule.name}] 没有可用账号")
-            return
-    else:
-        result = await db.execute(select(Account).where(Account.id == account_id))
-        account = result.scalar_one_or_none()
-        if not account:
-            logger.warning(f"规则 [{rule.name}] 指定的账号 {account_id} 不存在")
-            return
-
-    # 确定下载器
-    if not rule.downloader_id:
-        logger.warning(f"规则 [{rule.name}] 未指定下载器，跳过")
-        return
-    dl_result = await db.execute(select(Downloader).where(Downloader.id == rule.downloader_id))
-    dl_model = dl_result.scalar_one_or_none()
-    if not dl_model:
-        logger.warning(f"规则 [{rule.name}] 指定的下载器不存在")
-        return
-
-    # 检查当前下载中的数量
-    from sqlalchemy import func
-    count_result = await db.execute(
-        select(func.count()).select_from(DownloadHistory).where(
-            DownloadHistory.rule_id == rule.id,
-            DownloadHistory.status == "downloading",
-        )
-    )
-    current_downloading = count_result.scalar() or 0
-    if current_downloading >= rule.max_downloading:
-        logger.info(f"规则 [{rule.name}] 已达最大下载数 {rule.max_downloading}，跳过")
-        return
-
-    # 构建搜索参数
-    params = SearchParams(
-        keyword=rule.keywords.split(",")[0].strip() if rule.keywords else "",
-    )
-    # 免费筛选
-    if rule.free_only:
-        params.spstate = 2
-
-    adapter = NexusPHPAdapter(account.site_url, account.cookie)
-    try:
-        torrents = await adapter.search_torrents(params)
-    finally:
-        await adapter.close()
-
-    # 转换规则为字典
-    rule_dict = {
-        "free_only": rule.free_only,
-        "double_upload": rule.double_upload,
-        "skip_hr": rule.skip_hr,
-        "min_size": rule.min_size,
-        "max_size": rule.max_size,
-        "min_seeders": rule.min_seeders,
-        "max_seeders": rule.max_seeders,
-        "min_leechers": rule.min_leechers,
-        "max_leechers": rule.max_leechers,
-        "keywords": rule.keywords,
-        "exclude_keywords": rule.exclude_keywords,
-        "categories": rule.categories,
-        "max_publish_hours": rule.max_publish_hours,
-    }
-
-    engine = RuleEngine()
-    downloader = create_downloader(
-        dl_model.type, host=dl_model.host, port=dl_model.port,
-        username=dl_model.username, password=dl_model.password, use_ssl=dl_model.use_ssl,
-    )
-
-    slots = rule.max_downloading - current_downloading
-    added = 0
-
-    for torrent in torrents:
-        if added >= slots:
-            break
-
-        # 跳过已下载
-        if torrent.id in downloaded_ids:
-            continue
-
-        # 规则匹配
-        if not engine.match(torrent, rule_dict):
-            continue
-
-        # 下载并推送
-        try:
-            adapter2 = NexusPHPAdapter(account.site_url, account.cookie)
-            try:
-                torrent_data = await adapter2.download_torrent(torrent.id, account.passkey)
-            finally:
-                await adapter2.close()
-
-            info_hash = await downloader.add_torrent(
-                torrent_data, save_path=rule.save_path, tags=rule.tags,
-            )
-
-            # 记录历史（保存 H&R 和促销截止时间，用于后续保护和自动删种判断）
-            # 解析 discount_end_time 字符串为 datetime
-            _discount_end = None
-            if torrent.discount_end_time:
-                try:
-                    _discount_end = datetime.strptime(torrent.discount_end_time, "%Y-%m-%d %H:%M:%S")
-                except (ValueError, TypeError):
-                    pass
-
-            history = DownloadHistory(
-                torrent_id=torrent.id,
-                info_hash=info_hash,
-                title=torrent.title,
-                size=torrent.size,
-                status="downloading",
-                discount_type=torrent.discount_type,
-                discount_end_time=_discount_end,
-                has_hr=torrent.has_hr,
-                account_id=account.id,
-                downloader_id=dl_model.id,
-                rule_id=rule.id,
-                tags=rule.tags,
-                save_path=rule.save_path,
-            )
-            db.add(history)
-            await db.commit()
+    from services.auto_download import run_auto_download
 
-            # 如果有促销截止时间，注册精确到期定时任务
-            if _discount_end:
-                await db.refresh(history)  # 获取自增 ID
-                schedule_expiry_job(history.id, torrent.id, _discount_end)
-
-            downloaded_ids.add(torrent.id)
-            added += 1
-            logger.info(f"自动下载: [{torrent.id}] {torrent.title[:60]}")
-
-        except Exception as e:
-            logger.error(f"下载种子 {torrent.id} 失败: {e}")
-
-    if added > 0:
-        logger.info(f"规则 [{rule.name}] 本次下载 {added} 个种子")
+    await run_auto_download()
 
 
 async def refresh_all_accounts():
@@ -499,6 +348,7 @@ async def refresh_all_accounts():
     from database import async_session
     from models import Account
     from services.site_adapter import NexusPHPAdapter
+    from services.rate_limiter import RequestPriority
 
     logger.info("开始刷新所有账号数据")
 
@@ -510,7 +360,7 @@ async def refresh_all_accounts():
             try:
                 if not account.uid:
                     continue
-                adapter = NexusPHPAdapter(account.site_url, account.cookie)
+                adapter = NexusPHPAdapter(account.site_url, account.cookie, priority=RequestPriority.SCHEDULER)
                 try:
                     stats = await adapter.get_user_stats(account.uid)
                     account.uploaded = stats.uploaded
@@ -532,14 +382,30 @@ async def refresh_all_accounts():
     logger.info("账号刷新完成")
 
 
+@dataclass
+class _StatusCursor:
+    """状态同步游标：上次同步到的下载器版本号和历史记录 ID"""
+    downloader: object
+    revision: int
+    max_record_id: int
+
+
+# downloader_id -> 游标（进程内有效，重启后首次同步为全量）
+_status_cursors: dict[int, _StatusCursor] = {}
+
+
 async def sync_download_status():
     """
     同步下载器中的种子状态到历史记录。
     将 downloading 状态更新为 seeding/completed 等。
+    支持增量的下载器（qBittorrent sync/maindata）只处理上次同步以来有变化的种子
+    和新增的历史记录。
     """
     from database import async_session
     from models import DownloadHistory, Downloader
-    from services.downloader import create_downloader
+    from services.downloader_health import call_downloader
+    from services.fanout import fan_out
+    from services.downloader import TorrentFields
 
     logger.info("开始同步下载状态")
 
@@ -560,46 +426,105 @@ async def sync_download_status():
             if record.downloader_id:
                 dl_groups.setdefault(record.downloader_id, []).append(record)
 
-        for dl_id, records in dl_groups.items():
+        dl_models = (await db.execute(
+            select(Downloader).where(Downloader.id.in_(dl_groups.keys()))
+        )).scalars().all()
+
+        async def fetch_changes(dl_id: int, downloader):
+            # 下载器客户端重建后版本号不再连续，从头全量同步
+            cursor = _status_cursors.get(dl_id)
+            if cursor and cursor.downloader is not downloader:
+                cursor = None
+            changes = await downloader.get_changes(
+                cursor.revision if cursor else 0, fields=TorrentFields.STATE,
+            )
+            return downloader, cursor, changes
+
+        # 并发拉取各下载器的变化（经熔断器），再逐个写回数据库（会话不能并发使用）
+        results = await fan_out(
+            dl_models,
+            lambda dl_model: call_downloader(dl_model, lambda dl: fetch_changes(dl_model.id, dl)),
+            timeout=0,  # 截止时间由 call_downloader 执行（计入熔断）
+            label=lambda dl_model: dl_model.name,
+        )
+        # 新游标在提交成功后才生效：提交失败时下次仍从原版本号同步，变化不会丢失
+        advanced: dict[int, _StatusCursor] = {}
+        for r in results:
+            if not r.ok:
+                continue
+            dl_id = r.target.id
+            records = dl_groups[dl_id]
+            downloader, cursor, changes = r.value
             try:
-                dl_result = await db.execute(select(Downloader).where(Downloader.id == dl_id))
-                dl_model = dl_result.scalar_one_or_none()
-                if not dl_model:
-                    continue
-
-                downloader = create_downloader(
-                    dl_model.type, host=dl_model.host, port=dl_model.port,
-                    username=dl_model.username, password=dl_model.password, use_ssl=dl_model.use_ssl,
-                )
-
-                # 获取下载器中所有种子状态
-                all_torrents = await downloader.get_all_torrents()
-                hash_map = {t.info_hash.lower(): t for t in all_torrents}
+                removed = set(changes.removed)
 
+                updated = 0
                 for record in records:
                     if not record.info_hash:
                         continue
-                    torrent_status = hash_map.get(record.info_hash.lower())
+                    key = record.info_hash.lower()
+                    torrent_status = changes.torrents.get(key)
+                    is_new_record = cursor is None or record.id > cursor.max_record_id
                     if torrent_status:
                         new_status = torrent_status.state  # downloading/seeding/completed/paused
                         if new_status != record.status:
                             old = record.status
                             record.status = new_status
+                            updated += 1
                             logger.debug(f"种子 {record.torrent_id} 状态: {old} -> {new_status}")
-                    else:
+                    elif changes.full or key in removed or is_new_record:
+                        if not changes.full and key not in removed:
+                            # 增量结果里没有这条新记录的种子：单独查询一次确认
+                            torrent_status = await downloader.get_torrent_status(record.info_hash)
+                            if torrent_status:
+                                if torrent_status.state != record.status:
+                                    record.status = torrent_status.state
+                                    updated += 1
+                                continue
                         # 下载器中找不到，标记为已删除
                         if record.status != "deleted":
                             record.status = "deleted"
+                            updated += 1
                             logger.info(f"种子 {record.torrent_id} 在下载器中不存在，标记为已删除")
 
+                advanced[dl_id] = _StatusCursor(
+                    downloader=downloader,
+                    revision=changes.revision,
+                    max_record_id=max(r.id for r in records),
+                )
+                logger.debug(
+                    f"下载器 {dl_id} 状态同步: {'全量' if changes.full else '增量'} "
+                    f"{len(changes.torrents)} 个变化, {len(removed)} 个移除, 更新 {updated} 条记录"
+                )
+
             except Exception as e:
                 logger.error(f"同步下载器 {dl_id} 状态失败: {e}")
 
         await db.commit()
+        _status_cursors.update(advanced)
 
     logger.info("下载状态同步完成")
 
 
+async def _batch_torrent_action(downloader, action: str, records: list) -> list:
+    """
+    对同一下载器上的一组记录批量执行 pause / remove（一次请求），
+    返回执行成功的记录；失败或下载器中已不存在的记录逐条记日志。
+    """
+    hashes = [r.info_hash for r in records]
+    if action == "pause":
+        results = await downloader.pause_torrents(hashes)
+    else:
+        results = await downloader.remove_torrents(hashes, delete_files=True)
+    done = []
+    for record in records:
+        if results.get(record.info_hash.lower()):
+            done.append(record)
+        else:
+            logger.warning(f"种子 [{record.torrent_id}] {action} 失败或已不在下载器中")
+    return done
+
+
 async def check_expired_torrents():
     """
     保底定时器：遍历所有活跃种子，检查促销是否过期。
@@ -608,7 +533,7 @@ async def check_expired_torrents():
     """
     from database import async_session
     from models import DownloadHistory, Downloader, SystemSetting
-    from services.downloader import create_downloader
+    from services.downloader_health import call_downloader
 
     logger.info("开始保底检查促销过期种子")
 
@@ -638,41 +563,42 @@ async def check_expired_torrents():
         )
         expired = result.scalars().all()
 
+        # 按（下载器, 动作）分组，每组一次批量请求
+        groups: dict[tuple[int, str], list] = {}
         for record in expired:
+            # H&R 种子强制暂停
+            action = "pause" if record.has_hr else expired_action
+
+            if record.has_hr:
+                logger.warning(f"种子 [{record.torrent_id}] {record.title[:40]} 是 H&R 种子，强制暂停")
+
+            if not record.downloader_id or not record.info_hash:
+                record.status = "expired_paused" if action == "pause" else "expired_deleted"
+                continue
+            groups.setdefault((record.downloader_id, action), []).append(record)
+
+        dl_models = {
+            d.id: d for d in (await db.execute(
+                select(Downloader).where(Downloader.id.in_({dl_id for dl_id, _ in groups}))
+            )).scalars()
+        }
+        for (dl_id, action), records in groups.items():
+            dl_model = dl_models.get(dl_id)
+            if not dl_model:
+                continue
             try:
-                # H&R 种子强制暂停
-                action = "pause" if record.has_hr else expired_action
-
-                if record.has_hr:
-                    logger.warning(f"种子 [{record.torrent_id}] {record.title[:40]} 是 H&R 种子，强制暂停")
-
-                if not record.downloader_id or not record.info_hash:
-                    record.status = "expired_paused" if action == "pause" else "expired_deleted"
-                    continue
-
-                dl_result = await db.execute(
-                    select(Downloader).where(Downloader.id == record.downloader_id)
+                done = await call_downloader(
+                    dl_model, lambda dl: _batch_torrent_action(dl, action, records),
                 )
-                dl_model = dl_result.scalar_one_or_none()
-                if not dl_model:
-                    continue
-
-                downloader = create_downloader(
-                    dl_model.type, host=dl_model.host, port=dl_model.port,
-                    username=dl_model.username, password=dl_model.password, use_ssl=dl_model.use_ssl,
-                )
-
-                if action == "pause":
-                    await downloader.pause_torrent(record.info_hash)
-                    record.status = "expired_paused"
-                    logger.info(f"保底-促销到期暂停: [{record.torrent_id}] {record.title[:40]}")
-                else:
-                    await downloader.remove_torrent(record.info_hash, delete_files=True)
-                    record.status = "expired_deleted"
-                    logger.info(f"保底-促销到期删种: [{record.torrent_id}] {record.title[:40]}")
-
+                for record in done:
+                    if action == "pause":
+                        record.status = "expired_paused"
+                        logger.info(f"保底-促销到期暂停: [{record.torrent_id}] {record.title[:40]}")
+                    else:
+                        record.status = "expired_deleted"
+                        logger.info(f"保底-促销到期删种: [{record.torrent_id}] {record.title[:40]}")
             except Exception as e:
-                logger.error(f"保底处理过期种子 {record.torrent_id} 失败: {e}")
+                logger.error(f"保底处理下载器 {dl_id} 的 {len(records)} 个过期种子失败: {e}")
 
         await db.commit()
 
@@ -690,7 +616,7 @@ async def check_non_free_downloading():
     """
     from database import async_session
     from models import DownloadHistory, Downloader, SystemSetting
-    from services.downloader import create_downloader
+    from services.downloader_health import call_downloader
 
     logger.info("开始检查下载中的非免费种子")
 
@@ -712,38 +638,41 @@ async def check_non_free_downloading():
         )
         records = hist_result.scalars().all()
 
+        # 按下载器分组，每个下载器一次批量删除
+        groups: dict[int, list] = {}
         for record in records:
-            try:
-                # 有促销类型的跳过（免费、2x 等）
-                if record.discount_type:
-                    continue
-
-                # H&R 种子跳过
-                if record.has_hr:
-                    logger.debug(f"种子 [{record.torrent_id}] 是 H&R 种子，跳过非免费删除")
-                    continue
+            # 有促销类型的跳过（免费、2x 等）
+            if record.discount_type:
+                continue
 
-                if not record.downloader_id or not record.info_hash:
-                    record.status = "deleted"
-                    continue
+            # H&R 种子跳过
+            if record.has_hr:
+                logger.debug(f"种子 [{record.torrent_id}] 是 H&R 种子，跳过非免费删除")
+                continue
 
-                dl_result = await db.execute(
-                    select(Downloader).where(Downloader.id == record.downloader_id)
-                )
-                dl_model = dl_result.scalar_one_or_none()
-                if not dl_model:
-                    continue
-
-                downloader = create_downloader(
-                    dl_model.type, host=dl_model.host, port=dl_model.port,
-                    username=dl_model.username, password=dl_model.password, use_ssl=dl_model.use_ssl,
-                )
-                await downloader.remove_torrent(record.info_hash, delete_files=True)
+            if not record.downloader_id or not record.info_hash:
                 record.status = "deleted"
-                logger.info(f"非免费删种: [{record.torrent_id}] {record.title[:40]}")
-
+                continue
+            groups.setdefault(record.downloader_id, []).append(record)
+
+        dl_models = {
+            d.id: d for d in (await db.execute(
+                select(Downloader).where(Downloader.id.in_(groups.keys()))
+            )).scalars()
+        }
+        for dl_id, group in groups.items():
+            dl_model = dl_models.get(dl_id)
+            if not dl_model:
+                continue
+            try:
+                done = await call_downloader(
+                    dl_model, lambda dl: _batch_torrent_action(dl, "remove", group),
+                )
+                for record in done:
+                    record.status = "deleted"
+                    logger.info(f"非免费删种: [{record.torrent_id}] {record.title[:40]}")
             except Exception as e:
-                logger.error(f"删除非免费种子 {record.torrent_id} 失败: {e}")
+                logger.error(f"删除下载器 {dl_id} 的 {len(group)} 个非免费种子失败: {e}")
 
         await db.commit()
 
@@ -757,7 +686,8 @@ async def check_dynamic_delete():
     """
     from database import async_session
     from models import DownloadHistory, Downloader, SystemSetting
-    from services.downloader import create_downloader
+    from services.downloader_health import call_downloader
+    from services.fanout import fan_out
 
     logger.info("开始检查动态容量删种")
 
@@ -781,16 +711,21 @@ async def check_dynamic_delete():
         max_bytes = disk_max_gb * (1024 ** 3)
         target_bytes = disk_target_gb * (1024 ** 3)
 
-        # 遍历所有下载器检查磁盘空间
+        # 并发获取所有下载器的已用空间（删种决策使用最新数据，不复用缓存）
         dl_result = await db.execute(select(Downloader))
-        for dl_model in dl_result.scalars().all():
+        results = await fan_out(
+            dl_result.scalars().all(),
+            lambda dl_model: call_downloader(dl_model, lambda dl: dl.get_used_space(max_age=0)),
+            timeout=0,  # 截止时间由 call_downloader 执行（计入熔断）
+            label=lambda dl_model: dl_model.name,
+        )
+        # 数据库会话不能并发使用，删种逐个下载器处理
+        for r in results:
+            if not r.ok:
+                continue
+            dl_model, used_bytes = r.target, r.value
             try:
-                downloader = create_downloader(
-                    dl_model.type, host=dl_model.host, port=dl_model.port,
-                    username=dl_model.username, password=dl_model.password, use_ssl=dl_model.use_ssl,
-                )
-                stats = await downloader.get_stats()
-                used_bytes = stats.total_size - stats.free_space
+                # 已用空间 = 下载器中种子体积合计（删种后按 record.size 递减估算）
 
                 if used_bytes < max_bytes:
                     continue
@@ -809,22 +744,49 @@ async def check_dynamic_delete():
                 )
                 candidates = hist_result.scalars().all()
 
+                # 按尚未释放的空间选出一批种子一次批量删除；只有确认删除成功的种子计入已释放空间，
+                # 部分失败时从后续候选中继续补选
                 freed = 0
-                for record in candidates:
-                    if used_bytes - freed <= target_bytes:
-                        break
-                    # H&R 种子绝不能因容量不足而删除
-                    if record.has_hr:
-                        logger.warning(f"种子 [{record.torrent_id}] 是 H&R 种子，跳过动态删种")
+                index = 0
+                while used_bytes - freed > target_bytes and index < len(candidates):
+                    planned = freed
+                    to_remove = []
+                    while index < len(candidates) and used_bytes - planned > target_bytes:
+                        record = candidates[index]
+                        index += 1
+                        # H&R 种子绝不能因容量不足而删除
+                        if record.has_hr:
+                            logger.warning(f"种子 [{record.torrent_id}] 是 H&R 种子，跳过动态删种")
+                            continue
+                        if record.info_hash:
+                            to_remove.append(record)
+                        else:
+                            # 没有 hash 的记录无法在下载器中删除，只更新状态
+                            record.status = "dynamic_deleted"
+                            freed += record.size
+                        planned += record.size
+                    if not to_remove:
                         continue
+
                     try:
-                        if record.info_hash:
-                            await downloader.remove_torrent(record.info_hash, delete_files=True)
+                        done = await call_downloader(
+                            dl_model, lambda dl: _batch_torrent_action(dl, "remove", to_remove),
+                        )
+                    except Exception as e:
+                        logger.error(f"动态删种失败（{len(to_remove)} 个种子）: {e}")
+                        break
+                    for record in done:
                         record.status = "dynamic_deleted"
                         freed += record.size
                         logger.info(f"动态删种: [{record.torrent_id}] {record.title[:40]}")
-                    except Exception as e:
-                        logger.error(f"动态删种失败 {record.torrent_id}: {e}")
+                    if len(done) < len(to_remove):
+                        logger.warning(f"动态删种: {len(to_remove) - len(done)} 个种子删除失败，继续补选")
+
+                if used_bytes - freed > target_bytes:
+                    logger.warning(
+                        f"下载器 [{dl_model.name}] 动态删种后预计仍占用 {(used_bytes - freed) / (1024**3):.1f}GB，"
+                        f"未降至目标 {disk_target_gb}GB"
+                    )
 
                 await db.commit()
 
@@ -841,7 +803,8 @@ async def check_unregistered_torrents():
     """
     from database import async_session
     from models import DownloadHistory, Downloader, SystemSetting
-    from services.downloader import create_downloader
+    from services.downloader_health import call_downloader
+    from services.downloader import TorrentFields
 
     logger.info("开始检查 unregistered 种子")
 
@@ -882,28 +845,31 @@ async def check_unregistered_torrents():
                 if not dl_model:
                     continue
 
-                downloader = create_downloader(
-                    dl_model.type, host=dl_model.host, port=dl_model.port,
-                    username=dl_model.username, password=dl_model.password, use_ssl=dl_model.use_ssl,
+                # 获取所有种子状态（熔断中的下载器直接跳过）
+                all_torrents = await call_downloader(
+                    dl_model, lambda dl: dl.get_all_torrents(fields=TorrentFields.TRACKER),
                 )
 
-                # 获取所有种子状态
-                all_torrents = await downloader.get_all_torrents()
-                hash_map = {t.info_hash.lower(): t for t in all_torrents}
-
+                unregistered = []
                 for record in records:
-                    torrent_status = hash_map.get(record.info_hash.lower())
+                    torrent_status = all_torrents.get(record.info_hash)
                     if not torrent_status:
                         continue
                     # 检查 tracker 消息是否包含 unregistered
-                    tracker_msg = getattr(torrent_status, "tracker_msg", "") or ""
+                    tracker_msg = torrent_status.tracker_msg or ""
                     if "unregistered" in tracker_msg.lower():
-                        try:
-                            await downloader.remove_torrent(record.info_hash, delete_files=True)
+                        unregistered.append(record)
+
+                if unregistered:
+                    try:
+                        done = await call_downloader(
+                            dl_model, lambda dl: _batch_torrent_action(dl, "remove", unregistered),
+                        )
+                        for record in done:
                             record.status = "unregistered_deleted"
                             logger.info(f"Unregistered 删种: [{record.torrent_id}] {record.title[:40]}")
-                        except Exception as e:
-                            logger.error(f"删除 unregistered 种子失败 {record.torrent_id}: {e}")
+                    except Exception as e:
+                        logger.error(f"删除 unregistered 种子失败（{len(unregistered)} 个）: {e}")
 
             except Exception as e:
                 logger.error(f"检查下载器 {dl_id} unregistered 失败: {e}")
@@ -920,7 +886,8 @@ async def collect_stats_snapshot():
     """
     from database import async_session
     from models import Account, Downloader, StatsSnapshot
-    from services.downloader import create_downloader
+    from services.downloader_health import call_downloader
+    from services.fanout import fan_out
 
     logger.info("开始采集统计快照")
 
@@ -933,17 +900,16 @@ async def collect_stats_snapshot():
         total_upload_speed = 0.0
         total_download_speed = 0.0
         dl_result = await db.execute(select(Downloader))
-        for dl_model in dl_result.scalars().all():
-            try:
-                dl = create_downloader(
-                    dl_model.type, host=dl_model.host, port=dl_model.port,
-                    username=dl_model.username, password=dl_model.password, use_ssl=dl_model.use_ssl,
-                )
-                stats = await dl.get_stats()
-                total_upload_speed += stats.upload_speed or 0
-                total_download_speed += stats.download_speed or 0
-            except Exception:
-                pass
+        results = await fan_out(
+            dl_result.scalars().all(),
+            lambda dl_model: call_downloader(dl_model, lambda dl: dl.get_stats()),
+            timeout=0,  # 截止时间由 call_downloader 执行（计入熔断）
+            label=lambda dl_model: dl_model.name,
+        )
+        for r in results:
+            if r.ok:
+                total_upload_speed += r.value.upload_speed or 0
+                total_download_speed += r.value.download_speed or 0
 
         # 为每个账号写入快照
         for acc in accounts:
@@ -4,23 +4,27 @@ NicePT 站点适配器（基于 NexusPHP）
 通过 HTML 页面解析实现所有站点交互。
 已根据 NicePT 实际页面结构调整解析器。
 """
-import re
 import asyncio
+import re
 import logging
-import time
 from datetime import datetime
-from typing import Optional
-from dataclasses import dataclass
+from typing import AsyncContextManager, AsyncIterator, Callable, Optional
+from dataclasses import dataclass, replace
 
 import httpx
 from bs4 import BeautifulSoup, Tag
 
 from config import settings
+from services.parse_pool import run_parse
+from services.rate_limiter import RequestPriority, get_rate_limiter
+from services.listing_cache import listing_cache
+from services.site_client_pool import account_key, site_client_pool
+from services.torrent_cache import torrent_cache
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class TorrentInfo:
     """种子信息"""
     id: str = ""
@@ -67,6 +71,11 @@ class SearchParams:
     incldead: int = 0  # 0=活种, 1=全部, 2=断种
     page: int = 0
 
+    def query_key(self) -> str:
+        """规范化的查询标识（不含页码），用于增量扫描水位等按查询归类的场景"""
+        return (f"search={self.keyword.strip().lower()}&cat={self.category}"
+                f"&spstate={self.spstate}&incldead={self.incldead}")
+
 
 @dataclass
 class HRRecord:
@@ -87,53 +96,44 @@ class HRRecord:
 class NexusPHPAdapter:
     """NicePT 站点适配器"""
 
-    def __init__(self, site_url: str, cookie: str):
+    def __init__(self, site_url: str, cookie: str,
+                 priority: RequestPriority = RequestPriority.INTERACTIVE):
         self.site_url = site_url.rstrip("/")
         self.cookie = cookie
-        self._client: Optional[httpx.AsyncClient] = None
-        self._last_request_time: float = 0
-
-    async def _get_client(self) -> httpx.AsyncClient:
-        if self._client is None or self._client.is_closed:
-            self._client = httpx.AsyncClient(
-                timeout=settings.request_timeout,
-                headers={
-                    "User-Agent": settings.user_agent,
-                    "Cookie": self.cookie,
-                    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-                },
-                follow_redirects=True,
-                verify=False,
-            )
-        return self._client
+        # 限流排队优先级：前端请求默认最高，定时任务 / 批量同步需显式降级
+        self.priority = priority
+
+    def _lease_client(self) -> AsyncContextManager[httpx.AsyncClient]:
+        """从进程级连接池租用本账号的客户端（keep-alive 复用，租用期间不会被回收）"""
+        return site_client_pool.lease(self.site_url, self.cookie)
 
     async def _rate_limit(self):
-        now = time.time()
-        elapsed = now - self._last_request_time
-        if elapsed < settings.request_delay:
-            await asyncio.sleep(settings.request_delay - elapsed)
-        self._last_request_time = time.time()
+        """按账号共享的令牌桶限流（跨所有适配器实例生效）"""
+        await get_rate_limiter(self.site_url, self.cookie).acquire(self.priority)
 
-    async def _get_page(self, path: str, params: dict = None) -> BeautifulSoup:
+    async def _fetch_html(self, path: str, params: dict = None) -> str:
         await self._rate_limit()
-        client = await self._get_client()
         url = f"{self.site_url}/{path}"
         logger.info(f"请求页面: {url}")
-        response = await client.get(url, params=params)
+        async with self._lease_client() as client:
+            response = await client.get(url, params=params)
         response.raise_for_status()
         if "login.php" in str(response.url) and "takelogin" not in str(response.url):
             raise Exception("Cookie 已失效，请重新登录")
-        return BeautifulSoup(response.text, "lxml")
+        return response.text
 
     async def close(self):
-        if self._client and not self._client.is_closed:
-            await self._client.aclose()
+        """客户端由连接池统一管理，这里不关闭连接，仅保留调用兼容"""
+        pass
 
     # ---- 用户相关 ----
 
     async def get_user_stats(self, uid: str) -> UserStats:
         """获取用户统计信息"""
-        soup = await self._get_page("userdetails.php", {"id": uid})
+        html = await self._fetch_html("userdetails.php", {"id": uid})
+        return await run_parse(parse_user_stats_page, html, uid)
+
+    def _parse_user_stats(self, soup: BeautifulSoup, uid: str) -> UserStats:
         stats = UserStats(uid=uid)
 
         for td in soup.find_all("td", class_="rowhead"):
@@ -163,7 +163,10 @@ class NexusPHPAdapter:
 
     async def get_passkey(self) -> str:
         """从 usercp.php 获取 passkey"""
-        soup = await self._get_page("usercp.php")
+        html = await self._fetch_html("usercp.php")
+        return await run_parse(parse_passkey_page, html)
+
+    def _parse_passkey(self, soup: BeautifulSoup) -> str:
         for td in soup.find_all("td", class_="rowhead"):
             text = td.get_text(strip=True).lower()
             if "passkey" in text or "密鑰" in text or "密钥" in text:
@@ -182,7 +185,10 @@ class NexusPHPAdapter:
 
     async def get_uid_from_index(self) -> str:
         """从首页提取当前用户 UID"""
-        soup = await self._get_page("index.php")
+        html = await self._fetch_html("index.php")
+        return await run_parse(parse_uid_page, html)
+
+    def _parse_uid(self, soup: BeautifulSoup) -> str:
         link = soup.find("a", href=re.compile(r"userdetails\.php\?id=\d+"))
         if link:
             match = re.search(r"id=(\d+)", link.get("href", ""))
@@ -192,7 +198,18 @@ class NexusPHPAdapter:
 
     # ---- 种子搜索 ----
 
-    async def search_torrents(self, params: SearchParams) -> list[TorrentInfo]:
+    async def search_torrents(self, params: SearchParams, refresh: bool = False) -> list[TorrentInfo]:
+        """
+        搜索种子（单页）。
+        同一账号 + 查询 + 页码的结果短时间内走缓存，并发的相同请求合并为一次；
+        refresh=True 时绕过缓存强制重新请求。
+        """
+        key = (account_key(self.site_url, self.cookie), params.query_key(), params.page)
+        return await listing_cache.get_or_fetch(
+            key, lambda: self._fetch_torrent_page(params), bypass=refresh, priority=self.priority,
+        )
+
+    async def _fetch_torrent_page(self, params: SearchParams) -> list[TorrentInfo]:
         query = {}
         if params.keyword:
             query["search"] = params.keyword
@@ -204,8 +221,85 @@ class NexusPHPAdapter:
             query["incldead"] = params.incldead
         if params.page:
             query["page"] = params.page
-        soup = await self._get_page("torrents.php", query)
-        return self._parse_torrent_list(soup)
+        html = await self._fetch_html("torrents.php", query)
+        return await self._parse_listing(html)
+
+    async def iter_search_torrents(
+        self,
+        params: SearchParams,
+        max_pages: int = 5,
+        stop: Optional[Callable[[TorrentInfo], bool]] = None,
+    ) -> AsyncIterator[TorrentInfo]:
+        """
+        从 params.page 开始逐页搜索，逐个产出种子（按需翻页）。
+
+        - 调用方可随时 break（如下载名额已满），后续页面不会再请求
+        - stop(torrent) 返回 True 时该种子不产出，且本页结束后不再翻页
+          （列表顶部可能有置顶的旧种子，所以本页其余种子仍照常产出）
+        - 某页为空或全部是前面页已出现过的种子时停止
+        """
+        async for _, torrent in self.iter_search_merged([params], max_pages, [stop]):
+            yield torrent
+
+    async def iter_search_merged(
+        self,
+        queries: list[SearchParams],
+        max_pages: int = 5,
+        stops: Optional[list[Optional[Callable[[TorrentInfo], bool]]]] = None,
+        on_error: Optional[Callable[[int, Exception], None]] = None,
+    ) -> AsyncIterator[tuple[int, TorrentInfo]]:
+        """
+        多个查询合并搜索（如一条规则的多个关键字），逐个产出 (查询序号, 种子)。
+
+        每一轮并发请求各查询的下一页（请求仍经过账号限流器，并发只让等待相互重叠），
+        按种子 ID 去重后依次产出；各查询的翻页和停止条件与 iter_search_torrents 相同，
+        stops[i] 对应 queries[i]。
+        某个查询的页面请求失败时：未提供 on_error 则抛出异常；
+        提供时调用 on_error(查询序号, 异常)，只停止该查询的翻页，其他查询照常继续。
+        """
+        stops = stops or [None] * len(queries)
+        seen_ids: list[set[str]] = [set() for _ in queries]
+        yielded: set[str] = set()
+        pages = [params.page for params in queries]
+        active = list(range(len(queries)))
+        for _ in range(max(1, max_pages)):
+            if not active:
+                return
+            results = await asyncio.gather(
+                *(self.search_torrents(replace(queries[i], page=pages[i])) for i in active),
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, BaseException) and not isinstance(result, Exception):
+                    raise result
+            next_active = []
+            for i, torrents in zip(active, results):
+                if isinstance(torrents, Exception):
+                    if on_error is None:
+                        raise torrents
+                    on_error(i, torrents)
+                    continue
+                fresh = [t for t in torrents if t.id not in seen_ids[i]]
+                if not fresh:
+                    continue
+                reached_stop = False
+                for torrent in fresh:
+                    seen_ids[i].add(torrent.id)
+                    if stops[i] and stops[i](torrent):
+                        reached_stop = True
+                        continue
+                    if torrent.id in yielded:
+                        continue
+                    yielded.add(torrent.id)
+                    yield i, torrent
+                if not reached_stop:
+                    pages[i] += 1
+                    next_active.append(i)
+            active = next_active
+
+    async def _parse_listing(self, html: str) -> list[TorrentInfo]:
+        """按配置选择列表解析后端：bs4（默认）或 lxml 快速路径"""
+        return await run_parse(parse_listing_page, html, self.site_url, settings.site_parser)
 
     def _parse_torrent_list(self, soup: BeautifulSoup) -> list[TorrentInfo]:
         torrents = []
@@ -329,7 +423,10 @@ class NexusPHPAdapter:
     # ---- 种子详情 ----
 
     async def get_torrent_detail(self, torrent_id: str) -> TorrentInfo:
-        soup = await self._get_page("details.php", {"id": torrent_id})
+        html = await self._fetch_html("details.php", {"id": torrent_id})
+        return await run_parse(parse_torrent_detail_page, html, self.site_url, torrent_id)
+
+    def _parse_torrent_detail(self, soup: BeautifulSoup, torrent_id: str) -> TorrentInfo:
         torrent = TorrentInfo(
             id=torrent_id,
             detail_url=f"{self.site_url}/details.php?id={torrent_id}",
@@ -354,22 +451,30 @@ class NexusPHPAdapter:
     # ---- 下载种子文件 ----
 
     async def download_torrent(self, torrent_id: str, passkey: str = "") -> bytes:
+        # 种子文件内含账号 passkey：缓存按账号隔离（有 passkey 用 passkey，否则用 cookie）
+        account_secret = passkey or self.cookie
+        cached = await torrent_cache.get(self.site_url, account_secret, torrent_id)
+        if cached is not None:
+            logger.debug(f"种子 {torrent_id} 命中本地缓存")
+            return cached
+
         await self._rate_limit()
-        client = await self._get_client()
         params = {"id": torrent_id}
         if passkey:
             params["passkey"] = passkey
-        response = await client.get(f"{self.site_url}/download.php", params=params)
+        async with self._lease_client() as client:
+            response = await client.get(f"{self.site_url}/download.php", params=params)
         response.raise_for_status()
         if "text/html" in response.headers.get("content-type", ""):
             raise Exception("下载失败，可能是权限不足或种子不存在")
+        await torrent_cache.put(self.site_url, account_secret, torrent_id, response.content)
         return response.content
 
     # ---- 收藏 ----
 
     async def get_bookmarks(self) -> list[TorrentInfo]:
-        soup = await self._get_page("bookmarks.php")
-        return self._parse_torrent_list(soup)
+        html = await self._fetch_html("bookmarks.php")
+        return await self._parse_listing(html)
 
     # ---- 解析辅助 ----
 
@@ -458,7 +563,10 @@ class NexusPHPAdapter:
         获取 H&R 考核列表。
         status: 1=考核中, 2=已达标, 3=未达标, 4=已豁免
         """
-        soup = await self._get_page("myhr.php", {"status": status})
+        html = await self._fetch_html("myhr.php", {"status": status})
+        return await run_parse(parse_hr_page, html, status)
+
+    def _parse_hr_list(self, soup: BeautifulSoup, status: int) -> list[HRRecord]:
         records = []
         table = soup.find("table", id="hr-table")
         if not table:
@@ -540,13 +648,13 @@ class NexusPHPAdapter:
         通过 POST ajax.php 调用，模拟页面上的"消除"按钮。
         """
         await self._rate_limit()
-        client = await self._get_client()
         url = f"{self.site_url}/ajax.php"
         try:
-            response = await client.post(url, data={
-                "action": "removeHitAndRun",
-                "params[id]": str(hr_id),
-            })
+            async with self._lease_client() as client:
+                response = await client.post(url, data={
+                    "action": "removeHitAndRun",
+                    "params[id]": str(hr_id),
+                })
             data = response.json()
             if data.get("ret") == 0:
                 logger.info(f"H&R {hr_id} 消除成功")
@@ -558,3 +666,39 @@ class NexusPHPAdapter:
         except Exception as e:
             logger.error(f"H&R {hr_id} 消除请求失败: {e}")
             return {"success": False, "message": str(e)}
+
+
+# ---- 页面解析入口 ----
+# 以下均为模块级纯函数：输入 HTML 文本，输出纯数据 dataclass，
+# 由 services.parse_pool 放到线程 / 进程池执行，不阻塞事件循环。
+
+def _parser(site_url: str = "") -> NexusPHPAdapter:
+    """仅用于解析的适配器实例（不发起网络请求）"""
+    return NexusPHPAdapter(site_url, "")
+
+
+def parse_listing_page(html: str, site_url: str, backend: str = "bs4") -> list[TorrentInfo]:
+    if backend == "lxml":
+        from services.torrent_list_lxml import parse_torrent_list
+        return parse_torrent_list(html, site_url)
+    return _parser(site_url)._parse_torrent_list(BeautifulSoup(html, "lxml"))
+
+
+def parse_torrent_detail_page(html: str, site_url: str, torrent_id: str) -> TorrentInfo:
+    return _parser(site_url)._parse_torrent_detail(BeautifulSoup(html, "lxml"), torrent_id)
+
+
+def parse_user_stats_page(html: str, uid: str) -> UserStats:
+    return _parser()._parse_user_stats(BeautifulSoup(html, "lxml"), uid)
+
+
+def parse_passkey_page(html: str) -> str:
+    return _parser()._parse_passkey(BeautifulSoup(html, "lxml"))
+
+
+def parse_uid_page(html: str) -> str:
+    return _parser()._parse_uid(BeautifulSoup(html, "lxml"))
+
+
+def parse_hr_page(html: str, status: int) -> list[HRRecord]:
+    return _parser()._parse_hr_list(BeautifulSoup(html, "lxml"), status)
@@ -0,0 +1,141 @@
+"""
+站点 HTTP 客户端连接池
+
+按账号（站点地址 + Cookie）复用 httpx.AsyncClient，
+避免每次请求都重新建立 TCP + TLS 连接。
+闲置超时的客户端会被定期回收（仍有请求在用的跳过），应用关闭时统一释放。
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+import httpx
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  # httpx 的 HTTP/2 支持依赖 h2
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+
+@dataclass
+class _PooledClient:
+    """连接池中的客户端"""
+    client: httpx.AsyncClient
+    last_used: float
+    # 正在使用该客户端的请求数（租用计数），大于 0 时不会被回收
+    in_use: int = 0
+
+
+def account_key(site_url: str, cookie: str) -> str:
+    """账号标识：站点地址 + Cookie 摘要（不直接保存 Cookie 明文）"""
+    digest = hashlib.sha256(cookie.encode("utf-8")).hexdigest()[:16]
+    return f"{site_url.rstrip('/')}#{digest}"
+
+
+class SiteClientPool:
+    """按账号维护的 httpx 客户端注册表"""
+
+    def __init__(self):
+        self._clients: dict[str, _PooledClient] = {}
+        self._lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def lease(self, site_url: str, cookie: str) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        租用账号对应的客户端（不存在或已关闭时新建）。
+
+        租用期间计入 in_use，evict_idle 不会关闭它；
+        请求（包括读取响应体）必须在 async with 块内完成。
+        """
+        key = account_key(site_url, cookie)
+        async with self._lock:
+            pooled = self._clients.get(key)
+            if pooled is None or pooled.client.is_closed:
+                pooled = _PooledClient(client=self._create_client(cookie), last_used=time.monotonic())
+                self._clients[key] = pooled
+                logger.debug(f"新建站点客户端: {key}")
+            pooled.in_use += 1
+            pooled.last_used = time.monotonic()
+        try:
+            yield pooled.client
+        finally:
+            pooled.in_use -= 1
+            pooled.last_used = time.monotonic()
+
+    @staticmethod
+    def _create_client(cookie: str) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=settings.request_timeout,
+            headers={
+                "User-Agent": settings.user_agent,
+                "Cookie": cookie,
+                "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+            },
+            limits=httpx.Limits(
+                max_connections=settings.site_max_connections,
+                max_keepalive_connections=settings.site_max_connections,
+                keepalive_expiry=settings.site_keepalive_expiry,
+            ),
+            http2=settings.site_http2 and _HTTP2_AVAILABLE,
+            follow_redirects=True,
+            verify=False,
+        )
+
+    async def evict_idle(self, max_idle: float = None) -> int:
+        """回收闲置超时且没有请求在用的客户端，返回回收数量"""
+        if max_idle is None:
+            max_idle = settings.site_client_idle_ttl
+        now = time.monotonic()
+        async with self._lock:
+            expired = [
+                k for k, p in self._clients.items()
+                if p.in_use == 0 and now - p.last_used > max_idle
+            ]
+            clients = [self._clients.pop(k).client for k in expired]
+        for client in clients:
+            await client.aclose()
+        if clients:
+            logger.info(f"已回收 {len(clients)} 个闲置站点客户端")
+        return len(clients)
+
+    async def close_all(self):
+        """关闭所有客户端"""
+        async with self._lock:
+            clients = [p.client for p in self._clients.values()]
+            self._clients.clear()
+        for client in clients:
+            await client.aclose()
+        logger.info("站点客户端连接池已关闭")
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "http2": settings.site_http2 and _HTTP2_AVAILABLE,
+            "clients": [
+                {"account": k, "in_use": p.in_use, "idle_seconds": round(now - p.last_used, 1)}
+                for k, p in self._clients.items()
+            ],
+        }
+
+
+# 进程级单例
+site_client_pool = SiteClientPool()
+
+
+async def evict_idle_site_clients():
+    """定时任务：回收闲置的站点客户端"""
+    await site_client_pool.evict_idle()
+
+
+async def close_site_clients():
+    """应用关闭时释放所有站点连接"""
+    await site_client_pool.close_all()
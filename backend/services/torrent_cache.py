@@ -0,0 +1,288 @@
+"""
+.torrent 文件磁盘缓存
+
+按（站点, 账号, 种子 ID）缓存 download.php 下载到的种子文件，
+失败重试、推送到其他下载器时不再消耗站点请求和限流额度。
+
+- 内容寻址：文件以内容 SHA-256 命名，相同内容只存一份
+- info_hash 索引：可按 info_hash 取回种子文件
+- 容量上限：超过 torrent_cache_max_mb 时按最近使用时间（LRU）淘汰
+- passkey 安全：种子文件内含账号 passkey，缓存键只使用站点 + passkey 的摘要，
+  不同账号互不复用；目录和文件权限仅限当前用户读写
+- 磁盘读写都在线程中执行，不阻塞事件循环；索引变更（含读取时更新的最近使用时间）
+  延迟 _SAVE_DELAY 秒合并写盘，关闭时 flush()
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import Counter, OrderedDict
+from typing import Optional
+
+from config import settings
+from services.bencode import BencodeError, parse_torrent
+
+logger = logging.getLogger(__name__)
+
+_INDEX_FILE = "index.json"
+
+# 索引变更后延迟多少秒写盘（期间的多次变更合并为一次写入）
+_SAVE_DELAY = 5.0
+
+
+def _atomic_write(path: str, data: bytes):
+    """写入临时文件（权限 0600）后原子替换"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class TorrentFileCache:
+    """内容寻址的种子文件缓存"""
+
+    def __init__(self, root: str = None):
+        self._root = root
+        # 缓存键 -> 条目，按最近使用时间从旧到新排列（淘汰从头部取，O(1)）
+        self._index: Optional[OrderedDict[str, dict]] = None
+        self._by_hash: dict[str, str] = {}   # info_hash -> 缓存键
+        self._refs: Counter = Counter()      # 内容摘要 -> 引用它的条目数
+        self._sizes: dict[str, int] = {}     # 内容摘要 -> 字节数
+        self._total = 0                      # 磁盘上缓存内容的总字节数
+        self._load_lock = asyncio.Lock()
+        self._dirty = False
+        self._save_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def root(self) -> str:
+        return self._root or settings.torrent_cache_dir
+
+    @property
+    def enabled(self) -> bool:
+        return settings.torrent_cache_max_mb > 0
+
+    @staticmethod
+    def cache_key(site_url: str, account_secret: str, torrent_id: str) -> str:
+        """缓存键：站点 + 账号凭据的摘要 + 种子 ID（不包含 passkey 明文）"""
+        digest = hashlib.sha256(f"{site_url.rstrip('/')}|{account_secret}".encode("utf-8")).hexdigest()[:16]
+        return f"{digest}:{torrent_id}"
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.torrent")
+
+    # ---- 索引 ----
+
+    def _read_index(self) -> list[tuple[str, dict]]:
+        """（线程中执行）读取索引文件，丢弃文件已不存在的条目，按最近使用时间排序"""
+        os.makedirs(self.root, mode=0o700, exist_ok=True)
+        os.chmod(self.root, 0o700)
+        try:
+            with open(os.path.join(self.root, _INDEX_FILE), "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        entries = [(k, e) for k, e in index.items() if os.path.exists(self._path(e["digest"]))]
+        entries.sort(key=lambda item: item[1].get("last_used", 0))
+        return entries
+
+    async def _ensure_loaded(self):
+        if self._index is not None:
+            return
+        async with self._load_lock:
+            if self._index is not None:
+                return
+            entries = await asyncio.to_thread(self._read_index)
+            self._index = OrderedDict()
+            for key, entry in entries:
+                self._link(key, entry)
+
+    def _link(self, key: str, entry: dict):
+        """加入条目（放在最近使用一端），更新引用计数和总字节数"""
+        self._index[key] = entry
+        digest = entry["digest"]
+        if not self._refs[digest]:
+            self._sizes[digest] = entry["size"]
+            self._total += entry["size"]
+        self._refs[digest] += 1
+        if entry.get("info_hash"):
+            self._by_hash[entry["info_hash"]] = key
+
+    def _unlink(self, key: str) -> Optional[str]:
+        """移除条目；返回已没有条目引用、需要删除文件的内容摘要"""
+        entry = self._index.pop(key, None)
+        if not entry:
+            return None
+        if self._by_hash.get(entry.get("info_hash")) == key:
+            del self._by_hash[entry["info_hash"]]
+        digest = entry["digest"]
+        self._refs[digest] -= 1
+        if self._refs[digest] > 0:
+            return None
+        del self._refs[digest]
+        self._total -= self._sizes.pop(digest, 0)
+        return digest
+
+    def _mark_dirty(self):
+        self._dirty = True
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.get_running_loop().create_task(self._save_later())
+
+    async def _save_later(self):
+        await asyncio.sleep(_SAVE_DELAY)
+        await self.flush()
+
+    def _write_index(self, snapshot: dict):
+        _atomic_write(os.path.join(self.root, _INDEX_FILE), json.dumps(snapshot).encode("utf-8"))
+
+    async def flush(self):
+        """把有变更的索引写盘（关闭应用时调用）"""
+        task = self._save_task
+        if task and task is not asyncio.current_task() and not task.done():
+            task.cancel()
+        if not self._dirty or self._index is None:
+            return
+        self._dirty = False
+        snapshot = {key: dict(entry) for key, entry in self._index.items()}
+        try:
+            await asyncio.to_thread(self._write_index, snapshot)
+        except OSError as e:
+            self._dirty = True
+            logger.warning(f"种子文件缓存索引写入失败: {e}")
+
+    # ---- 读写 ----
+
+    async def _read(self, key: str) -> Optional[bytes]:
+        await self._ensure_loaded()
+        entry = self._index.get(key)
+        if not entry:
+            return None
+        try:
+            data = await asyncio.to_thread(_read_file, self._path(entry["digest"]))
+        except OSError:
+            # 文件已被外部删除
+            self._unlink(key)
+            self._mark_dirty()
+            return None
+        if key in self._index:
+            entry["last_used"] = time.time()
+            self._index.move_to_end(key)
+            self._mark_dirty()
+        return data
+
+    async def get(self, site_url: str, account_secret: str, torrent_id: str) -> Optional[bytes]:
+        """按站点 + 账号 + 种子 ID 读取缓存"""
+        if not self.enabled:
+            return None
+        data = await self._read(self.cache_key(site_url, account_secret, torrent_id))
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    async def get_by_info_hash(self, info_hash: str) -> Optional[bytes]:
+        """按 info_hash 读取缓存"""
+        if not self.enabled:
+            return None
+        await self._ensure_loaded()
+        key = self._by_hash.get(info_hash.lower())
+        return await self._read(key) if key else None
+
+    def _write_content(self, digest: str, data: bytes):
+        """（线程中执行）写入内容文件，已存在时跳过"""
+        path = self._path(digest)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        _atomic_write(path, data)
+
+    def _remove_contents(self, digests: list[str]):
+        """（线程中执行）删除不再被引用的内容文件"""
+        for digest in digests:
+            try:
+                os.remove(self._path(digest))
+            except OSError:
+                pass
+
+    async def put(self, site_url: str, account_secret: str, torrent_id: str, data: bytes) -> str:
+        """写入缓存，返回种子的 info_hash（无法解析时为空字符串）"""
+        try:
+            info_hash = parse_torrent(data).hash_id
+        except BencodeError as e:
+            logger.warning(f"种子 {torrent_id} 不是有效的 .torrent 文件，不缓存: {e}")
+            return ""
+        if not self.enabled:
+            return info_hash
+
+        await self._ensure_loaded()
+        digest = hashlib.sha256(data).hexdigest()
+        if digest not in self._refs:
+            await asyncio.to_thread(self._write_content, digest, data)
+
+        key = self.cache_key(site_url, account_secret, torrent_id)
+        orphans = []
+        old = self._index.get(key)
+        if old and old["digest"] == digest:
+            old["last_used"] = time.time()
+            self._index.move_to_end(key)
+        else:
+            orphans.append(self._unlink(key))
+            self._link(key, {
+                "digest": digest,
+                "size": len(data),
+                "info_hash": info_hash,
+                "last_used": time.time(),
+            })
+        orphans.extend(self._evict())
+        orphans = [d for d in orphans if d and d not in self._refs]
+        if orphans:
+            await asyncio.to_thread(self._remove_contents, orphans)
+        self._mark_dirty()
+        return info_hash
+
+    # ---- 淘汰 ----
+
+    def _evict(self) -> list[str]:
+        """从最久未使用的一端淘汰，直到总大小不超过上限；返回需要删除的内容摘要"""
+        max_bytes = settings.torrent_cache_max_mb * 1024 * 1024
+        orphans = []
+        while self._total > max_bytes and self._index:
+            digest = self._unlink(next(iter(self._index)))
+            self.evictions += 1
+            if digest:
+                orphans.append(digest)
+        return orphans
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "loaded": self._index is not None,
+            "entries": len(self._index or ()),
+            "size_bytes": self._total,
+            "max_bytes": settings.torrent_cache_max_mb * 1024 * 1024,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# 进程级单例
+torrent_cache = TorrentFileCache()
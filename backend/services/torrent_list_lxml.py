@@ -0,0 +1,225 @@
+"""
+种子列表 lxml 快速解析器
+
+直接在 lxml 树上用预编译 XPath 和正则解析 torrents.php / bookmarks.php 列表，
+输出与 NexusPHPAdapter._parse_torrent_list（BeautifulSoup 实现）完全一致的 TorrentInfo。
+通过配置 SITE_PARSER=lxml 启用。
+"""
+import logging
+import re
+from typing import Optional
+
+import lxml.html
+from lxml import etree
+
+from services.site_adapter import NexusPHPAdapter, TorrentInfo
+
+logger = logging.getLogger(__name__)
+
+
+def _has_class(name: str) -> str:
+    """XPath 条件：class 属性中包含完整的 name 词（等价于 BS4 的 class_=name）"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_XP_TABLE = etree.XPath(f"//table[{_has_class('torrents')}]")
+_XP_ROWS = etree.XPath(".//tr")
+_XP_TOP_TDS = etree.XPath("./td")
+_XP_LINKS = etree.XPath(".//a[@href]")
+_XP_FIRST_IMG = etree.XPath("(.//img)[1]")
+_XP_HR = etree.XPath(f"boolean(.//img[{_has_class('hitandrun')}])")
+_XP_PROMO = etree.XPath(".//*[contains(@class, 'pro_')]")
+_XP_FONT_FREE = etree.XPath(f"boolean(.//font[{_has_class('free')}])")
+_XP_THUMB = etree.XPath(f"(.//img[{_has_class('nexus-lazy-load')}])[1]")
+_XP_BRS = etree.XPath(".//br")
+_XP_TITLED_SPANS = etree.XPath(".//span[@title]")
+_XP_DIVS = etree.XPath(".//div")
+_XP_TEXT = etree.XPath(".//text()")
+
+# 与 NexusPHPAdapter._parse_discount 的顺序保持一致
+_PROMO_XPATHS = [
+    (etree.XPath(f"boolean(.//*[{_has_class(cls_name)}])"), discount)
+    for cls_name, discount in (
+        ("pro_free2up", "twoupfree"),
+        ("pro_free", "free"),
+        ("pro_2up", "twoup"),
+        ("pro_50pctdown", "halfdown"),
+        ("pro_30pctdown", "thirtypercent"),
+        ("pro_custom", "custom"),
+    )
+]
+
+_RE_DETAILS = re.compile(r"details\.php\?id=\d+")
+_RE_ID = re.compile(r"id=(\d+)")
+_RE_CAT = re.compile(r"\?cat=\d+")
+_RE_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_RE_PROGRESS = re.compile(r"(\w+)\s+([\d.]+)%?")
+_RE_WIDTH = re.compile(r"width:\s*([\d.]+)")
+_RE_COLOR = re.compile(r"background-color:\s*(\w+)")
+
+# BS4 的 get_text() 不包含这些标签内的字符串
+_NON_TEXT_TAGS = frozenset(("script", "style", "template"))
+
+
+def _text(el) -> str:
+    """等价于 BS4 的 get_text(strip=True)"""
+    parts = []
+    for s in _XP_TEXT(el):
+        if not s.is_tail and s.getparent().tag in _NON_TEXT_TAGS:
+            continue
+        s = s.strip()
+        if s:
+            parts.append(s)
+    return "".join(parts)
+
+
+def _find_link(row, pattern: re.Pattern):
+    for a in _XP_LINKS(row):
+        if pattern.search(a.get("href", "")):
+            return a
+    return None
+
+
+def _embedded_td(el):
+    """等价于 BS4 的 find_parent("td", class_="embedded")"""
+    parent = el.getparent()
+    while parent is not None:
+        if parent.tag == "td" and "embedded" in (parent.get("class") or "").split():
+            return parent
+        parent = parent.getparent()
+    return None
+
+
+def _br_next_text(br) -> str:
+    """<br/> 后的第一个兄弟节点文本（与 BS4 实现保持相同语义）"""
+    if br.tail:
+        return br.tail.strip()
+    nxt = br.getnext()
+    if nxt is None:
+        return ""
+    if not isinstance(nxt.tag, str):
+        # 注释节点：BS4 中为 Comment 字符串
+        return (nxt.text or "").strip()
+    return lxml.html.tostring(nxt, encoding="unicode", with_tail=False).strip()
+
+
+def _parse_discount(row) -> str:
+    for xp, discount in _PROMO_XPATHS:
+        if xp(row):
+            return discount
+    if _XP_FONT_FREE(row):
+        return "free"
+    return ""
+
+
+def _parse_row(row, site_url: str) -> Optional[TorrentInfo]:
+    top_tds = _XP_TOP_TDS(row)
+    if len(top_tds) < 9:
+        return None
+
+    title_link = _find_link(row, _RE_DETAILS)
+    if title_link is None:
+        return None
+    match = _RE_ID.search(title_link.get("href", ""))
+    if not match:
+        return None
+
+    torrent = TorrentInfo()
+    torrent.id = match.group(1)
+    torrent.title = title_link.get("title", "") or _text(title_link)
+    torrent.detail_url = f"{site_url}/details.php?id={torrent.id}"
+    torrent.download_url = f"{site_url}/download.php?id={torrent.id}"
+
+    # 副标题（<br/> 后面的文本）
+    title_td = _embedded_td(title_link)
+    if title_td is not None:
+        for br in _XP_BRS(title_td):
+            text = _br_next_text(br)
+            if text and len(text) > 1:
+                torrent.subtitle = text
+                break
+
+    # 分类
+    cat_link = _find_link(row, _RE_CAT)
+    if cat_link is not None:
+        cat_imgs = _XP_FIRST_IMG(cat_link)
+        if cat_imgs:
+            torrent.category = cat_imgs[0].get("alt", "") or cat_imgs[0].get("title", "")
+
+    # 促销 / H&R
+    torrent.discount_type = _parse_discount(row)
+    torrent.has_hr = _XP_HR(row)
+    torrent.is_free = torrent.discount_type in ("free", "twoupfree")
+
+    # 促销截止时间
+    if title_td is not None and _XP_PROMO(row):
+        for span in _XP_TITLED_SPANS(title_td):
+            span_title = span.get("title", "")
+            if _RE_DATE.match(span_title):
+                torrent.discount_end_time = span_title
+                break
+
+    # 下载状态（进度条 div）
+    if title_td is not None:
+        for div in _XP_DIVS(title_td):
+            div_title = div.get("title", "")
+            div_style = div.get("style", "")
+            if "background-color" in div_style and "height" in div_style:
+                m = _RE_PROGRESS.match(div_title)
+                if m:
+                    torrent.download_status = m.group(1)
+                    torrent.download_progress = float(m.group(2))
+                else:
+                    w = _RE_WIDTH.search(div_style)
+                    c = _RE_COLOR.search(div_style)
+                    if w:
+                        torrent.download_progress = float(w.group(1))
+                    if c:
+                        color = c.group(1).lower()
+                        if color == "green":
+                            torrent.download_status = "seeding"
+                        elif color in ("red", "orange"):
+                            torrent.download_status = "downloading"
+                break
+
+    # 缩略图
+    thumbs = _XP_THUMB(row)
+    if thumbs:
+        torrent.thumbnail = thumbs[0].get("data-src", "") or thumbs[0].get("src", "")
+
+    # 数值列
+    torrent.size = NexusPHPAdapter._parse_size_text(_text(top_tds[4]))
+    torrent.seeders = NexusPHPAdapter._parse_int(_text(top_tds[5]))
+    torrent.leechers = NexusPHPAdapter._parse_int(_text(top_tds[6]))
+    torrent.completions = NexusPHPAdapter._parse_int(_text(top_tds[7]))
+    torrent.uploader = _text(top_tds[8])
+
+    return torrent
+
+
+def parse_torrent_list(html: str, site_url: str) -> list[TorrentInfo]:
+    """解析种子列表页面"""
+    torrents = []
+    if not html or not html.strip():
+        logger.warning("未找到种子列表表格")
+        return torrents
+    try:
+        doc = lxml.html.document_fromstring(html)
+    except ValueError:
+        # 带 XML 编码声明的 str 不能直接解析
+        doc = lxml.html.document_fromstring(html.encode("utf-8"))
+    tables = _XP_TABLE(doc)
+    if not tables:
+        logger.warning("未找到种子列表表格")
+        return torrents
+    seen_ids = set()
+    for row in _XP_ROWS(tables[0])[1:]:
+        try:
+            torrent = _parse_row(row, site_url)
+            if torrent and torrent.id not in seen_ids:
+                torrents.append(torrent)
+                seen_ids.add(torrent.id)
+        except Exception as e:
+            logger.debug(f"解析种子行失败: {e}")
+    logger.info(f"解析到 {len(torrents)} 个种子")
+    return torrents
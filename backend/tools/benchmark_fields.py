@@ -0,0 +1,130 @@
+"""
+种子查询字段配置（TorrentFields）对比
+
+用进程内下载器模拟器，对同一批种子分别以 STATE / TRACKER / FULL 三种字段配置全量查询一次，
+报告每种配置的请求数、响应体积、耗时和内存峰值（tracemalloc），并以模拟器中实际标记为
+unregistered 的种子为对照检查识别结果：
+- TRACKER 识别出的 unregistered 种子必须与对照完全一致（两种下载器）
+- Transmission 的 FULL 也必须一致；qBittorrent 的 FULL 不查询 tracker 消息，不参与比较
+对照集为空（--unregistered 0）或结果不一致时以非零状态退出。
+
+每次查询都使用新建的适配器，qBittorrent 的 maindata 镜像也从全量同步开始。
+qBittorrent 三种配置共用同一份 maindata，STATE / FULL 的差别只在转换开销；
+TRACKER 额外为没有可用 tracker 的种子逐个请求 torrents/trackers。
+
+    cd backend
+    python -m tools.benchmark_fields --torrents 10000 --unregistered 200
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+import httpx
+
+
+class CountingTransport(httpx.AsyncBaseTransport):
+    """包装传输层，统计响应体字节数"""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport):
+        self.inner = inner
+        self.bytes = 0
+        self.requests = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.inner.handle_async_request(request)
+        body = await response.aread()
+        self.bytes += len(body)
+        self.requests += 1
+        return httpx.Response(response.status_code, headers=response.headers, content=body, request=request)
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+def unregistered_hashes(snapshot) -> set[str]:
+    """与 check_unregistered_torrents 相同的判断"""
+    return {t.info_hash.lower() for t in snapshot if "unregistered" in t.tracker_msg.lower()}
+
+
+async def measure(dtype: str, box, fields) -> dict:
+    """新建适配器全量查询一次，返回响应字节数、耗时、内存峰值和 unregistered 种子"""
+    from services.downloader import create_downloader
+    from tools.downloader_emulator import create_emulator_app
+
+    transport = CountingTransport(httpx.ASGITransport(app=create_emulator_app(dtype, box)))
+    dl = create_downloader(
+        dtype, host="emulator", port=80, username=box.username, password=box.password, transport=transport,
+    )
+    try:
+        await dl.test_connection()
+        transport.bytes = transport.requests = 0
+        tracemalloc.start()
+        start = time.perf_counter()
+        snapshot = await dl.get_all_torrents(fields=fields)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        await dl.close()
+    return {
+        "bytes": transport.bytes,
+        "requests": transport.requests,
+        "seconds": elapsed,
+        "peak": peak,
+        "count": len(snapshot),
+        "unregistered": unregistered_hashes(snapshot),
+    }
+
+
+async def run(args) -> int:
+    from services.downloader import TorrentFields
+    from tools.downloader_emulator import SimulatedSeedbox
+
+    failed = 0
+    for dtype in args.types:
+        box = SimulatedSeedbox(torrents=args.torrents, seed=args.seed)
+        box.churn(0, unregistered=args.unregistered)
+        expected = {h for h, t in box.torrents.items() if t.tracker_error}
+        print(f"\n{dtype}（{len(box.torrents)} 个种子，其中 unregistered {len(expected)} 个）")
+        if not expected:
+            print("对照集为空：没有 unregistered 种子，比较没有意义")
+            failed += 1
+            continue
+        print(f"{'字段配置':<10}{'请求数':>8}{'响应体积':>12}{'耗时':>12}{'内存峰值':>12}{'unregistered':>14}")
+        checked = [TorrentFields.TRACKER] + ([TorrentFields.FULL] if dtype == "transmission" else [])
+        for fields in TorrentFields:
+            r = await measure(dtype, box, fields)
+            print(f"{fields.value:<10}{r['requests']:>8}{r['bytes'] / 1024 ** 2:>10.2f}MB"
+                  f"{r['seconds'] * 1000:>10.0f}ms{r['peak'] / 1024 ** 2:>10.1f}MB{len(r['unregistered']):>14}")
+            if fields in checked and (r["unregistered"] != expected or r["count"] != len(box.torrents)):
+                failed += 1
+                print(f"{fields.value} 识别结果与对照不一致: 识别 {len(r['unregistered'])} 个，"
+                      f"漏报 {len(expected - r['unregistered'])} 个，误报 {len(r['unregistered'] - expected)} 个")
+    return failed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="种子查询字段配置对比（下载器模拟器）")
+    parser.add_argument("--type", default="both", choices=["qbittorrent", "transmission", "both"])
+    parser.add_argument("--torrents", type=int, default=10000, help="下载器中的种子数")
+    parser.add_argument("--unregistered", type=int, default=200, help="标记为 unregistered 的种子数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    args.types = ["qbittorrent", "transmission"] if args.type == "both" else [args.type]
+    return args
+
+
+def main():
+    args = parse_args()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault("DEBUG", "false")
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(1 if asyncio.run(run(args)) else 0)
+
+
+if __name__ == "__main__":
+    main()
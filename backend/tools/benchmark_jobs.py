@@ -0,0 +1,142 @@
+"""
+定时任务基准测试
+
+用进程内下载器模拟器和临时 SQLite 数据库运行状态同步、unregistered 检查、动态删种等任务，
+报告每个任务每轮的耗时和向下载器发出的请求数。
+
+    cd backend
+    python -m tools.benchmark_jobs --type qbittorrent --torrents 50000 --records 5000 --latency 0.02
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+JOBS = ("sync_download_status", "check_unregistered_torrents", "check_dynamic_delete")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="定时任务基准测试（下载器模拟器）")
+    parser.add_argument("--type", default="both", choices=["qbittorrent", "transmission", "both"])
+    parser.add_argument("--downloaders", type=int, default=1, help="每种类型的下载器数量")
+    parser.add_argument("--torrents", type=int, default=20000, help="每个下载器中的种子数")
+    parser.add_argument("--records", type=int, default=2000, help="每个下载器对应的活跃历史记录数")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟随机抖动上限（秒）")
+    parser.add_argument("--churn", type=int, default=500, help="每轮之间状态变化的种子数")
+    parser.add_argument("--rounds", type=int, default=3, help="每个任务运行的轮数")
+    parser.add_argument("--jobs", default=",".join(JOBS), help="要运行的任务，逗号分隔")
+    parser.add_argument("--timeout", type=float, default=60.0, help="单个下载器调用的截止时间（秒）")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+async def prepare(args, types: list[str]):
+    """建表并写入下载器、历史记录和自动删种设置，返回 [(Downloader, SimulatedSeedbox)]"""
+    from database import async_session, init_db
+    from models import DownloadHistory, Downloader, SystemSetting
+    from services.downloader_registry import downloader_registry
+    from tools.downloader_emulator import SimulatedSeedbox, emulated_downloader
+
+    await init_db()
+    rng = random.Random(args.seed)
+    targets = []
+    async with async_session() as db:
+        for dtype in types:
+            for n in range(args.downloaders):
+                box = SimulatedSeedbox(
+                    torrents=args.torrents, seed=args.seed + n, latency=args.latency, jitter=args.jitter,
+                )
+                dl_model = Downloader(
+                    name=f"{dtype}-{n + 1}", type=dtype, host="emulator", port=80,
+                    username=box.username, password=box.password,
+                )
+                db.add(dl_model)
+                await db.flush()
+                downloader_registry.install(dl_model, emulated_downloader(dtype, box))
+                targets.append((dl_model, box))
+
+                now = datetime.utcnow()
+                for i, t in enumerate(rng.sample(list(box.torrents.values()), min(args.records, len(box.torrents)))):
+                    db.add(DownloadHistory(
+                        torrent_id=str(100000 + i), info_hash=t.info_hash.upper(), title=t.name,
+                        size=t.size, status="seeding" if t.progress >= 1 else "downloading",
+                        downloader_id=dl_model.id, created_at=now - timedelta(minutes=args.records - i),
+                    ))
+
+        # 上限取最小下载器已用空间的 95%，保证动态删种会真正删除一批种子
+        disk_max_gb = min(box.used_space for _, box in targets) * 0.95 / 1024 ** 3
+        db.add(SystemSetting(key="auto_delete", value={
+            "enabled": True,
+            "delete_unregistered": True,
+            "dynamic_delete_enabled": True,
+            "disk_max_gb": disk_max_gb,
+            "disk_target_gb": disk_max_gb * 0.98,
+        }))
+        await db.commit()
+    return targets
+
+
+async def run(args):
+    from services import scheduler
+    from services.downloader_registry import close_downloaders, get_downloader
+
+    types = ["qbittorrent", "transmission"] if args.type == "both" else [args.type]
+    targets = await prepare(args, types)
+    jobs = [name for name in args.jobs.split(",") if name]
+
+    print(
+        f"下载器: {', '.join(dl.name for dl, _ in targets)}；每个 {args.torrents} 个种子、"
+        f"{args.records} 条活跃记录；延迟 {args.latency * 1000:.0f}ms；每轮变化 {args.churn} 个种子"
+    )
+    print(f"{'任务':<30}{'轮次':>4}{'耗时(ms)':>12}{'请求数':>8}  请求明细")
+    summary = []
+    for job in jobs:
+        func = getattr(scheduler, job)
+        for round_no in range(1, args.rounds + 1):
+            for dl_model, box in targets:
+                box.churn(args.churn if round_no > 1 else 0, unregistered=args.churn // 100)
+                box.reset_counters()
+                # 真实调度间隔远大于缓存有效期，每轮都从下载器重新读取
+                get_downloader(dl_model).expire_caches()
+            start = time.perf_counter()
+            await func()
+            elapsed = (time.perf_counter() - start) * 1000
+            counts = Counter()
+            for _, box in targets:
+                counts.update(box.reset_counters())
+            detail = ", ".join(f"{k.rsplit('/', 1)[-1]}={v}" for k, v in sorted(counts.items()))
+            print(f"{job:<30}{round_no:>4}{elapsed:>12.1f}{sum(counts.values()):>8}  {detail}")
+            summary.append((job, round_no, elapsed, sum(counts.values())))
+
+    await close_downloaders()
+    return summary
+
+
+def main():
+    args = parse_args()
+    # 必须在导入 config 之前指定临时数据库
+    db_dir = tempfile.mkdtemp(prefix="nicept-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(db_dir, 'bench.db')}"
+    os.environ.setdefault("DEBUG", "false")
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+
+    from config import settings
+    settings.fanout_timeout = args.timeout
+
+    try:
+        asyncio.run(run(args))
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+种子列表解析器一致性检查与基准测试
+
+逐字段比较 bs4 与 lxml 两个解析后端的输出：
+- tools/fixtures/listing/ 下保存的种子列表页（手写的边角情况页 + 生成页），每页都必须解析出种子
+- 随机生成的带各种边角情况的 NexusPHP 种子列表页（置顶、促销图标 / 文字、促销截止时间、H&R、
+  进度条、多种副标题写法、懒加载缩略图、千分位做种数等）
+然后报告每页的解析耗时。任一字段不一致或解析不到种子时以非零状态退出；
+--check 只做一致性检查（镜像构建时执行，见 Dockerfile）。
+
+    cd backend
+    python -m tools.benchmark_parsers --pages 30 --rows 100
+    python -m tools.benchmark_parsers --check
+    python -m tools.benchmark_parsers --save-fixtures   # 重新生成 fixtures 中的生成页
+"""
+import argparse
+import dataclasses
+import glob
+import logging
+import os
+import random
+import sys
+import time
+
+SITE_URL = "https://example.org"
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "listing")
+# 保存到 fixtures 的生成页：（随机种子, 行数）
+SAVED_PAGES = ((100, 40), (101, 40))
+
+_PROMOS = (
+    "",
+    '<img class="pro_free" src="pic/trans.gif" alt="Free" />',
+    '<img class="pro_free2up" alt="2xFree"/>',
+    '<img class="pro_2up" />',
+    '<img class="pro_50pctdown"/>',
+    '<font class="free">免费</font>',
+    '<img class="pro_custom x"/>',
+)
+_PROGRESS = (
+    "",
+    '<div title="seeding 100%" style="background-color: green; height: 2px; width: 100%"></div>',
+    '<div style="background-color: red; height: 2px; width: 45.5%"></div>',
+    '<div title="downloading 33.3%" style="width:33%;background-color:orange;height:2px"></div>',
+)
+_SUBTITLES = (
+    "<br />副标题 &amp; 中字 {i}",
+    "<br/>\n",
+    '<br /><span class="tag">tag</span>',
+    "<br/>x",
+    "<br /> <!-- c -->后续 {i}",
+)
+
+
+def fixture_row(i: int, rng: random.Random) -> str:
+    promo = rng.choice(_PROMOS)
+    end = (f'<span title="2026-0{rng.randint(1, 9)}-1{rng.randint(0, 9)} 17:34:02">剩余 1天</span>'
+           if promo and rng.random() < 0.8 else "")
+    hr = '<img class="hitandrun" src="hr.png" />' if rng.random() < 0.3 else ""
+    progress = rng.choice(_PROGRESS)
+    subtitle = rng.choice(_SUBTITLES).replace("{i}", str(i))
+    thumb = f'<img class="nexus-lazy-load" data-src="/t{i}.jpg" src="pic/blank.gif"/>' if rng.random() < 0.5 else ""
+    cat = rng.randint(401, 412)
+    tid = 100000 - i
+    sticky = ' class="sticky_top"' if i < 2 else ""
+    return f'''<tr>
+<td class="rowfollow nowrap" valign="middle"><a href="?cat={cat}"><img class="c_movie" src="pic/cattrans.gif" alt="Movies{cat}" title="电影" /></a></td>
+<td class="rowfollow" width="100%" align="left"><table class="torrentname" width="100%"><tr{sticky}>
+<td class="embedded">{thumb}</td>
+<td class="embedded"><a title="Some.Movie.{i}.2024.1080p.BluRay.x264-GRP" href="details.php?id={tid}&amp;hit=1"><b>Some.Movie.{i}.2024.1080p</b></a>{promo}{end}{hr}{subtitle}{progress}</td>
+<td width="80" class="embedded" style="text-align: right; " valign="middle"><a href="bookmark.php?id={tid}"><img class="delbookmark" src="pic/trans.gif" alt="Unbookmarked" title="收藏" /></a></td>
+</tr></table></td>
+<td class="rowfollow"><a href="comment.php?action=add&amp;pid={tid}&amp;type=torrent" title="添加评论">0</a></td>
+<td class="rowfollow nowrap"><span title="2024-10-01 12:00:00">1天<br />2时</span></td>
+<td class="rowfollow">{rng.randint(1, 999)}.{rng.randint(0, 99)}<br />{rng.choice(["GB", "MB", "TB", "KB"])}</td>
+<td class="rowfollow" align="center"><b><a href="details.php?id={tid}&amp;hit=1&amp;dllist=1#seeders">{rng.randint(0, 5000):,}</a></b></td>
+<td class="rowfollow"><b><a href="details.php?id={tid}&amp;hit=1&amp;dllist=1#leechers">{rng.randint(0, 50)}</a></b></td>
+<td class="rowfollow"><a href="viewsnatches.php?id={tid}"><b>{rng.randint(0, 9999)}</b></a></td>
+<td class="rowfollow"><i>匿名</i><script>var x=1;</script></td>
+</tr>'''
+
+
+def fixture_page(rows: int = 100, seed: int = 0) -> str:
+    """生成一页种子列表 HTML"""
+    rng = random.Random(seed)
+    body = "\n".join(fixture_row(i, rng) for i in range(rows))
+    return f'''<!DOCTYPE html><html><head><meta charset="utf-8"><title>torrents</title></head><body>
+<table class="main"><tr><td><table class="torrents" cellspacing="0" cellpadding="5" width="100%">
+<tr><td class="colhead">类型</td><td class="colhead">标题</td></tr>
+{body}
+</table></td></tr></table></body></html>'''
+
+
+def save_fixtures():
+    """把生成页写入 fixtures 目录（生成规则变化时重新保存）"""
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for seed, rows in SAVED_PAGES:
+        path = os.path.join(FIXTURE_DIR, f"generated_{seed}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(fixture_page(rows, seed))
+        print(f"已保存 {path}")
+
+
+def saved_pages() -> dict[str, str]:
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def field_diffs(expected, actual) -> list[str]:
+    """逐字段比较两个 TorrentInfo，返回不一致的字段说明"""
+    return [
+        f"{f.name}: bs4={getattr(expected, f.name)!r} lxml={getattr(actual, f.name)!r}"
+        for f in dataclasses.fields(expected)
+        if getattr(expected, f.name) != getattr(actual, f.name)
+    ]
+
+
+def compare_page(name: str, html: str) -> tuple[bool, int]:
+    """比较一页的两个后端输出，返回（是否一致, bs4 解析出的种子数）"""
+    from services.site_adapter import parse_listing_page
+
+    expected = parse_listing_page(html, SITE_URL, "bs4")
+    actual = parse_listing_page(html, SITE_URL, "lxml")
+    ok = True
+    if [t.id for t in expected] != [t.id for t in actual]:
+        print(f"{name}: 种子列表不同 bs4={[t.id for t in expected]} lxml={[t.id for t in actual]}")
+        ok = False
+    for a, b in zip(expected, actual):
+        diffs = field_diffs(a, b)
+        if diffs:
+            print(f"{name} 种子 {a.id} 不一致:\n  " + "\n  ".join(diffs))
+            ok = False
+    return ok, len(expected)
+
+
+def check_parity(pages: int, rows: int) -> int:
+    """比较保存的页面和 pages 个生成页，返回失败的页数（不一致，或解析不到应有的种子数）"""
+    failed = 0
+    saved = saved_pages()
+    if not saved:
+        print(f"{FIXTURE_DIR} 中没有保存的页面")
+        failed += 1
+    for name, html in saved.items():
+        ok, count = compare_page(name, html)
+        # 解析结果为空时“一致”没有意义（如页面结构变化导致两个后端都解析不到）
+        if not count:
+            print(f"{name}: 未解析出种子")
+        failed += not (ok and count)
+    parsed = 0
+    for seed in range(pages):
+        ok, count = compare_page(f"生成页 {seed}", fixture_page(rows, seed))
+        parsed += count
+        failed += not ok or count < rows
+    print(f"一致性: 保存的页面 {len(saved)} 个，生成页 {pages} 页 × {rows} 行（解析出 {parsed} 个种子），"
+          f"失败 {failed} 页")
+    return failed
+
+
+def benchmark(rows: int, repeat: int) -> dict[str, float]:
+    """每个后端解析同一页 repeat 次，返回平均每页毫秒数"""
+    from services.site_adapter import parse_listing_page
+
+    html = fixture_page(rows, seed=10_000)
+    result = {}
+    for backend in ("bs4", "lxml"):
+        parse_listing_page(html, SITE_URL, backend)  # 预热
+        start = time.perf_counter()
+        for _ in range(repeat):
+            parse_listing_page(html, SITE_URL, backend)
+        result[backend] = (time.perf_counter() - start) / repeat * 1000
+    return result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="种子列表解析器一致性检查与基准测试")
+    parser.add_argument("--pages", type=int, default=30, help="一致性检查的页数（每页不同随机种子）")
+    parser.add_argument("--rows", type=int, default=100, help="每页种子数")
+    parser.add_argument("--repeat", type=int, default=20, help="基准测试每个后端的解析次数")
+    parser.add_argument("--check", action="store_true", help="只做一致性检查，不运行基准测试")
+    parser.add_argument("--save-fixtures", action="store_true", help="重新保存 fixtures 中的生成页后退出")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault("DEBUG", "false")
+    # 解析器对缺失字段会记录警告，基准测试时不输出
+    logging.basicConfig(level=logging.CRITICAL)
+
+    if args.save_fixtures:
+        save_fixtures()
+        return
+    failed = check_parity(args.pages, args.rows)
+    if args.check:
+        sys.exit(1 if failed else 0)
+
+    timings = benchmark(args.rows, args.repeat)
+    for backend, ms in timings.items():
+        print(f"{backend:<6}{ms:>10.1f} ms/页")
+    print(f"lxml 加速 {timings['bs4'] / timings['lxml']:.1f}x")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
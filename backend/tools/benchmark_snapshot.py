@@ -0,0 +1,96 @@
+"""
+种子状态记录内存对比
+
+用 tracemalloc 测量构建 N 个种子状态时的内存占用：
+- 改动前：普通 dataclass（每个实例一个 __dict__）组成的列表，调用方再自行构建 hash（小写）-> 状态 的字典
+- 改动后：slots dataclass（TorrentStatus）直接放进 TorrentSnapshot 的索引
+
+    cd backend
+    python -m tools.benchmark_snapshot --torrents 50000
+"""
+import argparse
+import dataclasses
+import gc
+import os
+import secrets
+import sys
+import tracemalloc
+
+
+def plain_dataclass(cls):
+    """生成与 cls 字段相同、但不使用 slots 的 dataclass（改动前的写法）"""
+    fields = [(f.name, f.type, dataclasses.field(default=f.default)) for f in dataclasses.fields(cls)]
+    return dataclasses.make_dataclass(f"Plain{cls.__name__}", fields)
+
+
+def make_rows(count: int) -> list[dict]:
+    """模拟下载器返回的种子字段（构造参数在测量前生成，不计入）"""
+    return [{
+        "info_hash": secrets.token_hex(20).upper(),
+        "name": f"Simulated.Torrent.{i}.1080p.WEB-DL",
+        "size": 8 * 1024 ** 3 + i,
+        "progress": 1.0,
+        "status": "seeding",
+        "state": "seeding",
+        "save_path": "/downloads",
+        "tracker_msg": "Success",
+        "total_size": 8 * 1024 ** 3 + i,
+    } for i in range(count)]
+
+
+def measure(build, rows: list[dict]) -> int:
+    """返回 build(rows) 的结果仍存活时的内存增量（字节）"""
+    gc.collect()
+    tracemalloc.start()
+    result = build(rows)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def run(count: int) -> dict[str, int]:
+    from services.downloader import TorrentSnapshot, TorrentStatus
+
+    plain_status = plain_dataclass(TorrentStatus)
+    rows = make_rows(count)
+
+    def before(rows):
+        torrents = [plain_status(**row) for row in rows]
+        return torrents, {t.info_hash.lower(): t for t in torrents}
+
+    def after(rows):
+        return TorrentSnapshot(TorrentStatus(**row) for row in rows)
+
+    return {
+        "records_plain": measure(lambda rows: [plain_status(**row) for row in rows], rows),
+        "records_slots": measure(lambda rows: [TorrentStatus(**row) for row in rows], rows),
+        "before": measure(before, rows),
+        "after": measure(after, rows),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="种子状态记录内存对比")
+    parser.add_argument("--torrents", type=int, default=50000, help="种子数")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault("DEBUG", "false")
+
+    result = run(args.torrents)
+    mib = 1024 ** 2
+    print(f"{args.torrents} 个种子")
+    print(f"记录本身     普通 dataclass {result['records_plain'] / mib:>7.1f} MiB"
+          f"    slots {result['records_slots'] / mib:>7.1f} MiB")
+    print(f"列表 + 字典（改动前）       {result['before'] / mib:>7.1f} MiB")
+    print(f"TorrentSnapshot（改动后）   {result['after'] / mib:>7.1f} MiB")
+    print(f"节省 {(result['before'] - result['after']) / mib:.1f} MiB"
+          f"（{1 - result['after'] / result['before']:.0%}）")
+
+
+if __name__ == "__main__":
+    main()
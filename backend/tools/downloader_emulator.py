@@ -0,0 +1,584 @@
+"""
+下载器模拟器
+
+进程内的 qBittorrent Web API / Transmission RPC 替身（ASGI 应用），用于在没有真实下载器时
+对状态同步、动态删种等定时任务做压测：
+- 可模拟数万个种子，按配置注入请求延迟和状态变化（下载完成、速率变化、新增 / 移除）
+- 记录每个接口的请求次数，供基准测试统计
+- 通过 httpx.ASGITransport 直接接入下载器适配器，不经过网络
+
+也可以单独启动，供本地运行的应用连接：
+    python -m tools.downloader_emulator --type qbittorrent --torrents 50000 --port 18080
+"""
+import asyncio
+import base64
+import hashlib
+import random
+import secrets
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import httpx
+from fastapi import FastAPI, Form, Request, Response, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from services.bencode import read_torrent_meta
+from services.downloader import BaseDownloader, create_downloader
+
+# Transmission 的 recently-active 只覆盖最近 60 秒内的变化
+RECENTLY_ACTIVE_SECONDS = 60
+
+
+@dataclass(slots=True)
+class SimTorrent:
+    """模拟器中的一个种子（状态使用 qBittorrent 的 state 字符串）"""
+    info_hash: str
+    tid: int
+    name: str
+    size: int
+    progress: float = 0.0
+    state: str = "downloading"   # downloading / stalledUP / uploading / pausedDL / pausedUP / error
+    dlspeed: int = 0
+    upspeed: int = 0
+    save_path: str = "/downloads"
+    tags: str = ""
+    tracker_error: str = ""      # 非空表示 tracker 返回错误（如 unregistered）
+    added_on: int = 0
+    changed_rev: int = 0         # 最近一次变化的版本号（sync/maindata 增量）
+    active_at: float = 0.0       # 最近一次变化的时间（Transmission recently-active）
+
+
+class SimulatedSeedbox:
+    """
+    模拟的下载器状态。
+    latency / jitter: 每个请求的固定延迟和随机抖动（秒）
+    churn_per_second: 每秒自动发生状态变化的种子数（在收到请求时按经过的时间补算）
+    """
+
+    def __init__(
+        self,
+        torrents: int = 10000,
+        seed: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        churn_per_second: float = 0.0,
+        seeding_ratio: float = 0.8,
+        avg_size: int = 8 * 1024 ** 3,
+        free_space: int = 2 * 1024 ** 4,
+        username: str = "admin",
+        password: str = "adminadmin",
+    ):
+        self.random = random.Random(seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.churn_per_second = churn_per_second
+        self.seeding_ratio = seeding_ratio
+        self.avg_size = avg_size
+        self.free_space = free_space
+        self.username = username
+        self.password = password
+
+        self.revision = 0
+        self.torrents: dict[str, SimTorrent] = {}      # 小写 hash -> 种子
+        self._ids: dict[int, str] = {}                 # Transmission 种子 ID -> hash
+        self._next_id = 1
+        self._removed: dict[str, tuple[int, int, float]] = {}  # hash -> (版本号, 种子 ID, 时间)
+        self._removed_floor = 0
+        self._churn_at = time.monotonic()
+        self._churn_carry = 0.0
+        self.tags: set[str] = set()
+        self.requests: Counter = Counter()
+
+        self.sid = secrets.token_hex(16)               # qBittorrent 会话 cookie
+        self.session_id = secrets.token_hex(24)        # Transmission X-Transmission-Session-Id
+
+        self.populate(torrents)
+
+    # ---- 状态变更 ----
+
+    def _touch(self, t: SimTorrent):
+        t.changed_rev = self.revision
+        t.active_at = time.monotonic()
+
+    def _bump(self) -> int:
+        self.revision += 1
+        return self.revision
+
+    def add(self, info_hash: str = "", name: str = "", size: int = 0,
+            save_path: str = "", tags: str = "", seeding: bool = False) -> SimTorrent:
+        """添加一个种子；已存在时返回原种子"""
+        info_hash = (info_hash or secrets.token_hex(20)).lower()
+        existing = self.torrents.get(info_hash)
+        if existing:
+            return existing
+        self._bump()
+        size = size or max(1, int(self.random.expovariate(1 / self.avg_size)))
+        t = SimTorrent(
+            info_hash=info_hash, tid=self._next_id,
+            name=name or f"Simulated.Torrent.{self._next_id}.1080p.WEB-DL",
+            size=size,
+            progress=1.0 if seeding else 0.0,
+            state="stalledUP" if seeding else "downloading",
+            dlspeed=0 if seeding else self.random.randint(1, 50) * 1024 ** 2,
+            save_path=save_path or "/downloads",
+            tags=tags,
+            added_on=int(time.time()),
+        )
+        self._touch(t)
+        self.torrents[info_hash] = t
+        self._ids[t.tid] = info_hash
+        self._removed.pop(info_hash, None)
+        self._next_id += 1
+        return t
+
+    def populate(self, count: int):
+        for _ in range(count):
+            self.add(seeding=self.random.random() < self.seeding_ratio)
+
+    def remove(self, hashes: Iterable[str]) -> int:
+        removed = 0
+        for h in hashes:
+            t = self.torrents.pop(h.lower(), None)
+            if t is None:
+                continue
+            if not removed:
+                self._bump()
+            self._ids.pop(t.tid, None)
+            self._removed[t.info_hash] = (self.revision, t.tid, time.monotonic())
+            removed += 1
+        # 移除记录只保留最近一部分，更早的 rid 退化为全量
+        if len(self._removed) > 10000:
+            keep = sorted(self._removed.items(), key=lambda kv: kv[1][0])[-5000:]
+            self._removed_floor = keep[0][1][0]
+            self._removed = dict(keep)
+        return removed
+
+    def pause(self, hashes: Iterable[str]) -> int:
+        paused = 0
+        for h in hashes:
+            t = self.torrents.get(h.lower())
+            if t is None or t.state.startswith("paused"):
+                continue
+            if not paused:
+                self._bump()
+            t.state = "pausedUP" if t.progress >= 1 else "pausedDL"
+            t.dlspeed = t.upspeed = 0
+            self._touch(t)
+            paused += 1
+        return paused
+
+    def resume(self, hashes: Iterable[str]) -> int:
+        resumed = 0
+        for h in hashes:
+            t = self.torrents.get(h.lower())
+            if t is None or not t.state.startswith("paused"):
+                continue
+            if not resumed:
+                self._bump()
+            t.state = "stalledUP" if t.progress >= 1 else "downloading"
+            self._touch(t)
+            resumed += 1
+        return resumed
+
+    def churn(self, count: int, added: int = 0, removed: int = 0, unregistered: int = 0):
+        """
+        模拟一批状态变化：count 个种子推进下载进度或变化上传速率，
+        并新增 added 个、移除 removed 个、标记 unregistered 个 tracker 错误。
+        """
+        if not (count or added or removed or unregistered):
+            return
+        self._bump()
+        hashes = list(self.torrents)
+        for h in self.random.sample(hashes, min(count, len(hashes))):
+            t = self.torrents[h]
+            if t.state == "downloading":
+                t.progress = min(1.0, round(t.progress + self.random.choice((0.25, 0.5, 1.0)), 4))
+                if t.progress >= 1:
+                    t.state, t.dlspeed = "uploading", 0
+            elif not t.state.startswith("paused"):
+                t.upspeed = self.random.randint(0, 20) * 1024 ** 2
+                t.state = "uploading" if t.upspeed else "stalledUP"
+            self._touch(t)
+        for h in self.random.sample(hashes, min(unregistered, len(hashes))):
+            t = self.torrents[h]
+            t.tracker_error = "Unregistered torrent"
+            self._touch(t)
+        if removed:
+            self.remove(self.random.sample(list(self.torrents), min(removed, len(self.torrents))))
+        for _ in range(added):
+            self.add()
+
+    def _auto_churn(self):
+        """按经过的时间补算自动状态变化"""
+        now = time.monotonic()
+        if self.churn_per_second > 0:
+            self._churn_carry += (now - self._churn_at) * self.churn_per_second
+            count = int(self._churn_carry)
+            if count:
+                self._churn_carry -= count
+                self.churn(count)
+        self._churn_at = now
+
+    async def handle_request(self, key: str):
+        """每个请求的公共处理：计数、注入延迟、补算状态变化"""
+        self.requests[key] += 1
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._auto_churn()
+
+    # ---- 统计 ----
+
+    @property
+    def used_space(self) -> int:
+        return sum(t.size for t in self.torrents.values())
+
+    def speeds(self) -> tuple[int, int]:
+        return (
+            sum(t.dlspeed for t in self.torrents.values()),
+            sum(t.upspeed for t in self.torrents.values()),
+        )
+
+    def reset_counters(self) -> Counter:
+        """返回并清空请求计数"""
+        counts, self.requests = self.requests, Counter()
+        return counts
+
+    def add_from_torrent_file(self, data: bytes, save_path: str = "", tags: str = "") -> SimTorrent:
+        meta = read_torrent_meta(data)
+        if meta:
+            return self.add(meta.hash_id, meta.name, meta.total_size, save_path, tags)
+        return self.add(hashlib.sha1(data).hexdigest(), save_path=save_path, tags=tags)
+
+
+# ---------------------------------------------------------------------------
+# qBittorrent Web API v2
+# ---------------------------------------------------------------------------
+
+_TRACKER_URL = "https://tracker.example.org/announce.php?passkey=0123456789abcdef"
+
+
+def _qb_torrent(t: SimTorrent) -> dict:
+    return {
+        "hash": t.info_hash,
+        "name": t.name,
+        "size": t.size,
+        "total_size": t.size,
+        "progress": t.progress,
+        "state": t.state,
+        "dlspeed": t.dlspeed,
+        "upspeed": t.upspeed,
+        "save_path": t.save_path,
+        "tags": t.tags,
+        "added_on": t.added_on,
+        "num_complete": 0 if t.tracker_error else 10,
+        # 当前可用的 tracker；没有可用 tracker（如 unregistered）时为空
+        "tracker": "" if t.tracker_error else _TRACKER_URL,
+    }
+
+
+def _qb_trackers(t: SimTorrent) -> list[dict]:
+    """torrents/trackers：前三项固定为 DHT / PeX / LSD，之后是真实 tracker（status 2 正常 / 4 不可用）"""
+    pseudo = [{"url": f"** [{name}] **", "status": 2, "tier": "", "num_peers": 0, "msg": ""}
+              for name in ("DHT", "PeX", "LSD")]
+    return pseudo + [{
+        "url": _TRACKER_URL, "status": 4 if t.tracker_error else 2, "tier": 0,
+        "num_peers": 0 if t.tracker_error else 10, "num_seeds": 0 if t.tracker_error else 10,
+        "num_leeches": 0, "num_downloaded": 0, "msg": t.tracker_error,
+    }]
+
+
+def _qb_server_state(box: SimulatedSeedbox) -> dict:
+    dl_speed, up_speed = box.speeds()
+    return {"dl_info_speed": dl_speed, "up_info_speed": up_speed, "free_space_on_disk": box.free_space}
+
+
+def create_qbittorrent_app(box: SimulatedSeedbox) -> FastAPI:
+    """qBittorrent Web API 模拟（登录、种子列表、sync/maindata、添加 / 删除 / 暂停、标签）"""
+    app = FastAPI(title="qBittorrent emulator")
+
+    @app.middleware("http")
+    async def account(request: Request, call_next):
+        path = request.url.path
+        await box.handle_request(path)
+        if path != "/api/v2/auth/login" and request.cookies.get("SID") != box.sid:
+            return PlainTextResponse("Forbidden", status_code=403)
+        return await call_next(request)
+
+    @app.post("/api/v2/auth/login")
+    async def login(username: str = Form(""), password: str = Form("")):
+        if (username, password) != (box.username, box.password):
+            return PlainTextResponse("Fails.")
+        response = PlainTextResponse("Ok.")
+        response.set_cookie("SID", box.sid)
+        return response
+
+    @app.get("/api/v2/app/version")
+    async def version():
+        return PlainTextResponse("v4.6.7")
+
+    @app.get("/api/v2/torrents/info")
+    async def torrents_info(hashes: str = "", filter: str = "all"):
+        if hashes and hashes != "all":
+            selected = (box.torrents.get(h.lower()) for h in hashes.split("|"))
+            torrents = [t for t in selected if t]
+        else:
+            torrents = list(box.torrents.values())
+        if filter == "seeding":
+            torrents = [t for t in torrents if t.progress >= 1]
+        elif filter == "downloading":
+            torrents = [t for t in torrents if t.progress < 1]
+        return [_qb_torrent(t) for t in torrents]
+
+    @app.get("/api/v2/sync/maindata")
+    async def maindata(rid: int = 0):
+        if rid <= 0 or rid > box.revision or rid < box._removed_floor:
+            return {
+                "rid": box.revision, "full_update": True,
+                "torrents": {h: _qb_torrent(t) for h, t in box.torrents.items()},
+                "tags": sorted(box.tags),
+                "server_state": _qb_server_state(box),
+            }
+        data = {"rid": box.revision}
+        changed = {h: _qb_torrent(t) for h, t in box.torrents.items() if t.changed_rev > rid}
+        removed = [h for h, (rev, _, _) in box._removed.items() if rev > rid]
+        if changed:
+            data["torrents"] = changed
+        if removed:
+            data["torrents_removed"] = removed
+        data["server_state"] = _qb_server_state(box)
+        return data
+
+    @app.post("/api/v2/torrents/add")
+    async def add(torrents: list[UploadFile], savepath: str = Form(""), tags: str = Form("")):
+        for upload in torrents:
+            box.add_from_torrent_file(await upload.read(), savepath, tags)
+        return PlainTextResponse("Ok.")
+
+    @app.post("/api/v2/torrents/delete")
+    async def delete(hashes: str = Form(...), deleteFiles: str = Form("false")):
+        box.remove(hashes.split("|"))
+        return Response(status_code=200)
+
+    @app.post("/api/v2/torrents/pause")
+    @app.post("/api/v2/torrents/stop")
+    async def pause(hashes: str = Form(...)):
+        box.pause(hashes.split("|"))
+        return Response(status_code=200)
+
+    @app.post("/api/v2/torrents/resume")
+    @app.post("/api/v2/torrents/start")
+    async def resume(hashes: str = Form(...)):
+        box.resume(hashes.split("|"))
+        return Response(status_code=200)
+
+    @app.get("/api/v2/torrents/trackers")
+    async def trackers(hash: str):
+        t = box.torrents.get(hash.lower())
+        if t is None:
+            return PlainTextResponse("Torrent hash was not found", status_code=404)
+        return _qb_trackers(t)
+
+    @app.get("/api/v2/torrents/tags")
+    async def tags():
+        return sorted(box.tags)
+
+    @app.post("/api/v2/torrents/createTags")
+    async def create_tags(tags: str = Form("")):
+        box.tags.update(t.strip() for t in tags.split(",") if t.strip())
+        return Response(status_code=200)
+
+    return app
+
+
+# ---------------------------------------------------------------------------
+# Transmission RPC
+# ---------------------------------------------------------------------------
+
+def _tr_status(t: SimTorrent) -> int:
+    # 0 停止 / 4 下载中 / 6 做种中
+    if t.state.startswith("paused"):
+        return 0
+    return 6 if t.progress >= 1 else 4
+
+
+def _tr_field(t: SimTorrent, name: str):
+    if name == "id":
+        return t.tid
+    if name == "hashString":
+        return t.info_hash
+    if name == "name":
+        return t.name
+    if name in ("totalSize", "sizeWhenDone"):
+        return t.size
+    if name == "percentDone":
+        return t.progress
+    if name == "status":
+        return _tr_status(t)
+    if name == "rateDownload":
+        return t.dlspeed
+    if name == "rateUpload":
+        return t.upspeed
+    if name == "downloadDir":
+        return t.save_path
+    if name == "error":
+        return 2 if t.tracker_error else 0
+    if name == "errorString":
+        return t.tracker_error
+    if name == "trackerStats":
+        # 与真实 Transmission 一样每个 tracker 返回一组完整的统计字段（影响响应体积）
+        return [{
+            "id": 0, "tier": 0, "announce": _TRACKER_URL,
+            "scrape": "https://tracker.example.org/scrape.php?passkey=0123456789abcdef",
+            "host": "https://tracker.example.org:443", "sitename": "example",
+            "announceState": 0, "scrapeState": 1, "isBackup": False,
+            "hasAnnounced": True, "hasScraped": True,
+            "lastAnnounceResult": t.tracker_error or "Success",
+            "lastAnnounceSucceeded": not t.tracker_error, "lastAnnounceTimedOut": False,
+            "lastAnnounceStartTime": t.added_on, "lastAnnounceTime": t.added_on,
+            "lastAnnouncePeerCount": 0 if t.tracker_error else 10,
+            "nextAnnounceTime": t.added_on + 1800,
+            "lastScrapeResult": "", "lastScrapeSucceeded": True, "lastScrapeTimedOut": False,
+            "lastScrapeStartTime": t.added_on, "lastScrapeTime": t.added_on, "nextScrapeTime": t.added_on + 1800,
+            "seederCount": 0 if t.tracker_error else 10, "leecherCount": 0, "downloadCount": 0,
+        }]
+    if name == "labels":
+        return [label for label in t.tags.split(",") if label]
+    if name == "addedDate":
+        return t.added_on
+    return None
+
+
+def _tr_select(box: SimulatedSeedbox, ids) -> tuple[list[SimTorrent], Optional[list[int]]]:
+    """解析 ids 参数：省略 = 全部；"recently-active"；数字 ID 或 hashString 列表"""
+    if ids is None:
+        return list(box.torrents.values()), None
+    if ids == "recently-active":
+        since = time.monotonic() - RECENTLY_ACTIVE_SECONDS
+        torrents = [t for t in box.torrents.values() if t.active_at >= since]
+        removed = [tid for rev, tid, at in box._removed.values() if at >= since]
+        return torrents, removed
+    if not isinstance(ids, list):
+        ids = [ids]
+    torrents = []
+    for item in ids:
+        h = box._ids.get(item) if isinstance(item, int) else str(item).lower()
+        t = box.torrents.get(h) if h else None
+        if t:
+            torrents.append(t)
+    return torrents, None
+
+
+def create_transmission_app(box: SimulatedSeedbox) -> FastAPI:
+    """Transmission RPC 模拟（含 409 session id 握手与 Basic 认证）"""
+    app = FastAPI(title="Transmission emulator")
+    expected_auth = "Basic " + base64.b64encode(f"{box.username}:{box.password}".encode()).decode()
+
+    @app.post("/transmission/rpc")
+    async def rpc(request: Request):
+        payload = await request.json()
+        method = payload.get("method", "")
+        await box.handle_request(method)
+        if box.username and request.headers.get("Authorization") != expected_auth:
+            return Response(status_code=401)
+        if request.headers.get("X-Transmission-Session-Id") != box.session_id:
+            return Response(status_code=409, headers={"X-Transmission-Session-Id": box.session_id})
+
+        args = payload.get("arguments") or {}
+        result, arguments = "success", {}
+        if method == "session-get":
+            arguments = {"download-dir": "/downloads", "version": "4.0.6", "rpc-version": 17}
+        elif method == "session-stats":
+            dl_speed, up_speed = box.speeds()
+            arguments = {
+                "downloadSpeed": dl_speed, "uploadSpeed": up_speed,
+                "torrentCount": len(box.torrents),
+                "activeTorrentCount": sum(1 for t in box.torrents.values() if t.dlspeed or t.upspeed),
+                "pausedTorrentCount": sum(1 for t in box.torrents.values() if t.state.startswith("paused")),
+            }
+        elif method == "free-space":
+            arguments = {"path": args.get("path", ""), "size-bytes": box.free_space,
+                         "total_size": box.free_space + box.used_space}
+        elif method == "torrent-get":
+            fields = args.get("fields") or ["id", "hashString"]
+            torrents, removed = _tr_select(box, args.get("ids"))
+            arguments = {"torrents": [{f: _tr_field(t, f) for f in fields} for t in torrents]}
+            if removed is not None:
+                arguments["removed"] = removed
+        elif method == "torrent-add":
+            metainfo = args.get("metainfo")
+            if not metainfo:
+                result = "invalid or corrupt torrent file"
+            else:
+                data = base64.b64decode(metainfo)
+                meta = read_torrent_meta(data)
+                existing = box.torrents.get(meta.hash_id) if meta else None
+                t = existing or box.add_from_torrent_file(
+                    data, args.get("download-dir", ""), ",".join(args.get("labels") or []),
+                )
+                key = "torrent-duplicate" if existing else "torrent-added"
+                arguments = {key: {"id": t.tid, "hashString": t.info_hash, "name": t.name}}
+        elif method == "torrent-remove":
+            torrents, _ = _tr_select(box, args.get("ids"))
+            box.remove(t.info_hash for t in torrents)
+        elif method == "torrent-stop":
+            torrents, _ = _tr_select(box, args.get("ids"))
+            box.pause(t.info_hash for t in torrents)
+        elif method == "torrent-start":
+            torrents, _ = _tr_select(box, args.get("ids"))
+            box.resume(t.info_hash for t in torrents)
+        else:
+            result = f"method name not recognized: {method}"
+        return JSONResponse({"result": result, "arguments": arguments})
+
+    return app
+
+
+# ---------------------------------------------------------------------------
+# 接入
+# ---------------------------------------------------------------------------
+
+def create_emulator_app(dtype: str, box: SimulatedSeedbox) -> FastAPI:
+    if dtype == "qbittorrent":
+        return create_qbittorrent_app(box)
+    elif dtype == "transmission":
+        return create_transmission_app(box)
+    raise ValueError(f"不支持的下载器类型: {dtype}")
+
+
+def emulated_downloader(dtype: str, box: SimulatedSeedbox, host: str = "emulator", port: int = 80) -> BaseDownloader:
+    """创建经 ASGITransport 连接模拟器的下载器适配器"""
+    transport = httpx.ASGITransport(app=create_emulator_app(dtype, box))
+    return create_downloader(
+        dtype, host=host, port=port, username=box.username, password=box.password, transport=transport,
+    )
+
+
+def main():
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="qBittorrent / Transmission 下载器模拟器")
+    parser.add_argument("--type", default="qbittorrent", choices=["qbittorrent", "transmission"])
+    parser.add_argument("--torrents", type=int, default=10000, help="初始种子数")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟随机抖动上限（秒）")
+    parser.add_argument("--churn", type=float, default=0.0, help="每秒状态变化的种子数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    args = parser.parse_args()
+
+    box = SimulatedSeedbox(
+        torrents=args.torrents, seed=args.seed, latency=args.latency,
+        jitter=args.jitter, churn_per_second=args.churn,
+    )
+    print(f"{args.type} 模拟器: {args.torrents} 个种子，账号 {box.username} / {box.password}")
+    uvicorn.run(create_emulator_app(args.type, box), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()